@@ -0,0 +1,6 @@
+"""Benchmarks of the hooks on generated Odoo addons trees.
+
+``python -m benchmarks.generate`` writes a synthetic addons tree,
+``python -m benchmarks.run`` times every hook on trees of several sizes.
+Both only need the standard library and run offline.
+"""
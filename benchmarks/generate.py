@@ -0,0 +1,302 @@
+"""Generate a synthetic Odoo addons tree to benchmark the hooks on.
+
+The tree only depends on the parameters: the same call always writes the
+same files, so timings of different revisions can be compared. Every
+module has a manifest (with ``depends``, ``data`` and asset globs), model
+files extending each other across modules, XML data files, QWeb reports
+and static assets; a few lines break the rules (``print``, raw SQL, an
+uncommented ``sudo()``) so that the reporting is measured too.
+
+    python -m benchmarks.generate /tmp/addons --modules 100 --models 3
+"""
+import argparse
+import os
+import sys
+
+DEFAULTS = {
+    'modules': 10,
+    'models': 3,
+    'methods': 5,
+    'records': 20,
+    'reports': 1,
+    'assets': 4,
+}
+
+HELP = {
+    'modules': 'modules',
+    'models': 'models per module',
+    'methods': 'methods (and extra fields) per model',
+    'records': 'records per XML data file',
+    'reports': 'QWeb reports per module',
+    'assets': 'asset entries (globs first) per manifest',
+}
+
+FIELD_TYPES = ('Char', 'Integer', 'Float', 'Boolean', 'Date', 'Text')
+
+
+def module_name(index):
+    return f"bench_{index:04d}"
+
+
+def _model(module_index, model_index):
+    return f"bench.{module_index:04d}.model{model_index}"
+
+
+def _class_name(model_index):
+    return f"BenchModel{model_index}"
+
+
+def _parent(module_index):
+    # A tree of dependencies: deep enough to matter, without one long chain
+    return (module_index - 1) // 2
+
+
+def _method(name, index):
+    lines = [
+        f"    def {name}(self):",
+        f'        """Synthetic method {index}."""',
+        "        result = []",
+        "        for record in self:",
+        "            if record.active and record.sequence > 10:",
+        f"                result.append(record.sequence * {index + 1})",
+        "            else:",
+        "                result.append(0)",
+    ]
+    if index % 4 == 1:
+        lines.append("        partners = self.env['res.partner'].sudo().search([])  # read every partner")
+    if index % 4 == 2:
+        lines.append("        self.env['res.partner'].sudo().search([])")
+    if index % 7 == 3:
+        lines.append("        self.env.cr.execute(\"SELECT id FROM res_partner WHERE active = '%s'\" % self.id)")
+    if index % 11 == 5:
+        lines.append("        print(result)")
+    lines.append("        return result")
+    return lines
+
+
+def _model_file(module_index, model_index, methods):
+    lines = [
+        "from odoo import api, fields, models",
+        "",
+        "",
+        f"class {_class_name(model_index)}(models.Model):",
+        f"    _name = '{_model(module_index, model_index)}'",
+        f"    _description = 'Benchmark model {model_index} of {module_name(module_index)}'",
+        "",
+        "    name = fields.Char(required=True)",
+        "    active = fields.Boolean(default=True)",
+        "    sequence = fields.Integer(default=10)",
+    ]
+    for index in range(methods):
+        field_type = FIELD_TYPES[index % len(FIELD_TYPES)]
+        lines.append(f"    value_{index} = fields.{field_type}(string='Value {index}')")
+    lines.append("    total = fields.Float(compute='_compute_total', store=True)")
+    lines += [
+        "",
+        "    @api.depends('sequence')",
+        "    def _compute_total(self):",
+        "        for record in self:",
+        "            record.total = record.sequence * 2",
+    ]
+    for index in range(methods):
+        lines.append("")
+        lines += _method(f"action_{index}", index)
+    return lines
+
+
+def _inherit_file(module_index):
+    parent = _model(_parent(module_index), 0)
+    return [
+        "from odoo import api, fields, models",
+        "",
+        "",
+        "class BenchInherit(models.Model):",
+        f"    _inherit = '{parent}'",
+        "",
+        f"    extra_{module_index} = fields.Integer(compute='_compute_extra_{module_index}')",
+        "",
+        "    @api.depends('total')",
+        f"    def _compute_extra_{module_index}(self):",
+        "        for record in self:",
+        f"            record.extra_{module_index} = int(record.total)",
+    ]
+
+
+def _views_file(module_index, model_index, records):
+    model = _model(module_index, model_index)
+    xml_model = model.replace('.', '_')
+    lines = ['<?xml version="1.0" encoding="utf-8"?>', '<odoo>']
+    for index in range(records):
+        kind = index % 3
+        if kind == 0:
+            lines += [
+                f'    <record id="{xml_model}_view_form_{index}" model="ir.ui.view">',
+                f'        <field name="name">{model}.form.{index}</field>',
+                f'        <field name="model">{model}</field>',
+                '        <field name="arch" type="xml">',
+                '            <form>',
+                '                <sheet>',
+                '                    <field name="name"/>',
+                '                    <field name="sequence"/>',
+                '                </sheet>',
+                '            </form>',
+                '        </field>',
+                '    </record>',
+            ]
+        elif kind == 1:
+            lines += [
+                f'    <record id="{xml_model}_action_{index}" model="ir.actions.act_window">',
+                f'        <field name="name">Benchmark {index}</field>',
+                f'        <field name="res_model">{model}</field>',
+                '        <field name="view_mode">tree,form</field>',
+                '    </record>',
+            ]
+        else:
+            lines += [
+                f'    <record id="{xml_model}_data_{index}" model="{model}">',
+                f'        <field name="name">Record {index} é</field>',
+                f'        <field name="sequence">{index}</field>',
+                '    </record>',
+            ]
+    lines.append('</odoo>')
+    return lines
+
+
+def _report_file(module_index, report_index):
+    name = module_name(module_index)
+    model = _model(module_index, 0)
+    return [
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<odoo>',
+        f'    <record id="action_report_{report_index}" model="ir.actions.report">',
+        f'        <field name="name">Benchmark report {report_index}</field>',
+        f'        <field name="model">{model}</field>',
+        '        <field name="report_type">qweb-pdf</field>',
+        f'        <field name="report_name">{name}.report_document_{report_index}</field>',
+        '    </record>',
+        '',
+        f'    <template id="report_document_{report_index}">',
+        '        <t t-call="web.html_container">',
+        '            <t t-foreach="docs" t-as="doc">',
+        '                <div class="page"><span t-field="doc.name"/></div>',
+        '            </t>',
+        '        </t>',
+        '    </template>',
+        '</odoo>',
+    ]
+
+
+def _asset_entries(name, assets):
+    patterns = [
+        f"{name}/static/src/js/*.js",
+        f"{name}/static/src/scss/**/*.scss",
+        ('remove', f"{name}/static/src/js/legacy_*.js"),
+        f"{name}/static/src/xml/*.xml",
+    ]
+    entries = patterns[:assets]
+    entries += [f"{name}/static/src/js/widget_{index}.js" for index in range(assets - len(entries))]
+    return entries
+
+
+def _manifest(module_index, data, assets):
+    name = module_name(module_index)
+    depends = ['base'] + ([module_name(_parent(module_index))] if module_index else [])
+    manifest = {
+        'name': f"Benchmark module {module_index}",
+        'version': '17.0.1.0.0',
+        'category': 'Hidden',
+        'license': 'LGPL-3',
+        'depends': depends,
+        'data': data,
+        'assets': {'web.assets_backend': _asset_entries(name, assets)},
+        'installable': True,
+    }
+    lines = ['{']
+    for key, value in manifest.items():
+        lines.append(f"    {key!r}: {value!r},")
+    lines.append('}')
+    return lines
+
+
+def _module_files(module_index, options):
+    """Yield the ``(relative path, lines)`` of the files of one module."""
+    name = module_name(module_index)
+    model_files = [f"bench_model_{index}" for index in range(options['models'])]
+    if module_index:
+        model_files.append('bench_inherit')
+
+    yield '__init__.py', ['from . import models']
+    yield 'models/__init__.py', [f"from . import {model_file}" for model_file in model_files]
+    for index in range(options['models']):
+        yield f"models/bench_model_{index}.py", _model_file(module_index, index, options['methods'])
+    if module_index:
+        yield 'models/bench_inherit.py', _inherit_file(module_index)
+
+    data = ['security/ir.model.access.csv']
+    access = ['id,name,model_id:id,group_id:id,perm_read,perm_write,perm_create,perm_unlink']
+    for index in range(options['models']):
+        xml_model = _model(module_index, index).replace('.', '_')
+        access.append(f"access_{xml_model},{xml_model},model_{xml_model},base.group_user,1,1,1,1")
+        data.append(f"views/bench_model_{index}_views.xml")
+        yield f"views/bench_model_{index}_views.xml", _views_file(module_index, index, options['records'])
+    yield 'security/ir.model.access.csv', access
+    for index in range(options['reports']):
+        data.append(f"report/bench_report_{index}.xml")
+        yield f"report/bench_report_{index}.xml", _report_file(module_index, index)
+
+    yield '__manifest__.py', _manifest(module_index, data, options['assets'])
+    yield 'static/src/js/legacy_0.js', ['/** @odoo-module **/', 'export const legacy = 0;']
+    for index in range(max(options['assets'] - 4, 1)):
+        yield f"static/src/js/widget_{index}.js", ['/** @odoo-module **/', f"export const widget = {index};"]
+    yield 'static/src/scss/main.scss', [f".o_{name} {{", '    color: red;', '}']
+    yield 'static/src/xml/templates.xml', [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<templates xml:space="preserve">',
+        f'    <t t-name="{name}.Widget"><div class="o_{name}"/></t>',
+        '</templates>',
+    ]
+
+
+def generate(directory, **options):
+    """Write an addons tree in ``directory`` and return the number of files written.
+
+    ``options`` are the counts of ``DEFAULTS``: modules, models per module,
+    methods per model, XML records per data file, reports per module and
+    asset entries per manifest.
+    """
+    options = dict(DEFAULTS, **options)
+    count = 0
+    for module_index in range(options['modules']):
+        module_path = os.path.join(directory, module_name(module_index))
+        for relative_path, lines in _module_files(module_index, options):
+            path = os.path.join(module_path, relative_path)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8', newline='\n') as f:
+                f.write('\n'.join(lines) + '\n')
+            count += 1
+    return count
+
+
+def add_generator_arguments(parser, exclude=()):
+    for name, default in DEFAULTS.items():
+        if name in exclude:
+            continue
+        parser.add_argument(f"--{name}", type=int, default=default, metavar='N',
+                            help=f"Number of {HELP[name]} (default: {default})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic Odoo addons tree")
+    parser.add_argument('directory', help='Where to write the modules, must be empty or missing')
+    add_generator_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if os.path.isdir(args.directory) and os.listdir(args.directory):
+        parser.error(f"{args.directory} is not empty")
+    count = generate(args.directory, **{name: getattr(args, name) for name in DEFAULTS})
+    print(f"✅ {count} files written in {args.directory}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""Time every hook on generated addons trees of several sizes.
+
+Each hook runs in its own process with ``--all-files --no-cache``, the way
+a full pre-commit run invokes it, and is measured from the outside: wall
+time, throughput in analyzed files per second and peak RSS. ``daisy-check``
+is measured too, running every rule in one process.
+
+    python -m benchmarks.run --sizes 10,100,1000
+    python -m benchmarks.run --sizes 100 --hooks check_sql,check_lines_max --json before.json
+
+The trees are generated in a temporary directory (or in ``--workdir``,
+where they are kept and reused) and made git checkouts when ``git`` is
+installed, so files are listed like in a real repository. Linux only:
+peak RSS comes from ``wait4``.
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.generate import DEFAULTS, add_generator_arguments, generate
+from scripts.rules import RULES, load_rule
+from scripts.runner import build_parser
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+
+# Options a hook needs to check anything on the generated trees
+HOOK_ARGUMENTS = {
+    'check_module_names': ['--allowed-prefixes', 'bench_'],
+    'check_xml_filenames': ['--allowed-prefixes', 'bench_,templates'],
+    'check_requirements': ['--required_keys', 'name,version,license'],
+    'daisy_check': ['--module-prefixes', 'bench_', '--xml-prefixes', 'bench_,templates',
+                    '--required_keys', 'name,version,license'],
+}
+DEFAULT_TIMEOUT = 600
+
+
+def hook_names():
+    """The hooks running rules (``check_branch_push`` checks the branch, not files), then ``daisy_check``."""
+    return sorted({module for module, _ in RULES.values()}) + ['daisy_check']
+
+
+def _hook_rule_classes(hook):
+    if hook == 'daisy_check':
+        return [load_rule(rule_id) for rule_id in RULES]
+    return [load_rule(rule_id) for rule_id, (module, _) in RULES.items() if module == hook]
+
+
+def count_files(hook, tree):
+    """The number of files the rules of ``hook`` analyze in ``tree``."""
+    rule_classes = _hook_rule_classes(hook)
+    parser = build_parser(rule_classes, hook, combined=hook == 'daisy_check')
+    args = parser.parse_args(['--all-files'] + HOOK_ARGUMENTS.get(hook, []))
+    args.directory = tree
+    files = set()
+    for rule_class in rule_classes:
+        rule = rule_class(args)
+        if rule.is_enabled():
+            files.update(rule.select_files([], True))
+    return len(files)
+
+
+def measure(command, cwd, env, timeout):
+    """Run ``command``, return ``(seconds, peak RSS in KiB, exit code)``, exit code ``None`` on timeout."""
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=cwd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    timer = threading.Timer(timeout, process.kill)
+    timer.start()
+    try:
+        _, status, usage = os.wait4(process.pid, 0)
+    finally:
+        timer.cancel()
+    seconds = time.perf_counter() - start
+    # Reaped by ``wait4``, ``Popen`` must not wait for it again
+    process.returncode = 0
+    if os.WIFSIGNALED(status):
+        return seconds, usage.ru_maxrss, None
+    return seconds, usage.ru_maxrss, os.WEXITSTATUS(status)
+
+
+def prepare_tree(directory, modules, options):
+    """Generate the tree of ``modules`` modules in ``directory``, unless it is already there."""
+    # Named after every count, a tree is only reused with the same options
+    counts = '-'.join(str(options[name]) for name in sorted(options))
+    tree = os.path.join(directory, f"addons-{modules}-{counts}")
+    if not os.path.isdir(tree):
+        generate(tree, modules=modules, **options)
+        if shutil.which('git'):
+            subprocess.run(['git', 'init', '-q', tree], check=True)
+    return tree
+
+
+def _format_row(row):
+    if row['exit_code'] is None:
+        return f"{row['hook']:<30} {row['modules']:>7} {row['files']:>7}   timeout"
+    rate = f"{row['files'] / row['seconds']:>9.0f}" if row['files'] else f"{'-':>9}"
+    return (f"{row['hook']:<30} {row['modules']:>7} {row['files']:>7} {row['seconds']:>9.2f} {rate}"
+            f" {row['peak_rss_kib'] / 1024:>10.1f}")
+
+
+def run_benchmarks(directory, sizes, hooks, options, jobs=1, timeout=DEFAULT_TIMEOUT):
+    """Time ``hooks`` on a tree of each size, printing every result as it comes, and return them."""
+    env = dict(os.environ, DAISY_CACHE_DIR=os.path.join(directory, 'cache'), PYTHONIOENCODING='utf-8')
+    print(f"{'hook':<30} {'modules':>7} {'files':>7} {'seconds':>9} {'files/s':>9} {'peak MiB':>10}")
+    rows = []
+    for modules in sizes:
+        tree = prepare_tree(directory, modules, options)
+        for hook in hooks:
+            command = [sys.executable, os.path.join(SCRIPTS_DIR, f"{hook}.py"), '--all-files', '--no-cache',
+                       '--jobs', str(jobs)] + HOOK_ARGUMENTS.get(hook, [])
+            seconds, peak_rss, exit_code = measure(command, tree, env, timeout)
+            row = {
+                'hook': hook,
+                'modules': modules,
+                'files': count_files(hook, tree),
+                'seconds': round(seconds, 3),
+                'peak_rss_kib': peak_rss,
+                'exit_code': exit_code,
+            }
+            rows.append(row)
+            print(_format_row(row), flush=True)
+    return rows
+
+
+def _sizes(value):
+    try:
+        sizes = [int(size) for size in value.split(',') if size.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected comma-separated module counts, got {value!r}")
+    if not sizes or min(sizes) < 1:
+        raise argparse.ArgumentTypeError(f"expected comma-separated module counts, got {value!r}")
+    return sizes
+
+
+def main(argv=None):
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    parser = argparse.ArgumentParser(description="Time the hooks on generated addons trees")
+    parser.add_argument('--sizes', type=_sizes, default=[10, 100, 1000], metavar='N,N',
+                        help='Module counts of the generated trees (default: 10,100,1000)')
+    parser.add_argument('--hooks', help='Comma-separated hooks to time, e.g. check_sql,daisy_check (all by default)')
+    parser.add_argument('--jobs', '-j', default='1', help="Passed to the hooks (default: 1)")
+    parser.add_argument('--timeout', type=int, default=DEFAULT_TIMEOUT, metavar='SECONDS',
+                        help=f"Stop a hook running longer than this (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument('--workdir', help='Keep the generated trees here and reuse them (a temporary directory by default)')
+    parser.add_argument('--json', metavar='PATH', help='Also write the results to this JSON file')
+    add_generator_arguments(parser, exclude=('modules',))
+    args = parser.parse_args(argv)
+
+    hooks = hook_names()
+    if args.hooks:
+        selected = [hook.strip() for hook in args.hooks.split(',') if hook.strip()]
+        unknown = set(selected) - set(hooks)
+        if unknown:
+            parser.error(f"unknown hook(s): {', '.join(sorted(unknown))}")
+        hooks = selected
+
+    options = {name: getattr(args, name) for name in DEFAULTS if name != 'modules'}
+    if args.workdir:
+        os.makedirs(args.workdir, exist_ok=True)
+        rows = run_benchmarks(os.path.abspath(args.workdir), args.sizes, hooks, options, args.jobs, args.timeout)
+    else:
+        with tempfile.TemporaryDirectory(prefix='daisy-bench-') as directory:
+            rows = run_benchmarks(directory, args.sizes, hooks, options, args.jobs, args.timeout)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'options': options, 'results': rows}, f, indent=2)
+    failed = [row for row in rows if row['exit_code'] is None]
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
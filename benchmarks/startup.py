@@ -0,0 +1,75 @@
+"""Check that importing each entry point stays under a time budget.
+
+Every hook is started by pre-commit for each run, so its import time is
+paid every time, whatever the number of files. This measures the
+cumulative ``python -X importtime`` of each console script module (the
+best of ``--repeat`` runs, to leave out the noise) and fails when one
+goes over the budget:
+
+    python -m benchmarks.startup
+    python -m benchmarks.startup --budget-ms 40 --repeat 10
+
+Run ``python -X importtime -c "import scripts.check_sql"`` to see which
+imports an entry point pays for.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 60
+DEFAULT_REPEAT = 5
+
+_ENTRY_POINT = re.compile(r'^\s*[\w-]+\s*=\s*"(scripts\.\w+):main"', re.MULTILINE)
+
+
+def entry_point_modules():
+    """The modules of the console scripts declared in ``pyproject.toml``."""
+    with open(os.path.join(ROOT, 'pyproject.toml'), 'r', encoding='utf-8') as f:
+        return sorted(set(_ENTRY_POINT.findall(f.read())))
+
+
+def import_time(module):
+    """The cumulative import time of ``module`` in a fresh interpreter, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    )
+    for line in result.stderr.splitlines():
+        # import time: <self us> | <cumulative us> | <indentation><module>
+        parts = line.split('|')
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1])
+    raise RuntimeError(f"no import time reported for {module}")
+
+
+def main(argv=None):
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    parser = argparse.ArgumentParser(description="Check the import time of every entry point")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Maximum import time of an entry point (default: {DEFAULT_BUDGET_MS})")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"Imports per entry point, the fastest one counts (default: {DEFAULT_REPEAT})")
+    args = parser.parse_args(argv)
+
+    over_budget = []
+    for module in entry_point_modules():
+        milliseconds = min(import_time(module) for _ in range(max(args.repeat, 1))) / 1000
+        status = "OK" if milliseconds <= args.budget_ms else "OVER BUDGET"
+        print(f"{module:<40} {milliseconds:8.1f} ms  {status}")
+        if milliseconds > args.budget_ms:
+            over_budget.append(module)
+
+    if over_budget:
+        print(f"\n[ERROR] {len(over_budget)} entry point(s) over the {args.budget_ms:g} ms budget")
+        return 1
+    print(f"\n[OK] Every entry point imports in less than {args.budget_ms:g} ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
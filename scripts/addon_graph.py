@@ -0,0 +1,176 @@
+"""The addons of a tree and their ``depends``, read once from their manifests.
+
+Every manifest is parsed once per process: :func:`parse_manifest` keeps
+the parsed content by hash, so the hooks of a ``daisy-check`` run share
+it, and a long-running process (``daisy-checkd``) only parses a manifest
+again once it changed. An :class:`AddonGraph` answers the questions about
+modules without walking the tree again: their load order, what they
+depend on, and which modules are affected by a change to another one.
+"""
+import ast
+import hashlib
+import os
+from collections import OrderedDict, namedtuple
+
+try:
+    from scripts.file_selection import MANIFEST_NAMES, walk_files
+    from scripts.stat_memo import remembered
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from file_selection import MANIFEST_NAMES, walk_files
+    from stat_memo import remembered
+
+# Parsed manifests kept in memory, the least recently used dropped past this count: a
+# long-running process would otherwise keep every version of every manifest
+PARSED_ENTRIES = 4096
+
+# Manifest content hash -> parsed manifest, least recently used first
+_parsed = OrderedDict()
+
+# ``data``, ``demo``, and their pre-8.0 names
+DATA_KEYS = ('data', 'init_xml', 'update_xml')
+DEMO_KEYS = ('demo', 'demo_xml')
+
+
+def parse_manifest(text):
+    """Return the value of a manifest ``text`` (str or bytes), parsed once per content.
+
+    Raises ``ValueError`` or ``SyntaxError`` like ``ast.literal_eval``. The
+    value is shared: it must not be modified.
+    """
+    if isinstance(text, bytes):
+        text = text.decode('utf-8')
+    digest = hashlib.sha1(text.encode('utf-8', 'surrogatepass')).digest()
+    if digest in _parsed:
+        _parsed.move_to_end(digest)
+        return _parsed[digest]
+    manifest = _parsed[digest] = ast.literal_eval(text)
+    if len(_parsed) > PARSED_ENTRIES:
+        _parsed.popitem(last=False)
+    return manifest
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return parse_manifest(f.read())
+
+
+def read_manifest(module_path):
+    """The manifest of ``module_path`` as a dict, ``{}`` when it has none or it cannot be read."""
+    for name in MANIFEST_NAMES:
+        path = os.path.join(module_path, name)
+        try:
+            manifest = remembered('manifest', path, lambda: _read(path))
+        except (OSError, ValueError, SyntaxError, UnicodeDecodeError):
+            continue
+        if isinstance(manifest, dict):
+            return manifest
+    return {}
+
+
+def _strings(manifest, keys):
+    values = []
+    for key in keys:
+        value = manifest.get(key)
+        if isinstance(value, (list, tuple)):
+            values.extend(item for item in value if isinstance(item, str))
+    return values
+
+
+class Addon(namedtuple('Addon', 'name path depends data demo assets')):
+    """A module: its name, directory, ``depends`` and declared files (relative to ``path``)."""
+
+    @classmethod
+    def from_path(cls, module_path):
+        manifest = read_manifest(module_path)
+        assets = manifest.get('assets')
+        return cls(
+            os.path.basename(module_path), module_path,
+            _strings(manifest, ('depends',)),
+            _strings(manifest, DATA_KEYS),
+            _strings(manifest, DEMO_KEYS),
+            assets if isinstance(assets, dict) else {},
+        )
+
+
+class AddonGraph:
+    """Module name -> :class:`Addon`, with the ``depends`` edges between them.
+
+    A dependency outside of the graph (``base``, ``web``...) is kept in
+    ``Addon.depends`` but has no node: it is never ordered nor affected.
+    """
+
+    def __init__(self, addons):
+        self.addons = {addon.name: addon for addon in addons}
+        # Module -> modules of the graph depending on it directly
+        self._dependents = {name: [] for name in self.addons}
+        for name in sorted(self.addons):
+            for dependency in self.addons[name].depends:
+                if dependency in self._dependents and name not in self._dependents[dependency]:
+                    self._dependents[dependency].append(name)
+
+    @classmethod
+    def from_paths(cls, module_paths):
+        return cls(Addon.from_path(path) for path in module_paths)
+
+    @classmethod
+    def for_directory(cls, directory):
+        """The graph of every module (directory holding a manifest) under ``directory``."""
+        module_paths = {os.path.dirname(path) for path in walk_files(directory, MANIFEST_NAMES)
+                        if os.path.basename(path) in MANIFEST_NAMES}
+        return cls.from_paths(sorted(module_paths))
+
+    def __contains__(self, name):
+        return name in self.addons
+
+    def __getitem__(self, name):
+        return self.addons[name]
+
+    def depends(self, name):
+        """The modules of the graph ``name`` depends on, directly."""
+        return [dependency for dependency in self.addons[name].depends if dependency in self.addons]
+
+    def dependents(self, name):
+        """The modules of the graph depending directly on ``name``."""
+        return list(self._dependents.get(name, ()))
+
+    def order(self, names=None):
+        """The module names (all of them by default) sorted so that every module comes after its ``depends``.
+
+        Modules with no dependency between them are sorted by name; a
+        dependency cycle is broken where it is entered.
+        """
+        names = sorted(self.addons if names is None else set(names) & set(self.addons))
+        wanted = set(names)
+        order = []
+        done = set()
+        visiting = set()
+
+        def visit(name):
+            if name not in wanted or name in visiting or name in done:
+                return
+            visiting.add(name)
+            for dependency in sorted(self.addons[name].depends):
+                visit(dependency)
+            done.add(name)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def affected(self, names):
+        """The modules to check again when ``names`` change: them and every module depending on them, in load order."""
+        affected = set()
+        pending = [name for name in names if name in self.addons]
+        while pending:
+            name = pending.pop()
+            if name not in affected:
+                affected.add(name)
+                pending.extend(self._dependents[name])
+        return self.order(affected)
+
+    def declared_files(self, name):
+        """The absolute paths of the ``data`` and ``demo`` files of ``name``."""
+        addon = self.addons[name]
+        return [os.path.abspath(os.path.normpath(os.path.join(addon.path, path)))
+                for path in addon.data + addon.demo]
@@ -0,0 +1,133 @@
+"""Match the asset globs of the manifests against the files on disk.
+
+``glob.glob(pattern, recursive=True)`` walks the tree again for every
+``**`` pattern. An :class:`AssetIndex` lists the directory a pattern starts
+with (``module/static/src/`` for ``module/static/src/**/*.js``) once, on
+first use, and matches this pattern and the following ones under it
+against that list with compiled regular expressions. The matching follows
+``glob``: ``*`` and ``?`` stay within a path segment, ``**`` spans any
+number of directories, and hidden names only match a pattern starting with
+a dot.
+"""
+import bisect
+import functools
+import os
+import re
+
+_MAGIC = re.compile(r'[*?[]')
+
+
+def has_magic(pattern):
+    return _MAGIC.search(pattern) is not None
+
+
+def _translate_segment(segment):
+    regex = []
+    index = 0
+    while index < len(segment):
+        char = segment[index]
+        index += 1
+        if char == '*':
+            regex.append('[^/]*')
+        elif char == '?':
+            regex.append('[^/]')
+        elif char == '[':
+            end = index
+            if end < len(segment) and segment[end] == '!':
+                end += 1
+            if end < len(segment) and segment[end] == ']':
+                end += 1
+            while end < len(segment) and segment[end] != ']':
+                end += 1
+            if end >= len(segment):
+                regex.append(r'\[')
+                continue
+            chars = re.sub(r'([&~|])', r'\\\1', segment[index:end].replace('\\', r'\\'))
+            index = end + 1
+            if chars.startswith('!'):
+                chars = '^' + chars[1:]
+            elif chars.startswith(('^', '[')):
+                chars = '\\' + chars
+            regex.append(f'[{chars}]')
+        else:
+            regex.append(re.escape(char))
+    # Like glob, a wildcard matches a whole name, not the dot of a hidden one
+    hidden = '' if segment.startswith('.') else r'(?!\.)'
+    return r'(?=[^/])' + hidden + ''.join(regex)
+
+
+@functools.lru_cache(maxsize=None)
+def translate(pattern):
+    """The regular expression matching the index entries ``pattern`` matches.
+
+    Directories are indexed with a trailing ``/``: a pattern matching a
+    directory (e.g. ``module/static/**``) matches its entry.
+    """
+    segments = pattern.split('/')
+    regex = []
+    for position, segment in enumerate(segments):
+        last = position == len(segments) - 1
+        if last and not segment:
+            # A trailing "/" only matches directories, already followed by one
+            break
+        if segment == '**':
+            regex.append(r'(?:(?!\.)[^/]+/)*' + (r'(?:(?!\.)[^/]+)?' if last else ''))
+        elif last:
+            regex.append(_translate_segment(segment) + '/?')
+        else:
+            regex.append(_translate_segment(segment) + '/')
+    return re.compile(''.join(regex) + r'\Z')
+
+
+def _literal_prefix(pattern):
+    # The directories before the first wildcard, e.g. "web/static/src/" for "web/static/src/**/*.js"
+    prefix = []
+    for segment in pattern.split('/')[:-1]:
+        if has_magic(segment):
+            break
+        prefix.append(segment + '/')
+    return ''.join(prefix)
+
+
+class AssetIndex:
+    """The files and directories of an addons root, each directory walked at most once."""
+
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        # Walked directory ("module/static/src/") -> sorted relative paths below it, directories ending with "/"
+        self._trees = {}
+
+    def _entries(self, prefix):
+        # The listing of the closest walked directory holding ``prefix``, or of ``prefix`` itself
+        parts = prefix.split('/')[:-1]
+        for depth in range(len(parts) + 1):
+            walked = ''.join(part + '/' for part in parts[:depth])
+            if walked in self._trees:
+                return self._trees[walked]
+        entries = []
+        # Symbolic links are followed, as glob does
+        for directory, _, filenames in os.walk(os.path.join(self.root, prefix), followlinks=True):
+            relative = os.path.relpath(directory, self.root).replace(os.sep, '/') + '/'
+            relative = '' if relative == './' else relative
+            entries.append(relative)
+            entries.extend(relative + name for name in filenames)
+        entries.sort()
+        self._trees[prefix] = entries
+        return entries
+
+    def exists(self, pattern):
+        """Whether ``pattern``, relative to the root, matches a file or directory, as ``glob.glob`` would."""
+        pattern = pattern.lstrip('/')
+        if not has_magic(pattern):
+            return os.path.lexists(os.path.join(self.root, pattern))
+        prefix = _literal_prefix(pattern)
+        # Only the rest is translated: "*.js" is compiled once for every module
+        regex = translate(pattern[len(prefix):])
+        entries = self._entries(prefix)
+        for index in range(bisect.bisect_left(entries, prefix), len(entries)):
+            entry = entries[index]
+            if not entry.startswith(prefix):
+                break
+            if regex.match(entry, len(prefix)):
+                return True
+        return False
@@ -4,18 +4,20 @@ import sys
 import re
 import argparse
 import os
-parser = argparse.ArgumentParser(description="Pre-push hook with branch validation and checks")
-parser.add_argument(
-    "--forbidden_branch",
-    type=str,
-    default="",
-    help="Comma-separated forbidden branch names (e.g., main,staging)"
-)
 
-parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit (ignored)')
-args = parser.parse_args()
 
-forbidden_branches = [b.strip() for b in args.forbidden_branch.split(",") if b.strip()]
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Pre-push hook with branch validation and checks")
+    parser.add_argument(
+        "--forbidden_branch",
+        type=str,
+        default="",
+        help="Comma-separated forbidden branch names (e.g., main,staging)"
+    )
+
+    parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit (ignored)')
+    return parser.parse_args(argv)
+
 
 def ensure_utf8():
     if sys.stdout.encoding != 'utf-8':
@@ -36,7 +38,7 @@ def get_current_branch():
         sys.exit(1)
 
 
-def is_valid_branch(branch):
+def is_valid_branch(branch, forbidden_branches=()):
     allowed_patterns = [r"feature/.*", r"hotfix/.*"]
     allowed_branches = ["dev"]
 
@@ -71,12 +73,14 @@ def run_checks():
     #     sys.exit(1)
 
 
-def main():
+def main(argv=None):
+    args = parse_args(argv)
+    forbidden_branches = [b.strip() for b in args.forbidden_branch.split(",") if b.strip()]
     ensure_utf8()
 
     branch = get_current_branch()
 
-    if not is_valid_branch(branch):
+    if not is_valid_branch(branch, forbidden_branches):
         print(f"🚫 Push to branch '{branch}' is forbidden. Use dev, feature/*, hotfix/* or set ALLOW_PUSH=1.")
         sys.exit(1)
 
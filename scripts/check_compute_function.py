@@ -1,66 +1,71 @@
-import ast
 import os
 import sys
 
+try:
+    from scripts.model_registry import build_registry, extract_models, model_name
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_compute_function.py``
+    from model_registry import build_registry, extract_models, model_name
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
-class ComputeFieldChecker:
-    def __init__(self, root_path):
-        self.root_path = root_path
-        self.errors = []
 
-    def get_all_python_files(self):
-        python_files = []
-        for dirpath, _, filenames in os.walk(self.root_path):
-            for filename in filenames:
-                if filename.endswith(".py"):
-                    python_files.append(os.path.join(dirpath, filename))
-        return python_files
+class ComputeFieldChecker(Rule):
+    id = 'compute-function'
+    version = 3
+    # A compute method may be defined in another file of the module: changing it re-checks the fields using it
+    cross_file = True
 
-    def check_file(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                tree = ast.parse(file.read(), filename=file_path)
-        except SyntaxError as e:
-            self.errors.append(f"[SyntaxError] {file_path}: {e}")
-            return
+    def analyze(self, source):
+        if source.tree is None:
+            return {"syntax_error": f"[SyntaxError] {source.path}: {source.syntax_error}", "models": []}
+        return {"syntax_error": None, "models": extract_models(source.tree)}
 
-        for node in tree.body:
-            if isinstance(node, ast.ClassDef):
-                class_methods = {n.name for n in node.body if isinstance(n, ast.FunctionDef)}
-                for stmt in node.body:
-                    if isinstance(stmt, ast.Assign):
-                        for elt in stmt.targets:
-                            if isinstance(elt, ast.Name):
-                                if isinstance(stmt.value, ast.Call) and hasattr(stmt.value.func, 'attr'):
-                                    kwargs = {kw.arg: kw.value for kw in stmt.value.keywords}
-                                    if 'compute' in kwargs:
-                                        compute_node = kwargs['compute']
-                                        compute_func = None
-                                        if isinstance(compute_node, ast.Str):
-                                            compute_func = compute_node.s
-                                        elif isinstance(compute_node, ast.Constant):
-                                            compute_func = compute_node.value
+    def violations(self, results):
+        for path, found in results:
+            if found["syntax_error"]:
+                yield Violation(self.id, path, None, None, found["syntax_error"])
 
-                                        if compute_func and compute_func not in class_methods:
-                                            clickable_path = f"file:///{file_path.replace(os.sep, '/')}"
-                                            self.errors.append(
-                                                f"[Missing compute] {clickable_path}: méthode '{compute_func}' non définie dans la classe '{node.name}'"
-                                            )
+        # Compute methods missing from their own class, they may be defined by another class of the model
+        missing = []
+        for file_path, found in results:
+            for info in found["models"]:
+                for field in info["fields"].values():
+                    compute_func = field["compute"]
+                    if compute_func and compute_func not in info["methods"]:
+                        missing.append((file_path, info, field, compute_func))
 
-    def run(self):
-        python_files = self.get_all_python_files()
-        for file_path in python_files:
-            self.check_file(file_path)
+        registry = None
+        for file_path, info, field, compute_func in missing:
+            model = model_name(info)
+            if model:
+                if registry is None:
+                    known = {path: found["models"] for path, found in results}
+                    registry = build_registry(self.directory, known, use_cache=not self.options.no_cache)
+                if registry.has_method(model, compute_func):
+                    continue
+            if model:
+                message = f"méthode '{compute_func}' non définie pour le modèle '{model}' (classe '{info['class']}')"
+            else:
+                message = f"méthode '{compute_func}' non définie dans la classe '{info['class']}'"
+            yield Violation(self.id, file_path, field["line"], None, message)
 
-        if self.errors:
-            for error in self.errors:
-                print(error)
-            return 1
-        return 0
+    def report(self, results):
+        exit_code = 0
+        for violation in self.violations(results):
+            if violation.line is None:
+                print(violation.message)
+            else:
+                clickable_path = f"file:///{violation.path.replace(os.sep, '/')}:{violation.line}"
+                print(f"[Missing compute] {clickable_path}: {violation.message}")
+            exit_code = 1
+        return exit_code
 
 def main():
-    checker = ComputeFieldChecker(os.getcwd())
-    sys.exit(checker.run())
+    sys.exit(run_rules([ComputeFieldChecker], "Check compute function exists"))
 
 if __name__ == "__main__":
     SystemExit(main())
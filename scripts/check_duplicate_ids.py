@@ -1,102 +1,154 @@
 import os
-import xml.etree.ElementTree as ET
+import sqlite3
 import sys
-import ast
 from collections import defaultdict
 
-
-class XMLIdDuplicationChecker:
-    def __init__(self, directory):
-        self.directory = directory
+try:
+    from scripts.addon_graph import AddonGraph
+    from scripts.file_selection import find_module_root, select_files, walk_files
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+    from scripts.xml_scan import scan_ids
+    from scripts.xmlid_index import XmlIdIndex
+except ImportError:  # executed as ``python scripts/check_duplicate_ids.py``
+    from addon_graph import AddonGraph
+    from file_selection import find_module_root, select_files, walk_files
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+    from xml_scan import scan_ids
+    from xmlid_index import XmlIdIndex
+
+
+class XMLIdDuplicationChecker(Rule):
+    id = 'duplicate-ids'
+    version = 3
+    extensions = ('.xml',)
+    # IDs are compared across the whole module, not only across the staged files
+    cross_file = True
+
+    def __init__(self, options):
+        super().__init__(options)
         self.module_ids = defaultdict(lambda: defaultdict(list))
         self.module_declared_files = defaultdict(set)
+        self.module_paths = {}
+        # Only the passed files are analyzed, the rest of their modules comes from the XML ID index
+        self.use_index = False
 
     def _get_module_name(self, file_path):
-        rel_path = os.path.relpath(file_path, self.directory)
-        parts = rel_path.split(os.sep)
-        return parts[0] if parts else "unknown"
+        module_path = find_module_root(file_path, self.directory)
+        if module_path is None:
+            return "unknown"
+        module = os.path.basename(module_path)
+        self.module_paths[module] = module_path
+        return module
 
     def _load_manifest_files(self):
-        """Load XML files declared in each module's __manifest__.py."""
-        for module in os.listdir(self.directory):
-            module_path = os.path.join(self.directory, module)
-            manifest_path = os.path.join(module_path, "__manifest__.py")
-            if os.path.isfile(manifest_path):
-                try:
-                    with open(manifest_path, "r", encoding="utf-8") as f:
-                        data = ast.literal_eval(f.read())
-                        data_files = data.get("data", []) + data.get("demo", []) + data.get("init_xml", [])
-                        for xml_file in data_files:
-                            full_path = os.path.normpath(os.path.join(module_path, xml_file))
-                            if os.path.isfile(full_path):
-                                self.module_declared_files[module].add(os.path.abspath(full_path))
-                except Exception:
-                    pass  # manifest file parsing error ignored silently
-
-    def _process_file(self, file_path):
+        """Load the data and demo files declared in the manifest of each checked module."""
+        graph = AddonGraph.from_paths(self.module_paths.values())
+        for module in self.module_paths:
+            self.module_declared_files[module].update(
+                path for path in graph.declared_files(module) if os.path.isfile(path)
+            )
+
+    def select_files(self, filenames, all_files):
+        self.use_index = bool(filenames) and not all_files and not self.options.no_cache
+        if self.use_index:
+            return select_files(filenames, False, self.directory, self.extensions)
+        return super().select_files(filenames, all_files)
+
+    def _add_module_ids(self, analyzed_paths):
+        """Add the IDs of the other XML files of the checked modules."""
+        other_ids = []
         try:
-            # skip empty files
-            if os.path.getsize(file_path) == 0:
-                return
-
-            tree = ET.parse(file_path)
-            root = tree.getroot()
+            index = XmlIdIndex.for_directory(self.directory)
+            try:
+                # Only the modules of the passed files: the cost follows the change, not the tree
+                for module_path in self.module_paths.values():
+                    index.update(module_path, self.directory)
+                for module, module_path in self.module_paths.items():
+                    for record_id, file_path, line_number, column_number in index.directory_ids(module_path):
+                        if file_path not in analyzed_paths:
+                            other_ids.append((module, record_id, file_path, line_number, column_number))
+            finally:
+                index.close()
+        except (OSError, sqlite3.Error) as e:
+            print(f"⚠️ XML ID index unavailable ({e}), reading the modules")
+            other_ids = []
+            for module, module_path in self.module_paths.items():
+                for file_path in walk_files(module_path, self.extensions):
+                    if file_path in analyzed_paths:
+                        continue
+                    try:
+                        with open(file_path, 'rb') as stream:
+                            ids = scan_ids(stream)
+                    except OSError:
+                        continue
+                    for record_id, line_number, column_number, _ in ids:
+                        other_ids.append((module, record_id, file_path, line_number, column_number))
+
+        for module, record_id, file_path, line_number, column_number in other_ids:
+            self.module_ids[module][record_id].append((file_path, line_number, column_number))
+
+    def analyze(self, source):
+        # <record>, <template>, <menuitem>, <act_window> and <report> IDs, streamed
+        with source.open() as stream:
+            return scan_ids(stream)
+
+    def _duplicates(self, results):
+        """Yield the ``(module, id, occurrences)`` of the IDs declared more than once."""
+        for file_path, record_ids in results:
+            if not record_ids:
+                continue
             module_name = self._get_module_name(file_path)
+            for record_id, line_number, column_number, _ in record_ids:
+                self.module_ids[module_name][record_id].append(
+                    (os.path.abspath(file_path), line_number, column_number)
+                )
 
-            for idx, elem in enumerate(root.iter('record')):
-                if 'id' in elem.attrib:
-                    record_id = elem.attrib['id']
-                    line_number = idx + 1
-                    line = str(ET.tostring(elem, encoding="unicode")).strip()
-                    column_number = line.find(f'id="{record_id}"') + 1
-                    self.module_ids[module_name][record_id].append(
-                        (os.path.abspath(file_path), line_number, column_number)
-                    )
-
-        except ET.ParseError:
-            # silently skip malformed XML files
-            return
-        except Exception:
-            return
+        if self.use_index:
+            self._add_module_ids({os.path.abspath(file_path) for file_path, _ in results})
 
-    def run(self):
         self._load_manifest_files()
 
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".xml"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
-
-        found_duplicates = False
-
         for module, ids_dict in self.module_ids.items():
             declared_files = self.module_declared_files.get(module, set())
 
             for record_id, occurrences in ids_dict.items():
                 if len(occurrences) > 1:
                     # check if both/all files are declared in manifest
-                    declared_occurrences = [
+                    declared_occurrences = sorted(
                         occ for occ in occurrences if occ[0] in declared_files
-                    ]
+                    )
                     if len(declared_occurrences) > 1:
-                        found_duplicates = True
-                        print(f"[ERROR] Duplicate ID '{record_id}' found in module '{module}' in declared files:\n")
-                        for file_path, line_number, column_number in declared_occurrences:
-                            clickable_path = f"file:///{file_path.replace(os.sep, '/')}"
-                            print(f"   -> {clickable_path}:{int(line_number)}:{int(column_number)}")
-                        print("")
+                        yield module, record_id, declared_occurrences
+
+    def violations(self, results):
+        for module, record_id, occurrences in self._duplicates(results):
+            for file_path, line_number, column_number in occurrences:
+                yield Violation(self.id, file_path, int(line_number), int(column_number),
+                                f"Duplicate ID '{record_id}' in module '{module}' ({len(occurrences)} declarations)")
+
+    def report(self, results):
+        found_duplicates = False
+        for module, record_id, occurrences in self._duplicates(results):
+            found_duplicates = True
+            print(f"[ERROR] Duplicate ID '{record_id}' found in module '{module}' in declared files:\n")
+            for file_path, line_number, column_number in occurrences:
+                clickable_path = f"file:///{file_path.replace(os.sep, '/')}"
+                print(f"   -> {clickable_path}:{int(line_number)}:{int(column_number)}")
+            print("")
 
         if found_duplicates:
-            sys.exit(1)
+            return 1
         else:
             print("[OK] No duplicate IDs found among declared files.")
-            sys.exit(0)
+            return 0
 
 
 def main():
-    checker = XMLIdDuplicationChecker(directory=os.getcwd())
-    checker.run()
+    sys.exit(run_rules([XMLIdDuplicationChecker], "Check duplicate XML IDs"))
 
 
 if __name__ == '__main__':
@@ -1,82 +1,128 @@
 import ast
-import os
+import hashlib
 import sys
 from collections import defaultdict
 
-if sys.stdout.encoding != "utf-8":
-    sys.stdout.reconfigure(encoding="utf-8")
-
-
-def get_all_python_files(root_dir):
-    py_files = []
-    for dirpath, _, filenames in os.walk(root_dir):
-        for filename in filenames:
-            if filename.endswith('.py'):
-                full_path = os.path.join(dirpath, filename)
-                py_files.append(full_path)
-    return py_files
-
-
-def get_module_name(file_path, root_dir):
-    rel_path = os.path.relpath(file_path, root_dir)
-    parts = rel_path.split(os.sep)
-    return parts[0] if parts else ""
-
-
-def extract_class_info(file_path):
+try:
+    from scripts.file_selection import get_module_name
+    from scripts.model_registry import extract_models
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_duplicate_method_names.py``
+    from file_selection import get_module_name
+    from model_registry import extract_models
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+
+
+class MethodHasher(ast.NodeVisitor):
+    """Hash the structure of a method in one pass.
+
+    The method name, docstrings, formatting, comments and the names of local
+    variables are left out: two methods differing only by those get the same
+    hash. Attribute, global and keyword argument names are kept.
+    """
+    IGNORED_FIELDS = {'ctx', 'type_comment', 'kind'}
+
+    def __init__(self):
+        self.digest = hashlib.blake2b(digest_size=16)
+        self.locals = {}
+
+    def hash_method(self, node):
+        self._visit_function(node, with_name=False)
+        return self.digest.hexdigest()
+
+    def _feed(self, *tokens):
+        for token in tokens:
+            self.digest.update(str(token).encode('utf-8', 'surrogatepass'))
+            self.digest.update(b'\0')
+
+    def _local(self, name):
+        # Locals are renamed by order of first appearance
+        return self.locals.setdefault(name, f"v{len(self.locals)}")
+
+    def _visit_value(self, value):
+        if isinstance(value, ast.AST):
+            self.visit(value)
+        elif isinstance(value, list):
+            self._feed('list', len(value))
+            for item in value:
+                self._visit_value(item)
+        else:
+            self._feed(type(value).__name__, repr(value))
+
+    def _visit_body(self, body):
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            body = body[1:]  # docstring
+        self._visit_value(body)
+
+    def _visit_function(self, node, with_name=True):
+        self._feed(type(node).__name__, self._local(node.name) if with_name else '')
+        self._visit_value(node.decorator_list)
+        self.visit(node.args)
+        self._visit_value(node.returns)
+        self._visit_body(node.body)
+
+    def generic_visit(self, node):
+        self._feed(type(node).__name__)
+        for field, value in ast.iter_fields(node):
+            if field not in self.IGNORED_FIELDS:
+                self._feed(field)
+                self._visit_value(value)
+
+    def visit_FunctionDef(self, node):
+        self._visit_function(node)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+    def visit_Lambda(self, node):
+        self._feed('Lambda')
+        self.visit(node.args)
+        self.visit(node.body)
+
+    def visit_arg(self, node):
+        self._feed('arg', self._local(node.arg))
+        self._visit_value(node.annotation)
+
+    def visit_Name(self, node):
+        if isinstance(node.ctx, ast.Store) or node.id in self.locals:
+            self._feed('Name', self._local(node.id))
+        else:
+            self._feed('Name', node.id)
+
+    def visit_ExceptHandler(self, node):
+        self._feed('ExceptHandler', self._local(node.name) if node.name else '')
+        self._visit_value(node.type)
+        self._visit_value(node.body)
+
+
+def hash_method(node):
+    """The structural hash of a method, see :class:`MethodHasher`."""
+    return MethodHasher().hash_method(node)
+
+
+def extract_class_info(file_path, tree):
     IGNORED_INHERIT_MODELS = {"mail.thread", "mail.activity.mixin"}
 
-    try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            tree = ast.parse(file.read(), filename=file_path)
-    except Exception:
+    if tree is None:
         return []
 
     classes = []
-    for node in ast.walk(tree):
-        if isinstance(node, ast.ClassDef):
-            class_data = {
-                "name": node.name,
-                "methods": {},
-                "_name": None,
-                "_inherit": None,
-                "file": file_path
-            }
-
-            for item in node.body:
-                if isinstance(item, ast.Assign):
-                    for target in item.targets:
-                        if isinstance(target, ast.Name):
-                            if target.id == "_name" and isinstance(item.value, ast.Str):
-                                class_data["_name"] = item.value.s
-                            elif target.id == "_inherit":
-                                if isinstance(item.value, ast.Str):
-                                    class_data["_inherit"] = item.value.s
-                                elif isinstance(item.value, (ast.List, ast.Tuple)):
-                                    inherit_list = []
-                                    for elt in item.value.elts:
-                                        if isinstance(elt, ast.Str):
-                                            inherit_list.append(elt.s)
-                                    class_data["_inherit"] = inherit_list
-
-                if isinstance(item, ast.FunctionDef):
-                    try:
-                        method_code = ast.unparse(item)
-                    except Exception:
-                        method_code = item.name
-                    class_data["methods"][item.name] = method_code.strip()
-
-            # Skip if _name is missing or if _inherit contains ignored models
-            skip = False
-            if class_data["_name"]:
-                if isinstance(class_data["_inherit"], str):
-                    if class_data["_inherit"] in IGNORED_INHERIT_MODELS:
-                        skip = True
-                elif isinstance(class_data["_inherit"], list):
-                    if any(val in IGNORED_INHERIT_MODELS for val in class_data["_inherit"]):
-                        skip = True
-                if not skip:
-                    classes.append(class_data)
+    # Only the structural hash and the line of each method are kept, not its source
+    for info in extract_models(tree, method_info=lambda node: (hash_method(node), node.lineno)):
+        # Skip if _name is missing or if _inherit contains ignored models
+        if not info["name"] or any(val in IGNORED_INHERIT_MODELS for val in info["inherit"]):
+            continue
+        classes.append({
+            "name": info["class"],
+            "methods": info["methods"],
+            "_name": info["name"],
+            "_inherit": info["inherit"],
+            "file": file_path
+        })
     return classes
 
 
@@ -87,10 +133,7 @@ def group_classes_by_model(classes):
         keys = set()
         if cls["_name"]:
             keys.add(cls["_name"])
-        if isinstance(cls["_inherit"], str):
-            keys.add(cls["_inherit"])
-        elif isinstance(cls["_inherit"], list):
-            keys.update(cls["_inherit"])
+        keys.update(cls["_inherit"])
         for key in keys:
             model_groups[key].append(cls)
 
@@ -102,49 +145,67 @@ def find_duplicate_methods(model_groups):
     for model, class_list in model_groups.items():
         seen_methods = {}
         for cls in class_list:
-            for method_name, method_code in cls["methods"].items():
-                key = (method_name, method_code)
+            for method_name, (method_hash, line) in cls["methods"].items():
+                key = (method_name, method_hash)
                 if key in seen_methods:
                     duplicates.append({
                         "model": model,
                         "method": method_name,
                         "original": seen_methods[key],
-                        "duplicate": f"{cls['name']} ({cls['file']})"
+                        "duplicate": f"{cls['name']} ({cls['file']}:{line})",
+                        "file": cls["file"],
+                        "line": line,
                     })
                 else:
-                    seen_methods[key] = f"{cls['name']} ({cls['file']})"
+                    seen_methods[key] = f"{cls['name']} ({cls['file']}:{line})"
     return duplicates
 
 
-def main():
-    root_dir = os.getcwd()
-    files = get_all_python_files(root_dir)
+class DuplicateMethodChecker(Rule):
+    id = 'duplicate-method-names'
+    version = 3
+    # Methods are compared across the whole module, not only across the staged files
+    cross_file = True
 
-    module_classes = defaultdict(list)
+    def analyze(self, source):
+        return extract_class_info(source.path, source.tree)
 
-    for file_path in files:
-        module = get_module_name(file_path, root_dir)
-        classes = extract_class_info(file_path)
-        module_classes[module].extend(classes)
+    def _duplicates(self, results):
+        module_classes = defaultdict(list)
 
-    duplicates = []
+        for file_path, classes in results:
+            if classes:
+                module = get_module_name(file_path, self.directory)
+                module_classes[module].extend(classes)
+
+        for module, classes in module_classes.items():
+            grouped_by_model = group_classes_by_model(classes)
+            yield from find_duplicate_methods(grouped_by_model)
+
+    def violations(self, results):
+        for d in self._duplicates(results):
+            yield Violation(self.id, d["file"], d["line"], None,
+                            f"Method '{d['method']}' is duplicated in model '{d['model']}', first defined in {d['original']}")
+
+    def report(self, results):
+        duplicates = list(self._duplicates(results))
 
-    for module, classes in module_classes.items():
-        grouped_by_model = group_classes_by_model(classes)
-        module_duplicates = find_duplicate_methods(grouped_by_model)
-        if module_duplicates:
-            duplicates.extend(module_duplicates)
-
-    if duplicates:
-        print("\n🚫 Duplicate method(s) detected in related model classes within the same module:\n")
-        for d in duplicates:
-            print(f" - Method '{d['method']}' is duplicated in model '{d['model']}'")
-            print(f"   -> First defined in: {d['original']}")
-            print(f"   -> Duplicated in   : {d['duplicate']}\n")
-        sys.exit(1)
-    else:
-        print("✅ No duplicated methods found.")
-        sys.exit(0)
+        if duplicates:
+            print("\n🚫 Duplicate method(s) detected in related model classes within the same module:\n")
+            for d in duplicates:
+                print(f" - Method '{d['method']}' is duplicated in model '{d['model']}'")
+                print(f"   -> First defined in: {d['original']}")
+                print(f"   -> Duplicated in   : {d['duplicate']}\n")
+            return 1
+        else:
+            print("✅ No duplicated methods found.")
+            return 0
+
+
+def main():
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(run_rules([DuplicateMethodChecker], "Check for duplicate method names"))
 
 
 if __name__ == '__main__':
@@ -2,20 +2,24 @@ import os
 import ast
 import sys  # Import de sys pour gérer l'arrêt du programme avec des codes de sortie
 
-class ClassPropertyChecker:
-    def __init__(self, directory):
-        self.directory = directory
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_for_return.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
-    def _process_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
+class ClassPropertyChecker(Rule):
+    id = 'for-return'
 
-        try:
-            tree = ast.parse(content)  # Analyser le contenu du fichier pour obtenir l'arbre syntaxique
-        except SyntaxError as e:
-            print(f"SyntaxError in file {file_path}: {e}")
-            return
+    def analyze(self, source):
+        tree = source.tree  # Analyser le contenu du fichier pour obtenir l'arbre syntaxique
+        if tree is None:
+            return {"syntax_error": str(source.syntax_error), "violations": []}
 
+        violations = []
         # Rechercher les classes avec les propriétés _name ou _inherit
         for node in ast.walk(tree):
             if isinstance(node, ast.ClassDef):  # Vérifier les définitions de classes
@@ -40,41 +44,43 @@ class ClassPropertyChecker:
                                     has_return = True
                             if not has_return:
                                 # Ajouter le numéro de ligne où la fonction commence
-                                self.violations.append((file_path, class_name, item.name, "No return statement found", item.lineno))
+                                violations.append((class_name, item.name, "No return statement found", item.lineno))
 
                 # Si la classe a une propriété et une fonction, on l'affiche
                 if has_property and functions:
                     for func in functions:
                         # Si une fonction write ou copy n'a pas de return, on la signale
-                        if (file_path, class_name, func, "No return statement found") not in self.violations:
-                            self.violations.append((file_path, class_name, func, "Missing return", node.lineno))
+                        if (class_name, func, "No return statement found") not in violations:
+                            violations.append((class_name, func, "Missing return", node.lineno))
+        return {"syntax_error": None, "violations": violations}
 
-    def run(self):
-        self.violations = []  # Reset violations list
+    def violations(self, results):
+        for path, found in results:
+            if found["syntax_error"]:
+                # Reported without failing the hook
+                yield Violation(self.id, path, None, None, f"SyntaxError: {found['syntax_error']}", 'warning')
+            for class_name, function, message, lineno in found["violations"]:
+                yield Violation(self.id, path, lineno, None, f"Class '{class_name}', function '{function}' -> {message}")
 
-        for root, dirs, files in os.walk(self.directory):
-            # Ignore .venv directory
-            if '.venv' in dirs:
-                dirs.remove('.venv')
-
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
+    def report(self, results):
+        violations = []
+        for path, found in results:
+            if found["syntax_error"]:
+                print(f"SyntaxError in file {path}: {found['syntax_error']}")
+            violations.extend((path,) + tuple(violation) for violation in found["violations"])
 
         # Si des violations sont trouvées, les afficher avec les numéros de ligne
-        if self.violations:
+        if violations:
             print("[ERROR] Issues detected with classes and functions:\n")
-            for path, class_name, function, message, lineno in self.violations:
+            for path, class_name, function, message, lineno in violations:
                 clickable_path = f"file:///{path.replace(os.sep, '/')}"
                 print(f" - {clickable_path}:{lineno}: Class '{class_name}', function '{function}' -> {message} at line {lineno}")
-            sys.exit(1)  # Erreur détectée, quitter avec code 1 pour indiquer un échec
+            return 1  # Erreur détectée, quitter avec code 1 pour indiquer un échec
         else:
             print("[OK] No issues found.")
-            sys.exit(0)  # Aucun problème trouvé, quitter avec code 0 pour indiquer un succès
+            return 0  # Aucun problème trouvé, quitter avec code 0 pour indiquer un succès
 
 def main():
-    checker = ClassPropertyChecker(directory=os.getcwd())
-    checker.run()
+    sys.exit(run_rules([ClassPropertyChecker], "Check for return in write/copy/create/unlink"))
 if __name__ == '__main__':
     SystemExit(main())
@@ -1,94 +1,127 @@
 #!/usr/bin/env python3
-import os
-from pathlib import Path
 import sys
-import argparse
-import tokenize
-from io import StringIO
 
-sys.stdout.reconfigure(encoding="utf-8")
-EXIT_CODE = 0
-ALLOWED_EXTENSIONS = {".py", ".xml"}
-
-parser = argparse.ArgumentParser(description="Check max word count per line in Odoo files (excluding full-line comments)")
-parser.add_argument("--max_line_length", type=int, default=20, help="Max words per line (excluding full-line comments)")
-args = parser.parse_args()
-max_line_length = args.max_line_length
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_lines_max.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
-total_files = 0
-total_lines = 0
-total_violations = 0
+ALLOWED_EXTENSIONS = {".py", ".xml"}
 
-def remove_inline_comment(line: str, ext: str) -> str:
+def strip_python_comments(lines, tokens):
     """
-    Remove inline comments from the line, but only if they are actual comments.
-    This ensures we don't cut off the middle of strings with #.
+    Yield (lineno, code) for every line holding code, without its comment.
+    A # inside a string, including triple-quoted strings, is not a comment.
     """
-    if ext == ".py":
-        try:
-            tokens = list(tokenize.generate_tokens(StringIO(line).readline))
-            result = ""
-            for tok_type, tok_string, _, _, _ in tokens:
-                if tok_type == tokenize.COMMENT:
-                    break  # First comment = end of the code part
-                result += tok_string
-            return result
-        except:
-            return line
-    elif ext == ".xml":
-        return line.split("<!--")[0]
-    return line
-
-def is_full_comment(line: str, ext: str) -> bool:
+    for lineno, line in enumerate(lines, start=1):
+        if lineno in tokens.comments:
+            code = line[:tokens.comments[lineno]]
+        elif not tokens.is_tokenized(lineno) and line.lstrip().startswith("#"):
+            code = ""
+        else:
+            code = line
+        if code.strip():
+            yield lineno, code
+
+def strip_xml_comments(lines):
     """
-    Determine if the line is a full comment (ignores lines starting with #).
+    Yield (lineno, code) for every line holding markup, without its comments.
+    Comments spanning several lines are followed across lines.
     """
-    stripped = line.strip()
-    if not stripped:
-        return True  # Empty lines are considered comments
-    if ext == ".py":
-        return stripped.startswith("#")  # Full comment starts with #
-    elif ext == ".xml":
-        return stripped.startswith("<!--") or stripped.endswith("-->")  # Full comment in XML
-    return False
-
-def check_file(path: Path):
-    global EXIT_CODE, total_files, total_lines, total_violations
-    ext = path.suffix
-    try:
-        with path.open("r", encoding="utf-8", errors="ignore") as f:
-            for lineno, line in enumerate(f, start=1):
-                total_lines += 1
-                if is_full_comment(line, ext):
-                    continue  # Skip full-line comments
-                line_no_comment = remove_inline_comment(line, ext).strip()
-                word_count = len(line_no_comment.split())
-                if word_count > max_line_length:
-                    print(
-                        f"{path.resolve().as_posix()}:{lineno}:1: [too-many-words] {word_count} words (excluding full-line comments)"
-                    )
-                    print(f"    {line.strip()}")
-                    EXIT_CODE = 1
-                    total_violations += 1
-        total_files += 1
-    except Exception as e:
-        print(f"⚠️ Error reading file {path}: {e}")
+    in_comment = False
+    for lineno, line in enumerate(lines, start=1):
+        code = []
+        position = 0
+        while position < len(line):
+            if in_comment:
+                end = line.find("-->", position)
+                if end == -1:
+                    break
+                in_comment = False
+                position = end + 3
+            else:
+                start = line.find("<!--", position)
+                if start == -1:
+                    code.append(line[position:])
+                    break
+                code.append(line[position:start])
+                in_comment = True
+                position = start + 4
+        code = "".join(code)
+        if code.strip():
+            yield lineno, code
+
+class LineLengthChecker(Rule):
+    id = 'lines-max'
+    version = 2
+    extensions = tuple(sorted(ALLOWED_EXTENSIONS))
+    diff_aware = True
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.max_line_length = options.max_line_length
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument("--max_line_length", type=int, default=20,
+                            help="Max words per line (excluding full-line comments)")
+
+    def config(self):
+        return {"max_line_length": self.max_line_length}
+
+    def analyze(self, source):
+        lines = source.lines
+        violations = []
+        # Comments only lower the count: without a long line there is nothing to strip
+        if any(len(line.split()) > self.max_line_length for line in lines):
+            if source.extension == ".py":
+                code_lines = strip_python_comments(lines, source.tokens)
+            else:
+                code_lines = strip_xml_comments(lines)
+            for lineno, code in code_lines:
+                word_count = len(code.split())
+                if word_count > self.max_line_length:
+                    violations.append((lineno, word_count, lines[lineno - 1].strip()))
+        return {"lines": len(lines), "violations": violations}
+
+    def restrict(self, result, lines):
+        return dict(result, violations=[found for found in result["violations"] if found[0] in lines])
+
+    def violations(self, results):
+        for path, found in results:
+            for lineno, word_count, _ in found["violations"]:
+                yield Violation(self.id, path, lineno, 1,
+                                f"[too-many-words] {word_count} words (excluding full-line comments)")
+
+    def report(self, results):
+        from pathlib import Path
+
+        total_lines = 0
+        total_violations = 0
+        for path, found in results:
+            total_lines += found["lines"]
+            for lineno, word_count, line in found["violations"]:
+                print(
+                    f"{Path(path).resolve().as_posix()}:{lineno}:1: [too-many-words] {word_count} words (excluding full-line comments)"
+                )
+                print(f"    {line}")
+                total_violations += 1
+
+        print("\n✅ Scan complete")
+        print(f"  Files scanned     : {len(results)}")
+        print(f"  Lines scanned     : {total_lines}")
+        print(f"  Violations found  : {total_violations}")
+        return 1 if total_violations else 0
 
 def main():
-    cwd = Path(os.getcwd())
-    for file_path in cwd.rglob("*"):
-        if (
-            file_path.is_file()
-            and file_path.suffix in ALLOWED_EXTENSIONS
-            and not any(ignored in file_path.parts for ignored in {".git", "venv", "__pycache__"})
-        ):
-            check_file(file_path)
-
-    print("\n✅ Scan complete")
-    print(f"  Files scanned     : {total_files}")
-    print(f"  Lines scanned     : {total_lines}")
-    print(f"  Violations found  : {total_violations}")
-    return EXIT_CODE
+    sys.stdout.reconfigure(encoding="utf-8")
+    return run_rules(
+        [LineLengthChecker], "Check max word count per line in Odoo files (excluding full-line comments)"
+    )
 
 if __name__ == "__main__":
     sys.exit(main())
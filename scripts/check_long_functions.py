@@ -1,80 +1,128 @@
-import os
 import ast
 import sys
 
-class FunctionLengthChecker:
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_long_functions.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+
+class FunctionCollector(ast.NodeVisitor):
+    """Collect every function with its span in one pass over the tree."""
+
+    def __init__(self):
+        self.scopes = []  # 'class' or 'function', innermost last
+        self.functions = []  # (name, kind, start line, end line)
+        self.docstring_lines = set()
+
+    def _add_docstring(self, node):
+        body = node.body
+        if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                and isinstance(body[0].value.value, str):
+            self.docstring_lines.update(range(body[0].lineno, body[0].end_lineno + 1))
+
+    def visit_ClassDef(self, node):
+        self._add_docstring(node)
+        self.scopes.append('class')
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    def visit_FunctionDef(self, node):
+        kind = 'method' if self.scopes and self.scopes[-1] == 'class' else 'function'
+        self.functions.append((node.name, kind, node.lineno, node.end_lineno))
+        self._add_docstring(node)
+        self.scopes.append('function')
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+class FunctionLengthChecker(Rule):
+    id = 'long-functions'
+    version = 4
+    # A function is reported when its body was changed, wherever its ``def`` is
+    diff_aware = True
     MAX_FUNCTION_LENGTH = 100
 
-    def __init__(self, file_path):
-        self.file_path = file_path
-        self.errors = []
-
-    def check(self):
-        try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                source = f.read()
-            tree = ast.parse(source, filename=self.file_path)
-        except SyntaxError as e:
-            self.errors.append(f"Syntax error in {self.file_path}: {e}")
-            return
-
-        attach_parents(tree)
-
-        for node in ast.walk(tree):
-            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
-                self._check_function(node)
-
-    def _check_function(self, node):
-        start_line = node.lineno
-        end_line = max(
-            (child.lineno for child in ast.walk(node) if hasattr(child, 'lineno')),
-            default=start_line
-        )
-        function_length = end_line - start_line + 1
-        if function_length > self.MAX_FUNCTION_LENGTH:
-            function_type = "Method" if self._is_method(node) else "Function"
-            self.errors.append(
-                f"{self.file_path}:{start_line} {function_type} '{node.name}' too long ({function_length} lines)"
-            )
-
-    def _is_method(self, node):
-        parent = getattr(node, 'parent', None)
-        while parent:
-            if isinstance(parent, ast.ClassDef):
-                return True
-            parent = getattr(parent, 'parent', None)
-        return False
-
-def attach_parents(tree):
-    for node in ast.walk(tree):
-        for child in ast.iter_child_nodes(node):
-            child.parent = node
-
-def find_python_files(base_dir):
-    python_files = []
-    for root, dirs, files in os.walk(base_dir):
-        # Ignore .venv directory
-        if '.venv' in dirs:
-            dirs.remove('.venv')
-
-        for file in files:
-            if file.endswith('.py'):
-                python_files.append(os.path.join(root, file))
-    return python_files
+    def __init__(self, options):
+        super().__init__(options)
+        self.max_lengths = {
+            'function': options.max_function_length,
+            'method': options.max_method_length or options.max_function_length,
+        }
+        self.logical_lines = options.logical_lines
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--max-function-length', type=int, default=cls.MAX_FUNCTION_LENGTH,
+                            help=f'Max lines of a function (default: {cls.MAX_FUNCTION_LENGTH})')
+        parser.add_argument('--max-method-length', type=int,
+                            help='Max lines of a method (default: the function limit)')
+        parser.add_argument('--logical-lines', action='store_true',
+                            help='Do not count blank lines and docstrings')
+
+    def config(self):
+        return {"max_lengths": self.max_lengths, "logical_lines": self.logical_lines}
+
+    def analyze(self, source):
+        tree = source.tree
+        if tree is None:
+            return {"syntax_error": str(source.syntax_error), "functions": []}
+
+        collector = FunctionCollector()
+        collector.visit(tree)
+        if self.logical_lines:
+            counted = self._count_logical_lines(source.lines, collector.docstring_lines)
+
+        errors = []
+        for name, kind, start_line, end_line in collector.functions:
+            if self.logical_lines:
+                function_length = counted[end_line] - counted[start_line - 1]
+                unit = "logical lines"
+            else:
+                function_length = end_line - start_line + 1
+                unit = "lines"
+            if function_length > self.max_lengths[kind]:
+                errors.append((start_line, end_line,
+                               f"{kind.capitalize()} '{name}' too long ({function_length} {unit})"))
+        return {"syntax_error": None, "functions": errors}
+
+    def _count_logical_lines(self, lines, docstring_lines):
+        # counted[n] is the number of lines up to line n holding code, so any span costs O(1)
+        counted = [0]
+        for lineno, line in enumerate(lines, start=1):
+            is_code = bool(line.strip()) and lineno not in docstring_lines
+            counted.append(counted[-1] + is_code)
+        return counted
+
+    def restrict(self, result, lines):
+        return dict(result, functions=[function for function in result["functions"]
+                                       if lines.overlaps(function[0], function[1])])
+
+    def violations(self, results):
+        for path, found in results:
+            if found["syntax_error"]:
+                yield Violation(self.id, path, None, None, f"Syntax error: {found['syntax_error']}")
+            for line, _, message in found["functions"]:
+                yield Violation(self.id, path, line, None, message)
+
+    def report(self, results):
+        exit_code = 0
+        for path, found in results:
+            if found["syntax_error"]:
+                print(f"Syntax error in {path}: {found['syntax_error']}")
+                exit_code = 1
+            for line, _, message in found["functions"]:
+                print(f"{path}:{line} {message}")
+                exit_code = 1
+        return exit_code
 
 def main():
-    base_dir = os.getcwd()
-    file_paths = find_python_files(base_dir)
-
-    exit_code = 0
-    for file_path in file_paths:
-        checker = FunctionLengthChecker(file_path)
-        checker.check()
-        if checker.errors:
-            for error in checker.errors:
-                print(error)
-            exit_code = 1
-    sys.exit(exit_code)
+    sys.exit(run_rules([FunctionLengthChecker], "Check long functions"))
 
 if __name__ == "__main__":
     SystemExit(main())
@@ -1,44 +1,99 @@
 import os
 import sys
-import argparse
 
-sys.stdout.reconfigure(encoding='utf-8')
+try:
+    from scripts.file_selection import list_files
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_module_names.py``
+    from file_selection import list_files
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
 DEFAULT_IGNORE_DIRS = ['.idea', '__pycache__', '.vscode', '.git']
 
-parser = argparse.ArgumentParser(description="Check module directory names in Odoo addons")
-parser.add_argument('--addons', help='Base path to addons directory')
-parser.add_argument('--IGNORE_DIRECTORIES', help='Comma-separated list of directories to ignore (in addition to defaults)')
-parser.add_argument('--allowed-prefixes', help='Comma-separated list of allowed module prefixes')
-parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit')
-args = parser.parse_args()
 
+class ModuleDirectoryChecker(Rule):
+    id = 'module-names'
+    cacheable = False
 
-class ModuleDirectoryChecker:
-    def __init__(self, base_path, allowed_prefixes, ignored_modules):
-        self.base_path = base_path
-        self.allowed_prefixes = tuple(allowed_prefixes)
-        self.ignored_modules = set(ignored_modules)
+    def __init__(self, options):
+        super().__init__(options)
+        self.base_path = os.path.join(self.directory, options.addons if options.addons else "")
+        self.allowed_prefixes = tuple(p.strip() for p in (options.module_prefixes or '').split(',') if p.strip())
+        # Combine default ignores with user-provided ones (if any)
+        custom_ignores = [i.strip() for i in (options.IGNORE_DIRECTORIES or '').split(',') if i.strip()]
+        self.ignored_modules = set(DEFAULT_IGNORE_DIRS + custom_ignores)
+        self.filenames = None
         self.errors = []
 
-    def _list_directories(self):
-        return [
-            item for item in os.listdir(self.base_path)
-            if os.path.isdir(os.path.join(self.base_path, item))
-        ]
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--addons', help='Base path to addons directory')
+        parser.add_argument('--IGNORE_DIRECTORIES',
+                            help='Comma-separated list of directories to ignore (in addition to defaults)')
+        parser.add_argument('--module-prefixes' if combined else '--allowed-prefixes', dest='module_prefixes',
+                            help='Comma-separated list of allowed module prefixes')
 
-    def check_directories(self):
+    def is_enabled(self):
+        return bool(self.allowed_prefixes)
+
+    def select_files(self, filenames, all_files):
+        # Module directories are checked, not file contents
+        self.filenames = None if all_files else filenames
+        return []
+
+    def analyze(self, source):
+        return []
+
+    def violations(self, results):
         if not os.path.exists(self.base_path):
-            print(f"[ERROR] Path not found: {self.base_path}")
-            return 1
+            yield Violation(self.id, self.base_path, None, None, "Path not found")
+            return
+        for directory, error in self._invalid_directories():
+            yield Violation(self.id, os.path.join(self.base_path, directory), None, None, error)
 
+    def report(self, results):
+        return self.check_directories()
+
+    def _list_directories(self):
+        if self.filenames:
+            return self._list_touched_directories()
+        # The top-level directories holding files to check, ignored and vendored trees excluded
+        base_path = os.path.abspath(self.base_path)
+        directories = set()
+        for path in list_files(base_path):
+            parts = os.path.relpath(path, base_path).split(os.sep)
+            if len(parts) > 1:
+                directories.add(parts[0])
+        return sorted(directories)
+
+    def _list_touched_directories(self):
+        """Only the module directories containing one of the passed files."""
+        directories = set()
+        base_path = os.path.abspath(self.base_path)
+        for filename in self.filenames:
+            rel_path = os.path.relpath(os.path.abspath(filename), base_path)
+            parts = rel_path.split(os.sep)
+            if len(parts) > 1 and parts[0] != os.pardir:
+                directories.add(parts[0])
+        return sorted(d for d in directories if os.path.isdir(os.path.join(base_path, d)))
+
+    def _invalid_directories(self):
         for directory in self._list_directories():
             if directory in self.ignored_modules:
                 continue
             if not directory.startswith(self.allowed_prefixes) and self.allowed_prefixes:
-                self.errors.append(
-                    f"[Invalid module name] {directory} ➜ name must start with one of: {self.allowed_prefixes}"
-                )
+                yield directory, f"[Invalid module name] {directory} ➜ name must start with one of: {self.allowed_prefixes}"
+
+    def check_directories(self):
+        if not os.path.exists(self.base_path):
+            print(f"[ERROR] Path not found: {self.base_path}")
+            return 1
+
+        self.errors.extend(error for _, error in self._invalid_directories())
 
         if self.errors:
             print(f"in folder : {self.base_path}")
@@ -49,18 +104,8 @@ class ModuleDirectoryChecker:
 
 
 def main():
-    if not args.allowed_prefixes:
-        args.allowed_prefixes = ""
-
-    allowed_prefixes = [p.strip() for p in args.allowed_prefixes.split(',') if p.strip()]
-
-    # Combine default ignores with user-provided ones (if any)
-    custom_ignores = [i.strip() for i in (args.IGNORE_DIRECTORIES or '').split(',') if i.strip()]
-    all_ignores = DEFAULT_IGNORE_DIRS + custom_ignores
-
-    base_path = os.path.join(os.getcwd(), args.addons if args.addons else "")
-    checker = ModuleDirectoryChecker(base_path, allowed_prefixes, all_ignores)
-    sys.exit(checker.check_directories())
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.exit(run_rules([ModuleDirectoryChecker], "Check module directory names in Odoo addons"))
 
 
 if __name__ == "__main__":
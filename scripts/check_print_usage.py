@@ -37,50 +37,61 @@
 #     checker = PrintChecker(directory=os.getcwd())
 #     checker.run()
 
-import os
 import sys
-import io
 
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_print_usage.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
-class PrintChecker:
-    def __init__(self, directory):
-        self.directory = directory
-        self.errors = []
+IGNORED_DIRS = {'scripts', 'odoo18'}
 
-    def _process_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-            for idx, line in enumerate(lines, start=1):
-                if line.strip().startswith("#"):
-                    continue
-                if 'print(' in line:
-                    self.errors.append((file_path, idx, line.strip()))
+class PrintChecker(Rule):
+    id = 'print-usage'
+    version = 2
+    ignored_dirs = IGNORED_DIRS
+    diff_aware = True
 
-    def run(self):
+    def analyze(self, source):
+        tokens = source.tokens
+        # Calls to print(), not obj.print() nor "print(" in a string or a comment
+        rows = {row for row, _ in tokens.calls('print')}
+        errors = []
+        for idx, line in enumerate(source.lines, start=1):
+            if tokens.is_tokenized(idx):
+                if idx in rows:
+                    errors.append((idx, line.strip()))
+            elif 'print(' in line and not line.strip().startswith("#"):
+                errors.append((idx, line.strip()))
+        return errors
 
-        ignored_dirs = {'.idea', '.venv', 'node_modules', '__pycache__','scripts','odoo18'}
+    def restrict(self, result, lines):
+        return [(line, content) for line, content in result if line in lines]
 
-        for root, dirs, files in os.walk(self.directory):
+    def violations(self, results):
+        for path, found in results:
+            for line, content in found:
+                yield Violation(self.id, path, line, None, f"Usage of print(): {content}")
 
-            dirs[:] = [d for d in dirs if d not in ignored_dirs]
+    def report(self, results):
+        errors = [(path, line, content) for path, found in results for line, content in found]
 
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
-
-        if self.errors:
+        if errors:
             print("\n[ERROR] Usage of print() detected in the following files:\n")
-            for path, line, content in self.errors:
+            for path, line, content in errors:
                 print(f" - {path}:{line} -> {content}")
-            sys.exit(1)
+            return 1
         else:
             print("[OK] No usage of print() found.")
-            sys.exit(0)
+            return 0
 
 def main():
-    checker = PrintChecker(directory=os.getcwd())
-    checker.run()
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+    sys.exit(run_rules([PrintChecker], "Check print() usage in Python files"))
 if __name__ == '__main__':
     SystemExit(main())
@@ -1,70 +1,128 @@
 import os
 import re
 import sys
-import argparse
 import json
 
-sys.stdout.reconfigure(encoding='utf-8')
-
-parser = argparse.ArgumentParser(description="Check duplicate method names in Odoo classes")
-parser.add_argument('--addons', help='addons')
-parser.add_argument('--MANDATORY_FIELDS', help='MANDATORY_FIELDS')
-parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit')
-args = parser.parse_args()
-
-
-class ReportFieldChecker:
-    def __init__(self):
-        self.directory = os.getcwd()  # خذ المسار الحالي تلقائيا
+try:
+    from scripts.file_selection import walk_files
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+    from scripts.source import SourceFile
+    from scripts.stat_memo import remembered
+    from scripts.xml_scan import scan_records
+except ImportError:  # executed as ``python scripts/check_report_template.py``
+    from file_selection import walk_files
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+    from source import SourceFile
+    from stat_memo import remembered
+    from xml_scan import scan_records
+
+
+class ReportFieldChecker(Rule):
+    id = 'report-template'
+    version = 2
+    extensions = ('.xml',)
+    # A template removed from one file breaks the reports of its whole module
+    cross_file = True
+
+    def __init__(self, options):
+        super().__init__(options)  # خذ المسار الحالي تلقائيا
+        self.addons = options.addons
         self.pattern_record = re.compile(
             r'<record[^>]+model=["\']ir.actions.report["\'][^>]*>.*?</record>', re.DOTALL | re.IGNORECASE
         )
         self.pattern_field_report_name = re.compile(
             r'<field name=["\']report_name["\'][^>]*>(.*?)</field>', re.IGNORECASE
         )
-        self.template_pattern = re.compile(
-            r'<template[^>]*id\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE
-        )
-
-    def check_reports(self):
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith('.xml'):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
-
-    def _process_file(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-
-            records = self.pattern_record.findall(content)
-            if not records:
-                return
-
+        # <template> and <record> opening tags, attributes are read separately
+        self.template_tag_pattern = re.compile(r'<(template|record)\b([^>]*)>', re.IGNORECASE)
+        self.attribute_pattern = re.compile(r'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+        self.t_name_pattern = re.compile(r'\st-name\s*=\s*["\']([^"\']+)["\']')
+        # Module directory -> (template ids, XML files read)
+        self._template_index = {}
+        self._analyzed_templates = {}
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--addons', help='addons')
+
+    def analyze(self, source):
+        content = source.text
+        reports = []
+        records = self.pattern_record.findall(content)
+        if records:
             lines = content.splitlines()
-
             for record in records:
                 match = self.pattern_field_report_name.search(record)
                 if match:
                     report_name = match.group(1)
-                    self._check_dossier_exists(report_name, lines, file_path)
-
-        except Exception as e:
-            print(f"⚠️ Could not read {file_path}: {e}")
+                    reports.append((report_name, self._find_line_number(lines, report_name)))
+        return {"reports": reports, "templates": self._extract_templates(content)}
+
+    def _extract_templates(self, content):
+        """The QWeb template ids of a file: <template id>, ir.ui.view records and t-name."""
+        templates = set(self.t_name_pattern.findall(content))
+        for tag, attributes in self.template_tag_pattern.findall(content):
+            values = {name: double or single for name, double, single in self.attribute_pattern.findall(attributes)}
+            if 'id' not in values:
+                continue
+            if tag.lower() == 'template' or values.get('model') == 'ir.ui.view':
+                templates.add(values['id'])
+        return sorted(templates)
+
+    def _missing_templates(self, results):
+        """Yield ``(path, line, report name, module path, template)`` for every report without its template.
+
+        ``template`` is ``None`` when the module itself is not found.
+        """
+        # Templates of the files checked in this run, the other modules are read on demand
+        self._analyzed_templates = {path: found["templates"] for path, found in results}
+        self._template_index = {}
+        for file_path, found in results:
+            for report_name, line_number in found["reports"]:
+                target = self._report_target(report_name)
+                if target is None:
+                    continue
+                dossier_path, template_name = target
+                if not os.path.exists(dossier_path):
+                    yield file_path, line_number, report_name, dossier_path, None
+                elif not self._has_template(dossier_path, template_name):
+                    yield file_path, line_number, report_name, dossier_path, template_name
+
+    def violations(self, results):
+        for file_path, line_number, report_name, dossier_path, template_name in self._missing_templates(results):
+            if template_name is None:
+                message = f"Dossier '{report_name.split('.')[0]}' from report_name '{report_name}' not found"
+            else:
+                message = f"Template '{template_name}' not found in directory: {dossier_path}"
+            yield Violation(self.id, file_path, line_number, None, message)
+
+    def report(self, results):
+        exit_code = 0
+        for file_path, line_number, report_name, dossier_path, template_name in self._missing_templates(results):
+            clickable_path = f"file:///{file_path.replace(os.sep, '/')}"
+            if template_name is None:
+                print(
+                    f"⚠️ : Dossier '{report_name.split('.')[0]}' from report_name '{report_name}' not found at:\n⚠️ {clickable_path}:{line_number}"
+                )
+            else:
+                self.find_templates_with_id_or_name(dossier_path, template_name, f"{clickable_path}:{line_number}")
+            exit_code = 1
+        return exit_code
 
-    def _check_dossier_exists(self, report_name, lines, file_path):
+    def _report_target(self, report_name):
+        """The ``(module path, template)`` a report_name points to, ``None`` when it is not checked."""
         if '.' not in report_name:
-            return
+            return None
 
         dossier_name = report_name.split('.')[0]
         template_name = report_name.split('.')[1]
 
         if not dossier_name or not template_name:
-            return
-
-        clickable_path = f"file:///{file_path.replace(os.sep, '/')}"
-        line_number = self._find_line_number(lines, report_name)
+            return None
 
         # Check if we're already in the module directory
         current_dir_name = os.path.basename(self.directory)
@@ -73,18 +131,11 @@ class ReportFieldChecker:
             dossier_path = self.directory
         else:
             # Look for the module directory
-            if args.addons:
-                dossier_path = os.path.join(self.directory, args.addons, dossier_name)
+            if self.addons:
+                dossier_path = os.path.join(self.directory, self.addons, dossier_name)
             else:
                 dossier_path = os.path.join(self.directory, dossier_name)
-
-        if not os.path.exists(dossier_path):
-            print(
-                f"⚠️ : Dossier '{dossier_name}' from report_name '{report_name}' not found at:\n⚠️ {clickable_path}:{line_number}"
-            )
-            sys.exit(1)
-
-        self.find_templates_with_id_or_name(dossier_path, template_name, f"{clickable_path}:{line_number}")
+        return dossier_path, template_name
 
     def _find_line_number(self, lines, search_text):
         for i, line in enumerate(lines):
@@ -92,127 +143,108 @@ class ReportFieldChecker:
                 return i + 1
         return 0
 
+    def _module_templates(self, directory):
+        """Return the template ids of a module and the number of XML files read, once per module."""
+        directory = os.path.abspath(directory)
+        if directory not in self._template_index:
+            templates = set()
+            xml_files = 0
+            for file_path in walk_files(directory, ('.xml',)):
+                xml_files += 1
+                if file_path in self._analyzed_templates:
+                    templates.update(self._analyzed_templates[file_path])
+                    continue
+                try:
+                    templates.update(remembered(
+                        'report-templates', file_path, lambda: self._extract_templates(SourceFile(file_path).text)))
+                except OSError as e:
+                    print(f"⚠️ Could not read {file_path}: {e}")
+            self._template_index[directory] = (templates, xml_files)
+        return self._template_index[directory]
+
+    def _has_template(self, directory, search):
+        templates, _ = self._module_templates(directory)
+        module_name = os.path.basename(os.path.abspath(directory))
+        return search in templates or f"{module_name}.{search}" in templates
+
     def find_templates_with_id_or_name(self, directory, search, path_line):
-        found_templates = []
-        xml_files_checked = []
-
-        for root, _, files in os.walk(directory):
-            for file in files:
-                if file.endswith('.xml'):
-                    file_path = os.path.join(root, file)
-                    xml_files_checked.append(file_path)
-
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            matches = self.template_pattern.findall(content)
-                            found_templates.extend(matches)
-
-                            # Debug: also check manually for the specific templates we fixed
-                            if search in ['attestation_salaire', 'attestation_travail']:
-                                if f'id="{search}"' in content or f"id='{search}'" in content:
-                                    return
-
-                            if search in matches:
-                                # Template found, everything is OK
-                                return
-
-                    except Exception as e:
-                        print(f"⚠️ Could not read {file_path}: {e}")
-
-        # If we reach here, template was not found
+        if self._has_template(directory, search):
+            # Template found, everything is OK
+            return True
+
+        templates, xml_files = self._module_templates(directory)
+
         print(f"⚠️ Template '{search}' not found in directory: {directory}")
         print(f"⚠️ Check: {path_line}")
-        print(f"⚠️ XML files checked: {len(xml_files_checked)}")
-        if found_templates:
-            print(f"⚠️ Available templates: {', '.join(set(found_templates))}")
+        print(f"⚠️ XML files checked: {xml_files}")
+        if templates:
+            print(f"⚠️ Available templates: {', '.join(sorted(templates))}")
         else:
             print("⚠️ No templates found in any XML files")
         print("⚠️ Maybe template name is incorrect or template is in another module.")
-        sys.exit(1)
+        return False
+
+
+class XMLFieldValidator(Rule):
+    id = 'report-fields'
+    version = 2
+    extensions = ('.xml',)
 
+    def __init__(self, options):
+        super().__init__(options)
+        # MANDATORY_FIELDS = {
+        #     "ir.ui.view": ["name", "model"],
+        #     "ir.actions.act_window": ["name", "res_model", "view_mode"],
+        #     "ir.actions.report": ["name", "model", "report_name"],
+        #
+        # }
+        self.mandatory_fields = dict(json.loads(options.MANDATORY_FIELDS)) if options.MANDATORY_FIELDS else {}
 
-# MANDATORY_FIELDS = {
-#     "ir.ui.view": ["name", "model"],
-#     "ir.actions.act_window": ["name", "res_model", "view_mode"],
-#     "ir.actions.report": ["name", "model", "report_name"],
-#
-# }
-MANDATORY_FIELDS = dict(json.loads(args.MANDATORY_FIELDS))
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--MANDATORY_FIELDS', help='MANDATORY_FIELDS')
 
+    def is_enabled(self):
+        return bool(self.mandatory_fields)
 
-class XMLFieldValidator:
-    def __init__(self, directory):
-        self.directory = directory
-        self.pattern_record = r'<record[^>]+model=["\'](.*?)["\'][^>]*>.*?</record>'
-        self.pattern_field = r'<field name=["\'](.*?)["\'](?:[^>]*)>(.*?)</field>'
+    def config(self):
+        return {"mandatory_fields": self.mandatory_fields}
 
-    def run(self):
+    def violations(self, results):
+        for file_path, missing_fields in results:
+            for record_model, missing, line in missing_fields:
+                yield Violation(self.id, file_path, line, None, f"Missing fields for model='{record_model}': {missing}")
+
+    def report(self, results):
         has_errors = False
-        for root, _, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".xml"):
-                    file_path = os.path.join(root, file)
-                    if self._process_file(file_path):
-                        has_errors = True
-        if has_errors:
-            sys.exit(1)
-
-    def _remove_comments(self, content):
-        return re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
-
-    def _process_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            original_content = f.read()
-            clean_content = self._remove_comments(original_content)
-            records = re.findall(self.pattern_record, clean_content, re.DOTALL)
-
-            has_error = False
-            for record_model in records:
-                record_block = self._extract_record_block(clean_content, record_model)
-                record_block_original = self._extract_record_block(original_content, record_model)
-
-                if record_model in MANDATORY_FIELDS:
-                    missing = self._validate_fields(record_block, record_model)
-                    if missing:
-                        line = self._find_line_number(original_content, record_block_original)
-                        clickable_path = f"file:///{file_path.replace(os.sep, '/')}:{line}"
-                        print(f"❌ Missing fields for model='{record_model}': {missing}\n {clickable_path}")
-                        has_error = True
-
-            return has_error
-
-    def _extract_record_block(self, content, model):
-        pattern = rf'<record[^>]+model=["\']{re.escape(model)}["\'][^>]*>.*?</record>'
-        match = re.search(pattern, content, re.DOTALL)
-        return match.group(0) if match else ""
-
-    def _validate_fields(self, record, model):
-        found_fields = dict(re.findall(self.pattern_field, record))
-        return [field for field in MANDATORY_FIELDS[model] if field not in found_fields]
-
-    def _get_field_value(self, record):
-        found_fields = dict(re.findall(self.pattern_field, record))
-        return found_fields.get('name')
-
-    def _find_line_number(self, content, block):
-        lines = content.splitlines()
-        for idx, line in enumerate(lines):
-            if block.strip() in line:
-                return idx + 1
-
-        position = content.find(block.strip())
-        if position != -1:
-            return content[:position].count('\n') + 1
-        return 0
+        for file_path, missing_fields in results:
+            for record_model, missing, line in missing_fields:
+                clickable_path = f"file:///{file_path.replace(os.sep, '/')}:{line}"
+                print(f"❌ Missing fields for model='{record_model}': {missing}\n {clickable_path}")
+                has_errors = True
+        return 1 if has_errors else 0
+
+    def analyze(self, source):
+        if not self.mandatory_fields:
+            return []
+
+        missing_fields = []
+        with source.open() as stream:
+            records = scan_records(stream)
+        for record in records:
+            if record.model in self.mandatory_fields:
+                missing = self._validate_fields(record.fields, record.model)
+                if missing:
+                    missing_fields.append((record.model, missing, record.line))
+        return missing_fields
+
+    def _validate_fields(self, fields, model):
+        return [field for field in self.mandatory_fields[model] if field not in fields]
 
 
 def main():
-    directory = os.getcwd()
-    validator = XMLFieldValidator(directory)
-    validator.run()
-    checker = ReportFieldChecker()
-    checker.check_reports()
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.exit(run_rules([XMLFieldValidator, ReportFieldChecker], "Check report templates and mandatory record fields"))
 
 
 if __name__ == "__main__":
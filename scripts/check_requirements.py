@@ -1,39 +1,64 @@
-import ast
 import os
 import sys
-import glob
-import argparse
 
-sys.stdout.reconfigure(encoding='utf-8')
-
-parser = argparse.ArgumentParser(description="Check Odoo __manifest__.py files")
-parser.add_argument('--required_keys', help='Champs requis séparés par des virgules')
-parser.add_argument('--debug', action='store_true', help='Affiche les messages de debug')
-parser.add_argument('filenames', nargs='*', help='Fichiers passés par pre-commit')
-args = parser.parse_args()
-
-
-class ManifestChecker:
-    def __init__(self, base_directory=None):
-        self.base_directory = base_directory or os.getcwd()
-        self.required_fields = args.required_keys.split(',') if args.required_keys else []
-        self.debug = args.debug
-
-    def _log(self, message):
-        if self.debug:
-            print(f"[DEBUG] {message}")
-
-    def _parse_manifest_file(self, file_path):
+try:
+    from scripts.addon_graph import parse_manifest
+    from scripts.asset_index import AssetIndex
+    from scripts.file_selection import select_files
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_requirements.py``
+    from addon_graph import parse_manifest
+    from asset_index import AssetIndex
+    from file_selection import select_files
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+
+
+class ManifestChecker(Rule):
+    id = 'manifest-fields'
+    extensions = ('__manifest__.py',)
+    # The data and asset files listed in the manifest are checked on disk
+    cacheable = False
+
+    def __init__(self, options):
+        super().__init__(options)
+        self.required_fields = options.required_keys.split(',') if options.required_keys else []
+        self.debug = options.debug
+        # Racine des addons -> AssetIndex
+        self._asset_indexes = {}
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--required_keys', help='Champs requis séparés par des virgules')
+        parser.add_argument('--debug', action='store_true', help='Affiche les messages de debug')
+
+    def select_files(self, filenames, all_files):
+        """Les fichiers '__manifest__.py' passés (tout le répertoire avec --all-files)."""
+        return [
+            file_path for file_path in select_files(filenames, all_files, self.directory, self.extensions)
+            if os.path.basename(file_path) == '__manifest__.py'
+        ]
+
+    def _log(self, messages, message):
+        messages.append(("debug", f"[DEBUG] {message}", []))
+
+    def _error(self, messages, *lines, details=()):
+        # ``details`` : un message court par problème, pour --format jsonl/sarif
+        messages.append(("error", "\n".join(lines), list(details)))
+
+    def _parse_manifest_file(self, source, messages):
         """Analyse un fichier __manifest__.py et retourne son contenu sous forme de dictionnaire."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-                return ast.literal_eval(content)
+            return parse_manifest(source.text)
         except Exception as e:
-            print(f"❌ Erreur lors de l'analyse du fichier {file_path}: {e}")
-            sys.exit(1)
+            self._error(messages, f"❌ Erreur lors de l'analyse du fichier {source.path}: {e}",
+                        details=[f"Erreur lors de l'analyse du manifeste : {e}"])
+            return None
 
-    def _check_required_fields(self, manifest_content, file_path):
+    def _check_required_fields(self, manifest_content, file_path, messages):
         """Vérifie que tous les champs obligatoires sont présents et valides."""
         missing_fields = []
         for field in self.required_fields:
@@ -41,14 +66,16 @@ class ManifestChecker:
                 missing_fields.append(field)
 
         if missing_fields:
-            print(f"❌ Les champs suivants sont manquants ou vides dans le fichier {file_path}:")
-            for field in missing_fields:
-                print(f"- {field}")
-            sys.exit(1)
+            self._error(
+                messages,
+                f"❌ Les champs suivants sont manquants ou vides dans le fichier {file_path}:",
+                *[f"- {field}" for field in missing_fields],
+                details=[f"Champ obligatoire manquant ou vide : {field}" for field in missing_fields]
+            )
         else:
-            self._log(f"✔ Tous les champs obligatoires sont présents dans {file_path}.")
+            self._log(messages, f"✔ Tous les champs obligatoires sont présents dans {file_path}.")
 
-    def _check_data_files(self, file_path, manifest_content):
+    def _check_data_files(self, file_path, manifest_content, messages):
         """Vérifie que tous les fichiers listés dans 'data' existent."""
         data_files = manifest_content.get('data', [])
         missing_files = []
@@ -59,59 +86,97 @@ class ManifestChecker:
                 missing_files.append((data_file, full_file_path))
 
         if missing_files:
-            print(f"\n❌ Fichiers listés dans 'data' manquants dans {file_path}:")
+            lines = [f"\n❌ Fichiers listés dans 'data' manquants dans {file_path}:"]
             for data_file, full_path in missing_files:
-                print(f"- '{data_file}' n'existe pas. (Chemin attendu : {full_path})")
-                print("  ➤ Vérifie le nom, le chemin, ou une virgule oubliée.")
-            sys.exit(1)
-
-    def _check_assets_files(self, file_path, manifest_content):
-        """Vérifie que tous les fichiers listés dans 'assets' existent (y compris les 'remove')."""
+                lines.append(f"- '{data_file}' n'existe pas. (Chemin attendu : {full_path})")
+                lines.append("  ➤ Vérifie le nom, le chemin, ou une virgule oubliée.")
+            self._error(messages, *lines,
+                        details=[f"Fichier 'data' manquant : {data_file}" for data_file, _ in missing_files])
+
+    def _asset_index(self, root):
+        # Un seul parcours des modules de la racine, partagé par tous les manifestes
+        if root not in self._asset_indexes:
+            self._asset_indexes[root] = AssetIndex(root)
+        return self._asset_indexes[root]
+
+    @staticmethod
+    def _asset_paths(entry):
+        """Les chemins à vérifier d'une entrée d'assets (chaîne ou directive en tuple)."""
+        if isinstance(entry, str):
+            return [entry]
+        if not isinstance(entry, (tuple, list)) or len(entry) < 2 or entry[0] in ('include', 'remove'):
+            # ('include', bundle) : un nom de bundle, pas un fichier ; ('remove', chemin) retire un asset
+            # d'Odoo ou d'un autre module, souvent absent de l'arborescence
+            return []
+        # ('replace', cible, chemin), ('prepend', chemin)... : seul le dernier chemin est ajouté par le module,
+        # la cible est souvent un asset d'Odoo ou d'un autre module, absent de l'arborescence
+        path = entry[-1]
+        return [path] if isinstance(path, str) else []
+
+    def _check_assets_files(self, file_path, manifest_content, messages):
+        """Vérifie que tous les fichiers listés dans 'assets' existent (y compris 'remove', 'replace'...)."""
         assets = manifest_content.get('assets', {})
+        if not isinstance(assets, dict):
+            return
+        root = os.path.dirname(os.path.dirname(file_path))
+        index = self._asset_index(root)
         missing_files = []
 
         for bundle_name, file_list in assets.items():
             for entry in file_list:
-                if isinstance(entry, tuple) and len(entry) == 2:
-                    _, asset_path = entry
-                else:
-                    asset_path = entry
-
-                full_glob_path = os.path.dirname(os.path.dirname(file_path))+"/"+asset_path
-                full_glob_path = full_glob_path.replace('/','/')
-                matches = glob.glob(full_glob_path, recursive=True)
-                if not matches:
-                    missing_files.append((asset_path, full_glob_path, bundle_name))
+                for asset_path in self._asset_paths(entry):
+                    if '://' in asset_path:
+                        # Ressource externe (CDN)
+                        continue
+                    if not index.exists(asset_path):
+                        missing_files.append((asset_path, root + "/" + asset_path, bundle_name))
 
         if missing_files:
-            print(f"\n❌ Fichiers d'assets manquants dans {file_path}:")
+            lines = [f"\n❌ Fichiers d'assets manquants dans {file_path}:"]
             for asset_path, full_path, bundle in missing_files:
-                print(f"- '{asset_path}' (bundle : {bundle}) n'existe pas.")
-                print(f"  → Chemin attendu : {full_path}")
-                print("  ⚠️ Vérifie le nom, le chemin relatif, les jokers glob (**), ou une virgule oubliée.")
-            sys.exit(1)
-
-    def check_manifest_file(self, file_path):
+                lines.append(f"- '{asset_path}' (bundle : {bundle}) n'existe pas.")
+                lines.append(f"  → Chemin attendu : {full_path}")
+                lines.append("  ⚠️ Vérifie le nom, le chemin relatif, les jokers glob (**), ou une virgule oubliée.")
+            self._error(messages, *lines, details=[
+                f"Fichier d'assets manquant : {asset_path} (bundle : {bundle})"
+                for asset_path, _, bundle in missing_files
+            ])
+
+    def analyze(self, source):
         """Vérifie un fichier __manifest__.py spécifique."""
-        manifest_content = self._parse_manifest_file(file_path)
-        self._check_required_fields(manifest_content, file_path)
-        self._check_data_files(file_path, manifest_content)
-        self._check_assets_files(file_path, manifest_content)
-
-    def check_all_manifest_files(self):
-        """Parcourt tout le répertoire pour vérifier tous les fichiers '__manifest__.py'."""
-        for root, dirs, files in os.walk(self.base_directory):
-            for file in files:
-                if file == '__manifest__.py':
-                    file_path = os.path.join(root, file)
-                    self._log(f"Analyse du fichier manifeste : {file_path}")
-                    self.check_manifest_file(file_path)
+        file_path = source.path
+        messages = []
+        self._log(messages, f"Analyse du fichier manifeste : {file_path}")
+        manifest_content = self._parse_manifest_file(source, messages)
+        if manifest_content is not None:
+            self._check_required_fields(manifest_content, file_path, messages)
+            self._check_data_files(file_path, manifest_content, messages)
+            self._check_assets_files(file_path, manifest_content, messages)
+        return messages
+
+    def violations(self, results):
+        for path, messages in results:
+            for level, _, details in messages:
+                if level == "error":
+                    for detail in details:
+                        yield Violation(self.id, path, None, None, detail)
+
+    def report(self, results):
+        exit_code = 0
+        for _, messages in results:
+            for level, message, _ in messages:
+                if level == "error":
+                    print(message)
+                    exit_code = 1
+                elif self.debug:
+                    print(message)
+        return exit_code
 
 
 def main():
-    checker = ManifestChecker()
-    checker.check_all_manifest_files()
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.exit(run_rules([ManifestChecker], "Check Odoo __manifest__.py files"))
 
 
 if __name__ == "__main__":
-    SystemExit(main())
\ No newline at end of file
+    SystemExit(main())
@@ -1,61 +1,166 @@
-import os
+import ast
 import re
 import sys
 
-class SQLChecker:
-    def __init__(self, directory):
-        self.directory = directory
-        self.violations = []
-
-        # Pattern for Odoo cursor usage with raw SQL
-        self.odoo_sql_pattern = re.compile(
-            r'''(?i)
-                (
-                    (
-                        self\.env\.cr              
-                        | self\.pool\.cursor\(\)      
-                    )
-                    \.execute\s*               
-                    \(.*?(["']{1,3})                 
-                    \s*(INSERT|DELETE|UPDATE)\b
-                )
-            ''', re.VERBOSE
-        )
-
-        # Pattern for general cursor execute with raw SQL
-        self.general_sql_pattern = re.compile(
-            r'''(?i)
-                (
-                    (\w+)                             
-                    \.execute\s*               
-                    \(.*?(["']{1,3})                 
-                    \s*(INSERT|DELETE|UPDATE)\b
-                )
-            ''', re.VERBOSE
-        )
-
-        # Pattern for SQL variables - more specific to avoid false positives
-        self.sql_variable_pattern = re.compile(
-            r'''(?i)
-                (
-                    (?!_name|_description|_inherit|_rec_name|_table)  # Exclude Odoo fields
-                    (\w+)                                      # Variable name
-                    \s*=\s*                                   # Assignment
-                    (["']{3}|["'])                            # Quote start
-                    [^"']*                                    # Any content
-                    (INSERT\s+INTO|DELETE\s+FROM|UPDATE\s+\w+\s+SET)  # SQL keywords
-                    [^"']*                                    # Rest of content
-                    \3                                        # Matching quote end
-                )
-            ''', re.VERBOSE
-        )
-
-        # Pattern for executing variables that might contain SQL
-        self.execute_var_pattern = re.compile(
-            r'''(?i)
-                (\w+)\.execute\s*\(\s*(\w+)\s*\)
-            ''', re.VERBOSE
-        )
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_sql.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+
+# INSERT/UPDATE/DELETE statements, found with one scan of the static text of a query
+SQL_COMMAND_PATTERN = re.compile(r'\b(INSERT\s+INTO|DELETE\s+FROM|UPDATE\s+[\w."]+\s+SET)\b', re.IGNORECASE)
+# Stands for the parts of a query only known at runtime (f-string values, concatenated variables)
+PLACEHOLDER = 'x'
+# psycopg2.sql.SQL and odoo.tools.SQL wrap the query text
+SQL_WRAPPERS = {'SQL'}
+ODOO_CURSORS = {'self.env.cr', 'self._cr', 'self.pool.cursor()'}
+
+def sql_command(text):
+    """Return INSERT, UPDATE or DELETE when ``text`` holds such a statement."""
+    match = SQL_COMMAND_PATTERN.search(text)
+    return match.group(1).split()[0].upper() if match else None
+
+def _dotted(node):
+    """The text of a cursor expression such as ``self.env.cr`` (``ast.unparse`` needs Python 3.9)."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return f"{_dotted(node.value)}.{node.attr}"
+    if isinstance(node, ast.Call) and not node.args and not node.keywords:
+        return f"{_dotted(node.func)}()"
+    # Any other expression (subscript, call with arguments...), never an Odoo cursor by itself
+    return '?'
+
+class SQLScanner:
+    """Find the SQL statements executed in a module, in one pass over its statements.
+
+    The static text of strings, f-strings, concatenations, ``%`` and
+    ``.format()`` is followed through the assignments of each function (and
+    of the module) to the ``execute()`` calls. Expressions are only searched
+    for calls when the module calls ``execute`` at all.
+    """
+
+    def __init__(self, find_calls=True):
+        self.find_calls = find_calls
+        self.scopes = [{}]  # variable -> static text (or None), innermost last
+        self.violations = []  # (line, type)
+
+    def _lookup(self, name):
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def static_text(self, node):
+        """The text ``node`` evaluates to, runtime parts replaced, or ``None``."""
+        if isinstance(node, ast.Constant):
+            return node.value if isinstance(node.value, str) else None
+        if isinstance(node, ast.JoinedStr):
+            return "".join(
+                value.value if isinstance(value, ast.Constant) else PLACEHOLDER for value in node.values
+            )
+        if isinstance(node, ast.Name):
+            return self._lookup(node.id)
+        if isinstance(node, ast.IfExp):
+            # The branch holding a statement, whichever it is
+            texts = [self.static_text(node.body), self.static_text(node.orelse)]
+            return next((text for text in texts if text and sql_command(text)),
+                        next((text for text in texts if text is not None), None))
+        if isinstance(node, ast.BinOp):
+            left = self.static_text(node.left)
+            if isinstance(node.op, ast.Mod):
+                return left
+            if isinstance(node.op, ast.Add):
+                right = self.static_text(node.right)
+                if left is None and right is None:
+                    return None
+                return (left or PLACEHOLDER) + (right or PLACEHOLDER)
+            return None
+        if isinstance(node, ast.Call):
+            func = node.func
+            if isinstance(func, ast.Attribute) and func.attr == 'format':
+                return self.static_text(func.value)
+            name = func.attr if isinstance(func, ast.Attribute) else getattr(func, 'id', None)
+            if name in SQL_WRAPPERS and node.args:
+                return self.static_text(node.args[0])
+        return None
+
+    def scan(self, statements):
+        for node in statements:
+            if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+                # Decorators, defaults, annotations and bases run in the enclosing scope
+                for name, value in ast.iter_fields(node):
+                    if name != 'body':
+                        self._scan_field(value)
+                self.scopes.append({})
+                self.scan(node.body)
+                self.scopes.pop()
+                continue
+            for value in ast.iter_fields(node):
+                self._scan_field(value[1])
+            if isinstance(node, ast.Assign):
+                text = self.static_text(node.value)
+                for target in node.targets:
+                    if isinstance(target, ast.Name):
+                        self._assign(target.id, text, node)
+            elif isinstance(node, ast.AnnAssign):
+                if node.value is not None and isinstance(node.target, ast.Name):
+                    self._assign(node.target.id, self.static_text(node.value), node)
+            elif isinstance(node, ast.AugAssign):
+                if isinstance(node.target, ast.Name) and isinstance(node.op, ast.Add):
+                    previous = self._lookup(node.target.id)
+                    added = self.static_text(node.value)
+                    if previous is None and added is None:
+                        text = None
+                    else:
+                        text = (previous or PLACEHOLDER) + (added or PLACEHOLDER)
+                    self._assign(node.target.id, text, node)
+
+    def _scan_field(self, value):
+        if isinstance(value, list):
+            if value and isinstance(value[0], ast.stmt):
+                self.scan(value)
+                return
+            for item in value:
+                self._scan_field(item)
+        elif isinstance(value, ast.expr):
+            if self.find_calls:
+                for node in ast.walk(value):
+                    if isinstance(node, ast.Call):
+                        self._check_call(node)
+        elif isinstance(value, ast.AST):
+            # with items, except handlers, match cases, function arguments...: their expressions and body
+            for _, field in ast.iter_fields(value):
+                self._scan_field(field)
+
+    def _assign(self, name, text, node):
+        previous = self._lookup(name)
+        self.scopes[-1][name] = text
+        if text and sql_command(text) and not (previous and sql_command(previous)):
+            self.violations.append((node.lineno, 'SQL in variable'))
+
+    def _check_call(self, node):
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr == 'execute' and node.args:
+            text = self.static_text(node.args[0])
+            if text and sql_command(text):
+                if isinstance(node.args[0], ast.Name):
+                    violation_type = 'Execute SQL variable'
+                else:
+                    cursor = _dotted(func.value)
+                    is_odoo = cursor in ODOO_CURSORS or cursor.endswith('env.cr')
+                    violation_type = 'Direct Odoo SQL' if is_odoo else 'General SQL Execute'
+                self.violations.append((node.lineno, violation_type))
+
+class SQLChecker(Rule):
+    id = 'raw-sql'
+    version = 3
+    # Ignore hidden directories
+    skip_hidden = True
 
     def _should_skip_file(self, file_path):
         """Check if file should be skipped"""
@@ -68,100 +173,52 @@ class SQLChecker:
         ]
         return any(skip in file_path for skip in skip_patterns)
 
-    def _should_skip_line(self, line):
-        """Check if line should be skipped"""
-        stripped = line.strip()
-        # Skip empty lines, comments, and docstrings
-        if (not stripped or 
-            stripped.startswith('#') or 
-            stripped.startswith('"""') or 
-            stripped.startswith("'''") or
-            stripped.startswith('*') or  # JSDoc style comments
-            'TODO' in stripped or
-            'FIXME' in stripped):
-            return True
-        return False
-
-    def _process_file(self, file_path):
+    def analyze(self, source):
         """Process a single Python file for SQL violations"""
-        if self._should_skip_file(file_path):
-            return
-            
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-        except Exception as e:
-            print(f"Warning: Could not read {file_path}: {e}")
-            return
-
-        variables_with_sql = set()
-
-        for idx, line in enumerate(lines, start=1):
-            if self._should_skip_line(line):
-                continue
-                
-            # Check for direct Odoo SQL usage
-            if self.odoo_sql_pattern.search(line):
-                self.violations.append((file_path, idx, line.strip(), 'Direct Odoo SQL'))
-                continue
-                
-            # Check for general SQL execute patterns
-            if self.general_sql_pattern.search(line):
-                self.violations.append((file_path, idx, line.strip(), 'General SQL Execute'))
-                continue
-
-            # Check for SQL in variables
-            match = self.sql_variable_pattern.search(line)
-            if match:
-                varname = match.group(2)
-                variables_with_sql.add(varname)
-                self.violations.append((file_path, idx, line.strip(), 'SQL in variable'))
-
-            # Check for execution of variables containing SQL
-            match2 = self.execute_var_pattern.search(line)
-            if match2:
-                varname = match2.group(2)
-                if varname in variables_with_sql:
-                    self.violations.append((file_path, idx, line.strip(), 'Execute SQL variable'))
-
-    def run(self):
-        """Run the SQL checker on all Python files in the directory"""
+        violations = []
+        if self._should_skip_file(source.path) or source.tree is None:
+            return violations
+
+        # Not the shared TokenIndex: this rule reads the AST, and tokenizing a file only to know
+        # whether it calls ``execute`` costs more than the scan it saves. The substring test
+        # only skips work, the AST decides what is reported.
+        scanner = SQLScanner(find_calls='execute' in source.text)
+        scanner.scan(source.tree.body)
+        for line_num, violation_type in sorted(scanner.violations):
+            violations.append((line_num, source.lines[line_num - 1].strip(), violation_type))
+        return violations
+
+    def violations(self, results):
+        for path, found in results:
+            for line_num, content, violation_type in found:
+                yield Violation(self.id, path, line_num, None, f"[{violation_type}] Forbidden raw SQL: {content}")
+
+    def report(self, results):
+        """Print the SQL violations found in the checked Python files"""
         print("Starting SQL check...")
-        
-        file_count = 0
-        for root, dirs, files in os.walk(self.directory):
-            # Ignore hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-            
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
-                    file_count += 1
-
-        print(f"Checked {file_count} Python files.")
-
-        if self.violations:
+
+        violations = [(path,) + tuple(violation) for path, found in results for violation in found]
+        print(f"Checked {len(results)} Python files.")
+
+        if violations:
             print("")
             print("[ERROR] Forbidden raw SQL (INSERT/DELETE/UPDATE) usage detected:")
             print("=" * 60)
-            for path, line_num, content, violation_type in self.violations:
+            for path, line_num, content, violation_type in violations:
                 print(f"* [{violation_type}] {path}:{line_num}")
                 print(f"  Code: {content}")
                 print("")
-            print(f"Total violations found: {len(self.violations)}")
-            return False
+            print(f"Total violations found: {len(violations)}")
+            return 1
         else:
             print("")
             print("[OK] No forbidden raw SQL INSERT/DELETE/UPDATE usage found.")
-            return True
+            return 0
 
 def main():
     """Main function to run the SQL checker"""
     try:
-        checker = SQLChecker(directory=os.getcwd())
-        success = checker.run()
-        sys.exit(0 if success else 1)
+        sys.exit(run_rules([SQLChecker], "Detect raw SQL INSERT/DELETE/UPDATE usage"))
     except KeyboardInterrupt:
         print("")
         print("Operation cancelled by user.")
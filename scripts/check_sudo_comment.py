@@ -1,49 +1,74 @@
 # scripts/check_sudo_comment.py
-import os
 import re
 import sys
 
-class SudoChecker:
-    def __init__(self, directory):
-        self.directory = directory
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_sudo_comment.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+
+class SudoChecker(Rule):
+    id = 'sudo-comment'
+    version = 2
+    diff_aware = True
+
+    def __init__(self, options):
+        super().__init__(options)
         self.sudo_pattern = re.compile(
             r"self\.env\[\s*['\"][\w\.]+['\"]\s*\]\.sudo\(\)", re.IGNORECASE
         )
-        self.violations = []
 
-    def _process_file(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
+    def analyze(self, source):
+        tokens = source.tokens
+        sudo_calls = {}
+        for row, column in tokens.calls('sudo', method=True):
+            sudo_calls.setdefault(row, []).append(column)
 
-        for idx, line in enumerate(lines):
-            match = self.sudo_pattern.search(line)
-            if line.strip().startswith("#"):
-                continue
-            if match:
+        violations = []
+        for idx, line in enumerate(source.lines):
+            lineno = idx + 1
+            if tokens.is_tokenized(lineno):
+                # A self.env[...].sudo() call in the code, with a real comment after it
+                columns = sudo_calls.get(lineno, ())
+                matches = [
+                    match for match in self.sudo_pattern.finditer(line)
+                    if match.end() - len('sudo()') in columns
+                ]
+                comment_pos = tokens.comments.get(lineno, -1)
+            else:
+                if line.strip().startswith("#"):
+                    continue
+                matches = list(self.sudo_pattern.finditer(line))
                 comment_pos = line.find('#')
-                sudo_pos = match.start()
+            if matches and (comment_pos == -1 or comment_pos < matches[0].start()):
+                violations.append((lineno, line.strip()))
+        return violations
+
+    def restrict(self, result, lines):
+        return [(line, content) for line, content in result if line in lines]
 
-                if comment_pos == -1 or comment_pos < sudo_pos:
-                    self.violations.append((file_path, idx+1, line.strip()))
+    def violations(self, results):
+        for path, found in results:
+            for line, content in found:
+                yield Violation(self.id, path, line, None, f"Missing inline comment for `.sudo()` usage: {content}")
 
-    def run(self):
-        for root, dirs, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".py"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
+    def report(self, results):
+        violations = [(path, line, content) for path, found in results for line, content in found]
 
-        if self.violations:
+        if violations:
             print("[ERROR] Missing inline comment for `.sudo()` usage:\n")
-            for path, line, content in self.violations:
+            for path, line, content in violations:
                 print(f" - {path}:{line} -> {content}")
-            sys.exit(1)
+            return 1
         else:
             print("[OK] All `.sudo()` usages have an inline comment.")
-            sys.exit(0)
+            return 0
 
 def main():
-    checker = SudoChecker(directory=os.getcwd())
-    checker.run()
+    sys.exit(run_rules([SudoChecker], "Ensure .sudo() usage has an inline comment"))
 if __name__ == '__main__':
     SystemExit(main())
@@ -1,47 +1,49 @@
 import os
-import xml.etree.ElementTree as ET
 import sys
 
-class XMLChecker:
-    def __init__(self, directory):
-        self.directory = directory
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+    from scripts.xml_scan import check_well_formed
+except ImportError:  # executed as ``python scripts/check_xml_closing_tags.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
+    from xml_scan import check_well_formed
 
-    def _process_file(self, file_path):
-        try:
-            tree = ET.parse(file_path)  # Try parsing the XML file
-            root = tree.getroot()
+class XMLChecker(Rule):
+    id = 'xml-closing-tags'
+    version = 2
+    extensions = ('.xml',)
 
-        except ET.ParseError as e:
-            # If there's an XML parsing error (such as mismatched tags), capture the line and column
-            error_message = str(e)
-            line_number = error_message.split("line ")[1].split(",")[0]
-            column_number = error_message.split("column ")[1].split()[0]
-            self.violations.append((file_path, line_number, column_number, error_message))
+    def analyze(self, source):
+        # Streamed through expat: no tree is built, large data files stay cheap
+        with source.open() as stream:
+            error = check_well_formed(stream)
+        return [error] if error else []
 
-    def run(self):
-        self.violations = []  # Reset violations list
+    def violations(self, results):
+        for path, found in results:
+            for line, column, error in found:
+                yield Violation(self.id, path, line, column, f"Malformed XML: {error}")
 
-        # Walk through the directory and its subdirectories
-        for root, dirs, files in os.walk(self.directory):
-            for file in files:
-                if file.endswith(".xml"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
+    def report(self, results):
+        violations = [(path,) + tuple(violation) for path, found in results for violation in found]
 
         # If any malformed XML files were found, print them
-        if self.violations:
+        if violations:
             print("[ERROR] Malformed XML files detected:\n")
-            for path, line, column, error in self.violations:
+            for path, line, column, error in violations:
                 clickable_path = f"file:///{path.replace(os.sep, '/')}"
-                print(f"   -> {clickable_path}[{line}:{column}]")
-            sys.exit(1)
+                print(f"   -> {clickable_path}[{line}:{column}] {error}")
+            return 1
         else:
             print("[OK] All XML files are well-formed.")
-            sys.exit(0)
+            return 0
 
 def main():
-    checker = XMLChecker(directory=os.getcwd())
-    checker.run()
+    sys.exit(run_rules([XMLChecker], "Check XML closing tags"))
 if __name__ == '__main__':
     # Run the checker on the current directory
     SystemExit(main())
@@ -1,67 +1,83 @@
 import os
 import sys
-import argparse
 
-sys.stdout.reconfigure(encoding='utf-8')
+try:
+    from scripts.file_selection import select_files
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_xml_filenames.py``
+    from file_selection import select_files
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
 DEFAULT_IGNORE_DIRS = ['.idea', '__pycache__', '.vscode', '.git','.github']
 
-parser = argparse.ArgumentParser(description="Check Odoo module XML file names")
-parser.add_argument('--addons', help='Base path to addons directory')
-parser.add_argument('--IGNORE_DIRECTORIES',
-                    help='Comma-separated list of directories to ignore (in addition to defaults)')
-parser.add_argument('--allowed-prefixes', help='Comma-separated list of allowed XML prefixes')
-parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit (ignored)')  # <= IMPORTANT
-args = parser.parse_args()
-
-
-class RecursiveXmlChecker:
-    def __init__(self, root_path, allowed_prefixes):
-        self.root_path = root_path
-        self.allowed_prefixes = tuple(allowed_prefixes)
-        self.errors = []
-
-    def check_all_xml_files(self):
-        for dirpath, dirnames, filenames in os.walk(self.root_path):
-            # Ignore unwanted directories
-            dirnames[:] = [d for d in dirnames if d not in DEFAULT_IGNORE_DIRS and d not in args.IGNORE_DIRECTORIES]
-
-            for filename in filenames:
-                if not filename.endswith('.xml'):
-                    continue
-                # Check if filename starts with one of the allowed prefixes
-                if not any(filename.startswith(prefix) for prefix in self.allowed_prefixes):
-                    full_path = os.path.join(dirpath, filename)
-                    self.errors.append(
-                        f"[Invalid XML filename] {filename} (in {full_path}) ➜ must start with one of: {self.allowed_prefixes}"
-                    )
-
-        if self.errors:
-            for err in self.errors:
+
+class RecursiveXmlChecker(Rule):
+    id = 'xml-filenames'
+    extensions = ('.xml',)
+    # Only the file name is checked, hashing the content would cost more
+    cacheable = False
+
+    def __init__(self, options):
+        super().__init__(options)
+        # Convert allowed prefixes into a list
+        self.allowed_prefixes = tuple(p.strip() for p in (options.xml_prefixes or '').split(',') if p.strip())
+        # Convert the comma-separated directories in `IGNORE_DIRECTORIES` to a list
+        ignore_dirs = [i.strip() for i in (options.IGNORE_DIRECTORIES or '').split(',') if i.strip()]
+        self.ignored_dirs = DEFAULT_IGNORE_DIRS + ignore_dirs
+        self.root_path = os.path.join(self.directory, options.addons if options.addons else "")
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        parser.add_argument('--addons', help='Base path to addons directory')
+        parser.add_argument('--IGNORE_DIRECTORIES',
+                            help='Comma-separated list of directories to ignore (in addition to defaults)')
+        parser.add_argument('--xml-prefixes' if combined else '--allowed-prefixes', dest='xml_prefixes',
+                            help='Comma-separated list of allowed XML prefixes')
+
+    def is_enabled(self):
+        return bool(self.options.xml_prefixes)
+
+    def select_files(self, filenames, all_files):
+        # Ignore unwanted directories
+        return select_files(filenames, all_files, self.root_path, self.extensions, set(self.ignored_dirs))
+
+    def analyze(self, source):
+        filename = os.path.basename(source.path)
+        # Check if filename starts with one of the allowed prefixes
+        if not any(filename.startswith(prefix) for prefix in self.allowed_prefixes):
+            return [
+                f"[Invalid XML filename] {filename} (in {source.path}) ➜ must start with one of: {self.allowed_prefixes}"
+            ]
+        return []
+
+    def violations(self, results):
+        if not self.is_enabled():
+            yield Violation(self.id, self.root_path, None, None, "You must specify allowed prefixes.")
+            return
+        for path, found in results:
+            for error in found:
+                yield Violation(self.id, path, None, None, error)
+
+    def report(self, results):
+        if not self.is_enabled():
+            print("[ERROR] You must specify allowed prefixes.")
+            return 1
+
+        errors = [error for _, found in results for error in found]
+        if errors:
+            for err in errors:
                 print(err)
             return 1
         return 0
 
 
 def main():
-    # Handle the arguments
-    if not args.allowed_prefixes:
-        print("[ERROR] You must specify allowed prefixes.")
-        sys.exit(1)
-
-    # Convert allowed prefixes into a list
-    allowed_prefixes = [p.strip() for p in args.allowed_prefixes.split(',') if p.strip()]
-
-    # Convert the comma-separated directories in `IGNORE_DIRECTORIES` to a list
-    ignore_dirs = [i.strip() for i in (args.IGNORE_DIRECTORIES or '').split(',') if i.strip()]
-
-    base_path = os.path.join(os.getcwd(), args.addons if args.addons else "")
-
-    # Check XML filenames with the allowed prefixes
-    xml_checker = RecursiveXmlChecker(base_path, allowed_prefixes)
-    xml_result = xml_checker.check_all_xml_files()
-
-    sys.exit(xml_result)
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.exit(run_rules([RecursiveXmlChecker], "Check Odoo module XML file names"))
 
 
 if __name__ == "__main__":
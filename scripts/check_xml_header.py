@@ -1,43 +1,46 @@
-import os
 import sys
 
-class XMLHeaderChecker:
-    def __init__(self, directory, required_prefix='<?xml', excluded_dirs=None):
-        self.directory = directory
-        self.required_prefix = required_prefix.strip().lower()
-        self.excluded_dirs = excluded_dirs or ['.idea', '.venv', '__pycache__','scripts']
-        self.violations = []
+try:
+    from scripts.rules import Rule
+    from scripts.runner import run_rules
+    from scripts.violations import Violation
+except ImportError:  # executed as ``python scripts/check_xml_header.py``
+    from rules import Rule
+    from runner import run_rules
+    from violations import Violation
 
-    def _process_file(self, file_path):
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                first_line = f.readline().strip().lower()
-                if not first_line.startswith(self.required_prefix):
-                    self.violations.append((file_path, first_line))
-        except Exception as e:
-            print(f"[ERROR] Failed to read {file_path}: {e}")
+class XMLHeaderChecker(Rule):
+    id = 'xml-header'
+    extensions = ('.xml',)
+    # حذف المجلدات لي بغينا نتجاهلو
+    ignored_dirs = ('scripts',)
+    required_prefix = '<?xml'
 
-    def run(self):
-        for root, dirs, files in os.walk(self.directory):
-            # حذف المجلدات لي بغينا نتجاهلو
-            dirs[:] = [d for d in dirs if d not in self.excluded_dirs]
+    def analyze(self, source):
+        first_line = source.data.split(b'\n', 1)[0].decode('utf-8', errors='replace').strip().lower()
+        if not first_line.startswith(self.required_prefix):
+            return [first_line]
+        return []
 
-            for file in files:
-                if file.endswith(".xml"):
-                    file_path = os.path.join(root, file)
-                    self._process_file(file_path)
+    def violations(self, results):
+        for path, found in results:
+            for _ in found:
+                yield Violation(self.id, path, 1, 1,
+                                "The file does not start with <?xml version='1.0' encoding='utf-8'?>")
 
-        if self.violations:
+    def report(self, results):
+        violations = [(path, first_line) for path, found in results for first_line in found]
+
+        if violations:
             print("[ERROR] The following XML files do not start with expected prefix:")
-            for path, first_line in self.violations:
+            for path, first_line in violations:
                 print(f" - {path} -> starts with: <?xml version='1.0' encoding='utf-8'?>")
-            sys.exit(1)
+            return 1
         else:
             print("[OK] All XML files start with the expected prefix.")
-            sys.exit(0)
+            return 0
 
 def main():
-    checker = XMLHeaderChecker(directory=os.getcwd())
-    checker.run()
+    sys.exit(run_rules([XMLHeaderChecker], "Check XML header"))
 if __name__ == '__main__':
     SystemExit(main())
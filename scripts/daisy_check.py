@@ -0,0 +1,72 @@
+"""Run every check in one process, reading and parsing each file once.
+
+``daisy-check`` accepts the options of every hook. The two hooks both named
+``--allowed-prefixes`` are spelled ``--module-prefixes`` (module directory
+names) and ``--xml-prefixes`` (XML file names) here. With ``--watch`` it
+keeps running and re-checks the files as they are saved.
+"""
+import os
+import sys
+
+try:
+    from scripts.rules import RULES, load_rule
+    from scripts.profiling import Profile
+    from scripts.runner import build_parser, open_cache, run
+except ImportError:  # executed as ``python scripts/daisy_check.py``
+    from profiling import Profile
+    from rules import RULES, load_rule
+    from runner import build_parser, open_cache, run
+
+
+def _split(value):
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def main(argv=None):
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    rule_classes = [load_rule(rule_id) for rule_id in RULES]
+    parser = build_parser(rule_classes, "Run every Daisy check on the selected files", combined=True)
+    parser.add_argument('--select', help='Comma-separated rule ids to run (all by default)')
+    parser.add_argument('--ignore', help='Comma-separated rule ids to skip')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running, re-check the files as they change and print the violations introduced or fixed')
+    parser.add_argument('--interval', type=float, default=0.5, metavar='SECONDS',
+                        help='How often --watch looks for changed files (default: 0.5)')
+    args = parser.parse_args(argv)
+
+    selected = set(_split(args.select)) or set(RULES)
+    ignored = set(_split(args.ignore))
+    unknown = (selected | ignored) - set(RULES)
+    if unknown:
+        parser.error(f"unknown rule(s): {', '.join(sorted(unknown))}")
+
+    if args.watch and (args.format != 'text' or args.profile or args.profile_output or args.diff_only):
+        parser.error("--watch cannot be combined with --format, --profile or --diff-only")
+
+    args.directory = os.getcwd()
+
+    def make_rules():
+        rules = [
+            rule_class(args) for rule_class in rule_classes
+            if rule_class.id in selected and rule_class.id not in ignored
+        ]
+        # Rules needing an option (e.g. --xml-prefixes) only run once it is given
+        return [rule for rule in rules if rule.is_enabled()]
+
+    if args.watch:
+        try:
+            from scripts.watch import Watcher
+        except ImportError:
+            from watch import Watcher
+        return Watcher(make_rules, args).watch(args.filenames, args.all_files or not args.filenames, args.interval)
+
+    rules = make_rules()
+    return run(rules, args.filenames, args.all_files, combined=True, cache=open_cache(args),
+               jobs=args.jobs, profile=Profile.from_options(args), output_format=args.format,
+               diff_only=args.diff_only)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
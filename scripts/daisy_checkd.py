@@ -0,0 +1,412 @@
+"""A server keeping the hooks warm between pre-commit runs, like ``dmypy``.
+
+``daisy-checkd start`` starts a server for the current checkout, listening
+on a Unix socket next to the result cache. ``daisy-checkd run HOOK [ARGS]``
+then has it run the hook (``check_sql``, ``daisy-check``, ...): its modules
+are already imported, and the values computed per file (content digests,
+models, report templates, manifests, see :mod:`stat_memo`) are kept in
+memory as long as the files keep their size and mtime, so an unchanged
+file is neither read nor hashed again. The output is streamed back as the
+hook prints it and ``run`` exits with the hook's exit code.
+
+Without a server, or on a platform without Unix sockets, ``run`` runs the
+hook in its own process as usual. The server stops after
+``--idle-timeout`` seconds without a request, and as soon as the hooks it
+runs are upgraded or edited.
+"""
+import argparse
+import importlib
+import json
+import os
+import re
+import socket
+import sys
+import time
+
+try:
+    from scripts.result_cache import default_cache_path
+except ImportError:  # executed as ``python scripts/daisy_checkd.py``
+    from result_cache import default_cache_path
+
+SOCKET_FILENAME = 'daisy-checkd.sock'
+LOG_FILENAME = 'daisy-checkd.log'
+DEFAULT_IDLE_TIMEOUT = 3600
+START_TIMEOUT = 10
+# sun_path is 108 bytes on Linux, 104 on macOS
+MAX_SOCKET_PATH = 100
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+_HOOK = re.compile(r'check_\w+|daisy_check')
+
+
+def socket_path(directory):
+    """The socket of the server of ``directory``, in a temporary directory when the default is too long."""
+    path = default_cache_path(directory, SOCKET_FILENAME)
+    if len(path.encode()) <= MAX_SOCKET_PATH:
+        return path
+    import hashlib
+    key = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:16]
+    return os.path.join('/tmp', f"daisy-checkd-{os.getuid()}-{key}.sock")
+
+
+def _code_fingerprint():
+    # Sizes and mtimes of the hooks: the server stops once they change
+    return sorted(
+        (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+        for entry in os.scandir(SCRIPTS_DIR) if entry.name.endswith('.py')
+    )
+
+
+def is_hook(name):
+    return bool(_HOOK.fullmatch(name)) and os.path.isfile(os.path.join(SCRIPTS_DIR, f"{name}.py"))
+
+
+def _import_hook(hook):
+    return importlib.import_module(f"{__package__}.{hook}" if __package__ else hook)
+
+
+def _exit_code(code, stream):
+    # The exit status ``sys.exit(code)`` gives the process
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=stream)
+    return 1
+
+
+def _send(connection, message):
+    connection.sendall((json.dumps(message, ensure_ascii=False) + '\n').encode('utf-8'))
+
+
+class _Stream:
+    """The stdout or stderr of a hook run by the server, sent to the client line by line."""
+
+    encoding = 'utf-8'
+    errors = 'strict'
+
+    def __init__(self, name, connection):
+        self.name = name
+        self.connection = connection
+        self._buffer = []
+
+    def write(self, text):
+        self._buffer.append(text)
+        if '\n' in text:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            text, self._buffer = ''.join(self._buffer), []
+            _send(self.connection, {self.name: text})
+
+    def isatty(self):
+        return False
+
+    def reconfigure(self, **options):
+        pass
+
+
+class Server:
+    def __init__(self, directory, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.directory = os.path.abspath(directory)
+        self.idle_timeout = idle_timeout
+        self.path = socket_path(self.directory)
+        self.fingerprint = _code_fingerprint()
+        self.started = time.time()
+        self.requests = 0
+
+    def run_hook(self, connection, hook, argv, cwd):
+        """Run ``hook`` as ``hook argv`` would in ``cwd``, streaming its output to ``connection``."""
+        from contextlib import redirect_stderr, redirect_stdout
+        import traceback
+
+        try:
+            from scripts.file_selection import clear_listings
+        except ImportError:
+            from file_selection import clear_listings
+
+        stdout, stderr = _Stream('stdout', connection), _Stream('stderr', connection)
+        saved_argv, saved_cwd = sys.argv, os.getcwd()
+        sys.argv = [hook] + argv
+        try:
+            os.chdir(cwd)
+            # Files may have been added or removed since the previous run
+            clear_listings()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    code = _import_hook(hook).main()
+                except SystemExit as e:
+                    code = e.code
+                except Exception:
+                    traceback.print_exc()
+                    code = 1
+                code = _exit_code(code, stderr)
+        finally:
+            sys.argv = saved_argv
+            os.chdir(saved_cwd)
+        stdout.flush()
+        stderr.flush()
+        return code
+
+    def status(self):
+        return {
+            'pid': os.getpid(),
+            'directory': self.directory,
+            'socket': self.path,
+            'uptime': round(time.time() - self.started),
+            'requests': self.requests,
+            'idle_timeout': self.idle_timeout,
+        }
+
+    def handle(self, connection):
+        """Answer one request, return ``False`` once the server has to stop."""
+        with connection.makefile('r', encoding='utf-8') as reader:
+            request = json.loads(reader.readline() or 'null')
+        if not isinstance(request, dict):
+            return True
+        command = request.get('command')
+        if command == 'status':
+            _send(connection, {'status': self.status()})
+            return True
+        if command == 'stop':
+            _send(connection, {'stopped': os.getpid()})
+            return False
+        if _code_fingerprint() != self.fingerprint:
+            # The hooks changed on disk, the imported ones are outdated
+            _send(connection, {'restart': True})
+            return False
+        hook = request.get('hook', '')
+        if not is_hook(hook):
+            _send(connection, {'stderr': f"[ERROR] Unknown hook: {hook}\n"})
+            _send(connection, {'exit': 2})
+            return True
+        self.requests += 1
+        code = self.run_hook(connection, hook, list(request.get('argv', [])), request.get('cwd', self.directory))
+        _send(connection, {'exit': code})
+        return True
+
+    def serve(self):
+        try:
+            from scripts import result_cache, stat_memo
+        except ImportError:
+            import result_cache
+            import stat_memo
+        result_cache.keep_in_memory()
+        stat_memo.enable()
+
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Only the user running the server may connect to it
+        umask = os.umask(0o077)
+        try:
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+            listener.bind(self.path)
+        finally:
+            os.umask(umask)
+        listener.listen(16)
+        listener.settimeout(self.idle_timeout or None)
+        print(f"daisy-checkd {os.getpid()} serving {self.directory} on {self.path}", file=sys.stderr, flush=True)
+        try:
+            while True:
+                try:
+                    connection, _ = listener.accept()
+                except socket.timeout:
+                    break
+                with connection:
+                    connection.settimeout(None)
+                    try:
+                        if not self.handle(connection):
+                            break
+                    except (OSError, ValueError) as e:
+                        # The client went away or sent garbage, serve the next one
+                        print(f"⚠️ Request failed: {e}", file=sys.stderr, flush=True)
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+
+def _connect(directory):
+    """A connection to the server of ``directory``, ``None`` when none is running."""
+    if not hasattr(socket, 'AF_UNIX'):
+        return None
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(socket_path(directory))
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def is_running(directory):
+    client = _connect(directory)
+    if client is None:
+        return False
+    client.close()
+    return True
+
+
+def _request(client, message):
+    """Send ``message`` and yield the responses of the server."""
+    with client:
+        _send(client, message)
+        with client.makefile('r', encoding='utf-8') as reader:
+            for line in reader:
+                yield json.loads(line)
+
+
+def forward(directory, hook, argv):
+    """Have the server run ``hook``, return its exit code, ``None`` when the hook has to run here."""
+    client = _connect(directory)
+    if client is None:
+        return None
+    try:
+        for response in _request(client, {'hook': hook, 'argv': argv, 'cwd': os.getcwd()}):
+            if 'stdout' in response:
+                sys.stdout.write(response['stdout'])
+                sys.stdout.flush()
+            elif 'stderr' in response:
+                sys.stderr.write(response['stderr'])
+                sys.stderr.flush()
+            elif 'exit' in response:
+                return response['exit']
+            elif response.get('restart'):
+                print("⚠️ daisy-checkd was running outdated hooks and stopped, running in this process",
+                      file=sys.stderr)
+                return None
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] Lost daisy-checkd: {e}", file=sys.stderr)
+        return 2
+    print("[ERROR] daisy-checkd stopped before the hook finished", file=sys.stderr)
+    return 2
+
+
+def run_here(hook, argv):
+    sys.argv = [hook] + argv
+    return _import_hook(hook).main()
+
+
+def start(directory, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Start a server for ``directory`` in the background, return its pid."""
+    import subprocess
+
+    log_path = default_cache_path(directory, LOG_FILENAME)
+    os.makedirs(os.path.dirname(log_path), exist_ok=True)
+    command = [sys.executable, os.path.abspath(__file__), '--directory', directory,
+               'serve', '--idle-timeout', str(idle_timeout)]
+    with open(log_path, 'a', encoding='utf-8') as log:
+        process = subprocess.Popen(command, cwd=directory, stdin=subprocess.DEVNULL, stdout=log, stderr=log,
+                                   start_new_session=True)
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        if is_running(directory):
+            return process.pid
+        if process.poll() is not None:
+            break
+        time.sleep(0.05)
+    raise RuntimeError(f"daisy-checkd did not start, see {log_path}")
+
+
+def _query(directory, command):
+    client = _connect(directory)
+    if client is None:
+        return None
+    for response in _request(client, {'command': command}):
+        return response
+    return None
+
+
+def _start_command(args):
+    if is_running(args.directory):
+        print(f"[OK] daisy-checkd already running for {args.directory}")
+        return 0
+    try:
+        pid = start(args.directory, args.idle_timeout)
+    except (OSError, RuntimeError) as e:
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"[OK] daisy-checkd started (pid {pid})")
+    return 0
+
+
+def _stop_command(args):
+    response = _query(args.directory, 'stop')
+    if response is None:
+        print(f"daisy-checkd is not running for {args.directory}")
+        return 1
+    print(f"[OK] daisy-checkd stopped (pid {response['stopped']})")
+    return 0
+
+
+def _status_command(args):
+    response = _query(args.directory, 'status')
+    if response is None:
+        print(f"daisy-checkd is not running for {args.directory}")
+        return 1
+    for name, value in response['status'].items():
+        print(f"{name}: {value}")
+    return 0
+
+
+def _serve_command(args):
+    if is_running(args.directory):
+        print(f"[ERROR] daisy-checkd already running for {args.directory}")
+        return 1
+    Server(args.directory, args.idle_timeout).serve()
+    return 0
+
+
+def _run_command(args):
+    hook = args.hook.replace('-', '_')
+    if not is_hook(hook):
+        print(f"[ERROR] Unknown hook: {args.hook}")
+        return 2
+    exit_code = forward(args.directory, hook, args.args)
+    if exit_code is not None:
+        return exit_code
+    if args.start and hasattr(socket, 'AF_UNIX'):
+        # For the next runs; this one does not wait for the server
+        try:
+            start(args.directory)
+        except (OSError, RuntimeError) as e:
+            print(f"⚠️ {e}", file=sys.stderr)
+    return run_here(hook, args.args)
+
+
+def main(argv=None):
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    parser = argparse.ArgumentParser(description="Keep the Daisy hooks warm between pre-commit runs")
+    parser.add_argument('--directory', default=os.getcwd(), help='Checkout served (current directory by default)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run a hook through the server, in this process without one')
+    run_parser.add_argument('--start', action='store_true', help='Start the server when it is not running')
+    run_parser.add_argument('hook', help='check_sql, daisy-check, ...')
+    run_parser.add_argument('args', nargs=argparse.REMAINDER, help='Arguments of the hook')
+    run_parser.set_defaults(handler=_run_command)
+
+    for name, handler, help_text in (('start', _start_command, 'Start the server in the background'),
+                                     ('serve', _serve_command, 'Run the server in the foreground')):
+        command_parser = commands.add_parser(name, help=help_text)
+        command_parser.add_argument('--idle-timeout', type=int, default=DEFAULT_IDLE_TIMEOUT, metavar='SECONDS',
+                                    help=f"Stop after this long without a request, 0 never (default: {DEFAULT_IDLE_TIMEOUT})")
+        command_parser.set_defaults(handler=handler)
+    commands.add_parser('stop', help='Stop the server').set_defaults(handler=_stop_command)
+    commands.add_parser('status', help='Show the state of the server').set_defaults(handler=_status_command)
+
+    args = parser.parse_args(argv)
+    args.directory = os.path.abspath(args.directory)
+    if args.command != 'run' and not hasattr(socket, 'AF_UNIX'):
+        print("[ERROR] daisy-checkd needs Unix sockets, hooks run in their own process on this platform")
+        return 1
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
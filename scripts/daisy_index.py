@@ -0,0 +1,90 @@
+"""Query the indexes kept by the hooks.
+
+``daisy-index xmlid sale_custom.view_form`` prints where an XML ID is
+defined; a bare ``view_form`` is looked up in every module. The index is
+brought up to date with the working tree first.
+
+``daisy-index addons`` lists the modules in load order with their
+``depends``; ``--affected base_custom`` only lists ``base_custom`` and the
+modules depending on it, directly or not: the modules to check again when
+it changes.
+"""
+import argparse
+import os
+import sqlite3
+import sys
+
+try:
+    from scripts.addon_graph import AddonGraph
+    from scripts.xmlid_index import XmlIdIndex
+except ImportError:  # executed as ``python scripts/daisy_index.py``
+    from addon_graph import AddonGraph
+    from xmlid_index import XmlIdIndex
+
+
+def _xmlid(args):
+    index = XmlIdIndex.for_directory(args.directory)
+    try:
+        if not args.no_update:
+            index.update(args.directory)
+        exit_code = 0
+        for xml_id in args.xml_ids:
+            definitions = index.lookup(xml_id)
+            if not definitions:
+                print(f"[ERROR] XML ID '{xml_id}' not found")
+                exit_code = 1
+            for qualified_id, path, line, column, model in definitions:
+                print(f"{qualified_id}  {model}  {path}:{line}:{column}")
+        return exit_code
+    finally:
+        index.close()
+
+
+def _addons(args):
+    graph = AddonGraph.for_directory(args.directory)
+    exit_code = 0
+    if args.affected is None:
+        names = graph.order()
+    else:
+        modules = [name for value in args.affected for name in value.split(',') if name]
+        for name in modules:
+            if name not in graph:
+                print(f"[ERROR] Module '{name}' not found")
+                exit_code = 1
+        names = graph.affected(modules)
+    for name in names:
+        addon = graph[name]
+        path = os.path.relpath(addon.path, args.directory)
+        print(f"{name}  {path}  depends: {', '.join(addon.depends) or '-'}")
+    return exit_code
+
+
+def main(argv=None):
+    if sys.stdout.encoding != "utf-8":
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    parser = argparse.ArgumentParser(description="Query the indexes kept by the Daisy hooks")
+    parser.add_argument('--directory', default=os.getcwd(), help='Root of the addons (current directory by default)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    xmlid_parser = commands.add_parser('xmlid', help='Find where XML IDs are defined')
+    xmlid_parser.add_argument('xml_ids', nargs='+', metavar='XML_ID', help='module.id, or a bare id')
+    xmlid_parser.add_argument('--no-update', action='store_true',
+                              help='Query the index as is, without re-indexing the changed files')
+    xmlid_parser.set_defaults(handler=_xmlid)
+
+    addons_parser = commands.add_parser('addons', help='List the modules in load order, with their depends')
+    addons_parser.add_argument('--affected', action='append', metavar='MODULE',
+                               help='Only the modules affected by a change to MODULE (repeat it, or separate with commas)')
+    addons_parser.set_defaults(handler=_addons)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (OSError, sqlite3.Error) as e:
+        print(f"[ERROR] Index unavailable: {e}")
+        return 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
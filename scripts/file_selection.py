@@ -0,0 +1,226 @@
+"""Select the files a hook has to check.
+
+pre-commit passes the staged paths as positional arguments. Per-file rules
+only look at those paths; cross-file rules widen the selection to the Odoo
+modules the paths belong to. The whole working tree is only walked with
+``--all-files`` (or when a hook is run by hand without any path).
+
+The tree is listed once per run from the git index, so ``.gitignore`` is
+respected; outside of a git checkout it is scanned with ``os.scandir``.
+Virtualenvs, caches and vendored Odoo core / enterprise trees are never
+checked.
+"""
+import bisect
+import os
+import subprocess
+
+MANIFEST_NAMES = ('__manifest__.py', '__openerp__.py')
+
+# Never checked, even when not ignored by git
+PRUNED_DIRS = frozenset({
+    '.git', '.hg', '.svn', '.venv', 'venv', 'node_modules', '__pycache__',
+    '.idea', '.vscode', '.tox', '.mypy_cache', '.pytest_cache',
+})
+# A directory holding one of these is an Odoo core or enterprise tree
+VENDORED_MARKERS = ('odoo-bin', 'odoo/release.py', 'web_enterprise/__manifest__.py')
+
+# Listing root -> sorted absolute paths of its files
+_listings = {}
+
+
+def add_file_arguments(parser):
+    """Add the ``filenames`` and ``--all-files`` arguments shared by every hook."""
+    parser.add_argument('filenames', nargs='*', help='Files passed by pre-commit')
+    parser.add_argument(
+        '--all-files', action='store_true',
+        help='Ignore the files passed by pre-commit and scan the whole working tree'
+    )
+
+
+def _has_extension(path, extensions):
+    return not extensions or path.endswith(tuple(extensions))
+
+
+def _is_ignored(path, directory, ignored_dirs, skip_hidden):
+    if not ignored_dirs and not skip_hidden:
+        return False
+    rel_path = os.path.relpath(path, directory)
+    for part in rel_path.split(os.sep)[:-1]:
+        if part in ignored_dirs or (skip_hidden and part.startswith('.') and part != '..'):
+            return True
+    return False
+
+
+def _git_files(directory):
+    """Files of ``directory`` known to git and not ignored, ``None`` outside of a checkout."""
+    command = ['git', '-C', directory, 'ls-files', '-z', '--exclude-standard']
+    try:
+        listed = subprocess.run(command + ['--cached', '--others'], capture_output=True, check=True)
+        deleted = subprocess.run(command + ['--deleted'], capture_output=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    # Nested repositories are listed as "dir/", they are not part of this tree
+    paths = {path for path in os.fsdecode(listed.stdout).split('\0') if path and not path.endswith('/')}
+    paths.difference_update(os.fsdecode(deleted.stdout).split('\0'))
+    return paths
+
+
+def _scan_files(directory):
+    """Files of ``directory`` as relative ``/``-separated paths, without git."""
+    paths = []
+    pending = ['']
+    while pending:
+        rel_dir = pending.pop()
+        try:
+            with os.scandir(os.path.join(directory, rel_dir)) as entries:
+                entries = list(entries)
+        except OSError:
+            continue
+        for entry in entries:
+            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in PRUNED_DIRS:
+                        pending.append(rel_path)
+                elif entry.is_file():
+                    paths.append(rel_path)
+            except OSError:
+                continue
+    return paths
+
+
+def _vendored_roots(rel_paths):
+    roots = set()
+    for rel_path in rel_paths:
+        for marker in VENDORED_MARKERS:
+            if rel_path.endswith('/' + marker):
+                roots.add(rel_path[:-len(marker)])
+    return roots
+
+
+def _is_pruned(rel_path, vendored_roots):
+    parts = rel_path.split('/')[:-1]
+    if any(part in PRUNED_DIRS for part in parts):
+        return True
+    prefix = ''
+    for part in parts:
+        prefix += part + '/'
+        if prefix in vendored_roots:
+            return True
+    return False
+
+
+def list_files(directory):
+    """Return the sorted absolute paths of every file to check under ``directory``.
+
+    The first listing is reused for ``directory`` and all its subdirectories.
+    """
+    directory = os.path.abspath(directory)
+    for root, paths in _listings.items():
+        if directory == root:
+            return paths
+        if directory.startswith(root + os.sep):
+            prefix = directory + os.sep
+            start = bisect.bisect_left(paths, prefix)
+            end = bisect.bisect_left(paths, prefix[:-1] + chr(ord(os.sep) + 1))
+            return paths[start:end]
+
+    rel_paths = _git_files(directory)
+    if rel_paths is None:
+        rel_paths = _scan_files(directory)
+    vendored_roots = _vendored_roots(rel_paths)
+    paths = sorted(
+        os.path.join(directory, *rel_path.split('/'))
+        for rel_path in rel_paths
+        if not _is_pruned(rel_path, vendored_roots)
+    )
+    _listings[directory] = paths
+    return paths
+
+
+def clear_listings():
+    """Forget the listings, for a process checking the tree more than once."""
+    _listings.clear()
+
+
+def walk_files(directory, extensions=None, ignored_dirs=(), skip_hidden=False):
+    """Yield every file under ``directory`` matching ``extensions``, pruning ``ignored_dirs``."""
+    for path in list_files(directory):
+        if _has_extension(path, extensions) and not _is_ignored(path, directory, ignored_dirs, skip_hidden):
+            yield path
+
+
+def select_files(filenames, all_files=False, directory=None, extensions=None,
+                 ignored_dirs=(), skip_hidden=False):
+    """Return the absolute paths a per-file rule has to check."""
+    directory = os.path.abspath(directory or os.getcwd())
+    if all_files or not filenames:
+        return list(walk_files(directory, extensions, ignored_dirs, skip_hidden))
+
+    selected = []
+    for filename in filenames:
+        path = os.path.abspath(filename)
+        if not os.path.isfile(path) or not _has_extension(path, extensions):
+            continue
+        if _is_ignored(path, directory, ignored_dirs, skip_hidden):
+            continue
+        selected.append(path)
+    return selected
+
+
+def find_module_root(path, directory=None):
+    """Return the Odoo module directory containing ``path``.
+
+    The module is the closest parent holding a manifest. Without one, the
+    top-level directory under ``directory`` is used, as the hooks always did.
+    Returns ``None`` for files sitting directly in ``directory``.
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    current = os.path.dirname(os.path.abspath(path))
+    while True:
+        if any(os.path.isfile(os.path.join(current, name)) for name in MANIFEST_NAMES):
+            return current
+        parent = os.path.dirname(current)
+        if current == directory or parent == current:
+            break
+        current = parent
+
+    rel_path = os.path.relpath(os.path.abspath(path), directory)
+    parts = rel_path.split(os.sep)
+    if len(parts) < 2 or parts[0] == os.pardir:
+        return None
+    return os.path.join(directory, parts[0])
+
+
+def get_module_name(path, directory=None):
+    """Return the name of the Odoo module containing ``path``."""
+    module_root = find_module_root(path, directory)
+    if module_root is None:
+        return ""
+    return os.path.basename(module_root)
+
+
+def select_module_files(filenames, all_files=False, directory=None, extensions=None,
+                        ignored_dirs=(), skip_hidden=False):
+    """Return the files a cross-file rule has to check.
+
+    The passed files are widened to every matching file of the modules they
+    belong to, so that e.g. a duplicate ID between a staged and an unchanged
+    file of the same module is still reported.
+    """
+    directory = os.path.abspath(directory or os.getcwd())
+    if all_files or not filenames:
+        return list(walk_files(directory, extensions, ignored_dirs, skip_hidden))
+
+    module_roots = set()
+    selected = []
+    for path in select_files(filenames, False, directory, extensions, ignored_dirs, skip_hidden):
+        module_root = find_module_root(path, directory)
+        if module_root is None:
+            selected.append(path)
+        else:
+            module_roots.add(module_root)
+
+    for module_root in sorted(module_roots):
+        selected.extend(walk_files(module_root, extensions, ignored_dirs, skip_hidden))
+    return selected
@@ -0,0 +1,226 @@
+"""Odoo models declared in the addons: their classes, fields and methods.
+
+``extract_models`` reads the model classes of one parsed file in a single
+pass; its result is plain data, cached with the other rule results. A
+:class:`ModelRegistry` gathers them for a whole addons path: every model
+name is mapped to the classes defining or extending it, in module load
+order, and lookups follow the ``_inherit`` graph across modules.
+"""
+import ast
+import hashlib
+import json
+import os
+from collections import defaultdict
+
+try:
+    from scripts.addon_graph import AddonGraph
+    from scripts.file_selection import find_module_root, walk_files
+    from scripts.result_cache import MISSING, ResultCache, default_cache_path
+    from scripts.source import SourceFile
+    from scripts.stat_memo import remembered
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from addon_graph import AddonGraph
+    from file_selection import find_module_root, walk_files
+    from result_cache import MISSING, ResultCache, default_cache_path
+    from source import SourceFile
+    from stat_memo import remembered
+
+# Bump when ``extract_models`` returns something different
+REGISTRY_VERSION = 2
+
+
+def _base_name(node):
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Name):
+        return node.id
+    return None
+
+
+def _strings(node):
+    """The string, or list/tuple of strings, assigned to ``_inherit``."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return [node.value]
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [elt.value for elt in node.elts if isinstance(elt, ast.Constant) and isinstance(elt.value, str)]
+    return []
+
+
+def _field(call, line):
+    kwargs = {kw.arg: kw.value for kw in call.keywords}
+    compute = kwargs.get('compute')
+    if not (isinstance(compute, ast.Constant) and isinstance(compute.value, str)):
+        compute = None
+    return {"type": call.func.attr, "line": line, "compute": compute.value if compute else None}
+
+
+def extract_models(tree, method_info=None):
+    """Return the classes of ``tree`` with their Odoo model attributes.
+
+    Each class is a dict: ``class``, ``line``, ``bases`` (their last name),
+    ``attribute_bases`` (those written ``module.Name``), ``name`` (``_name``
+    or ``None``), ``inherit`` (``_inherit`` as a list), ``assigned``
+    (``_name`` and ``_inherit`` when assigned, even to a value that is not a
+    literal), ``fields`` (name -> type, line, compute method) and ``methods``
+    (name -> ``method_info(node)``, the line by default).
+    """
+    classes = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.ClassDef):
+            continue
+        info = {
+            "class": node.name,
+            "line": node.lineno,
+            "bases": [name for name in map(_base_name, node.bases) if name],
+            "attribute_bases": [base.attr for base in node.bases if isinstance(base, ast.Attribute)],
+            "name": None,
+            "inherit": [],
+            "assigned": [],
+            "fields": {},
+            "methods": {},
+        }
+        for item in node.body:
+            if isinstance(item, ast.Assign):
+                for target in item.targets:
+                    if not isinstance(target, ast.Name):
+                        continue
+                    if target.id in ('_name', '_inherit') and target.id not in info["assigned"]:
+                        info["assigned"].append(target.id)
+                    if target.id == '_name':
+                        if isinstance(item.value, ast.Constant) and isinstance(item.value.value, str):
+                            info["name"] = item.value.value
+                    elif target.id == '_inherit':
+                        info["inherit"] = _strings(item.value)
+                    elif isinstance(item.value, ast.Call) and isinstance(item.value.func, ast.Attribute):
+                        info["fields"][target.id] = _field(item.value, item.lineno)
+            elif isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                info["methods"][item.name] = method_info(item) if method_info else item.lineno
+        classes.append(info)
+    return classes
+
+
+def model_name(info):
+    """The model a class defines or extends, as Odoo resolves it, or ``None``."""
+    if info["name"]:
+        return info["name"]
+    if len(info["inherit"]) == 1:
+        return info["inherit"][0]
+    return None
+
+
+def module_load_order(module_paths):
+    """Sort module directories so that every module comes after its ``depends``."""
+    graph = AddonGraph.from_paths(module_paths)
+    return [graph[name].path for name in graph.order()]
+
+
+class ModelRegistry:
+    """Model name -> classes defining or extending it, across files and modules."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        # Model name -> [(module path, file path, class info)]
+        self.models = defaultdict(list)
+        self.unnamed = []
+
+    def add(self, path, classes):
+        module_path = find_module_root(path, self.directory) or ''
+        for info in classes:
+            name = model_name(info)
+            if name:
+                self.models[name].append((module_path, path, info))
+            else:
+                self.unnamed.append((module_path, path, info))
+
+    def sort(self):
+        """Put the classes of every model in module load order, then file and line order."""
+        modules = {module for entries in self.models.values() for module, _, _ in entries}
+        rank = {module: index for index, module in enumerate(module_load_order(sorted(modules - {''})))}
+        for entries in self.models.values():
+            entries.sort(key=lambda entry: (rank.get(entry[0], -1), entry[1], entry[2]["line"]))
+
+    def classes(self, model):
+        """The classes of ``model`` and of the models it inherits from, the model first."""
+        found = []
+        seen = set()
+        pending = [model]
+        while pending:
+            name = pending.pop(0)
+            if name in seen:
+                continue
+            seen.add(name)
+            for entry in self.models.get(name, ()):
+                found.append(entry)
+                pending.extend(parent for parent in entry[2]["inherit"] if parent != name)
+        return found
+
+    def has_method(self, model, method):
+        return any(method in info["methods"] for _, _, info in self.classes(model))
+
+    def fields(self, model):
+        """Field name -> (file path, field), the last definition in load order winning."""
+        entries = self.classes(model)
+        inherited = [entry for entry in entries if model_name(entry[2]) != model]
+        own = [entry for entry in entries if model_name(entry[2]) == model]
+        fields = {}
+        for _, path, info in list(reversed(inherited)) + own:
+            for name, field in info["fields"].items():
+                fields[name] = (path, field)
+        return fields
+
+
+def _file_key(path, stat):
+    payload = json.dumps(['model-registry', REGISTRY_VERSION, path, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def _file_models(path):
+    source = SourceFile(path)
+    # Most Python files declare no model, they are not parsed
+    if b'_name' not in source.data and b'_inherit' not in source.data:
+        return []
+    if source.tree is None:
+        return []
+    return extract_models(source.tree)
+
+
+def _cached_file_models(cache, path):
+    key = _file_key(path, os.stat(path))
+    classes = cache.get(key)
+    if classes is MISSING:
+        classes = _file_models(path)
+        cache.put(key, classes)
+    return classes
+
+
+def build_registry(directory, known=None, use_cache=True):
+    """Return the registry of every model under ``directory``.
+
+    ``known`` maps paths already analyzed in this run to their
+    ``extract_models`` result. The other files are read from the result
+    cache, keyed by their size and modification time, so only the files
+    changed since the previous run are parsed again.
+    """
+    known = known or {}
+    cache = ResultCache(default_cache_path(directory)) if use_cache else None
+    registry = ModelRegistry(directory)
+    try:
+        for path in walk_files(directory, ('.py',)):
+            if path in known:
+                registry.add(path, known[path])
+                continue
+            try:
+                if cache is None:
+                    registry.add(path, remembered('models', path, lambda: _file_models(path)))
+                    continue
+                registry.add(path, remembered('models', path, lambda: _cached_file_models(cache, path)))
+            except OSError:
+                continue
+        # Passed files outside of the listing (e.g. ignored by git)
+        for path in sorted(set(known) - set(walk_files(directory, ('.py',)))):
+            registry.add(path, known[path])
+    finally:
+        if cache is not None:
+            cache.close()
+    registry.sort()
+    return registry
@@ -0,0 +1,77 @@
+"""Spread per-file analysis over a process pool."""
+import argparse
+import math
+import os
+
+# Below this many files per worker, starting the pool costs more than it saves
+MIN_FILES_PER_JOB = 8
+
+
+def _read_first_line(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.readline().strip()
+
+
+def cgroup_cpu_quota():
+    """Return the CPU quota of the current cgroup (e.g. 2.5 CPUs), or ``None``."""
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        quota, period = _read_first_line('/sys/fs/cgroup/cpu.max').split()[:2]
+        if quota != 'max':
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        # cgroup v1
+        quota = int(_read_first_line('/sys/fs/cgroup/cpu/cpu.cfs_quota_us'))
+        period = int(_read_first_line('/sys/fs/cgroup/cpu/cpu.cfs_period_us'))
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus():
+    """The CPUs this process may use: affinity mask and container quota included."""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    quota = cgroup_cpu_quota()
+    if quota:
+        count = min(count, max(1, math.ceil(quota)))
+    return count
+
+
+def jobs_argument(value):
+    """``argparse`` type of ``--jobs``: a positive number or ``auto``."""
+    if value == 'auto':
+        return available_cpus()
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a number or 'auto', got {value!r}")
+    if jobs < 1:
+        raise argparse.ArgumentTypeError("expected at least 1 job")
+    return jobs
+
+
+def worker_count(jobs, task_count):
+    """The number of processes worth starting for ``task_count`` files, 1 to run in-process."""
+    return max(1, min(jobs, task_count // MIN_FILES_PER_JOB))
+
+
+def map_tasks(function, tasks, jobs, initializer=None, initargs=()):
+    """Return ``[function(task) for task in tasks]``, in order, computed by ``jobs`` processes.
+
+    ``function`` and ``initializer`` must be module-level functions. The tasks
+    are sent in chunks to limit the inter-process round trips.
+    """
+    # Imported here: a single-process run does not pay for multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = max(1, len(tasks) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+        return list(executor.map(function, tasks, chunksize=chunksize))
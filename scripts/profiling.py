@@ -0,0 +1,127 @@
+"""Where the time of a hook run goes: per phase, rule and file.
+
+With ``--profile`` the runner records the wall and CPU time of every phase
+(discover, cache, read, parse, analyze, report), of every rule and of every
+file, and prints the slowest ones once the rules have reported.
+``--profile-output`` also dumps the ``cProfile`` statistics of the run, to
+be read with ``pstats`` (or snakeviz).
+"""
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+PHASES = ('discover', 'cache', 'read', 'parse', 'analyze', 'report')
+DEFAULT_TOP = 10
+
+
+def clock():
+    return time.perf_counter(), time.process_time()
+
+
+def since(start):
+    """The ``(wall, cpu)`` seconds elapsed since ``start``, a :func:`clock` value."""
+    wall, cpu = clock()
+    return wall - start[0], cpu - start[1]
+
+
+def _add(total, spent):
+    total[0] += spent[0]
+    total[1] += spent[1]
+
+
+def _seconds():
+    return [0.0, 0.0]
+
+
+class Profile:
+    """Wall and CPU seconds of a run, summed per phase, per rule and per file.
+
+    Time spent in worker processes is added as it comes back with their
+    results, so with ``--jobs`` the phases add up to more than the run.
+    """
+
+    def __init__(self, top=DEFAULT_TOP, output=None):
+        self.top = top
+        self.output = output
+        self.phases = defaultdict(_seconds)
+        # Rule id -> phase -> seconds
+        self.rules = defaultdict(lambda: defaultdict(_seconds))
+        # Path -> rule id (or read / parse) -> seconds
+        self.files = defaultdict(lambda: defaultdict(_seconds))
+        self.jobs = 1
+        self._started = None
+        self._profiler = None
+        if output:
+            import cProfile
+            self._profiler = cProfile.Profile()
+
+    @classmethod
+    def from_options(cls, options):
+        """The profile asked for on the command line, ``None`` without ``--profile``."""
+        if not (options.profile or options.profile_output):
+            return None
+        return cls(options.profile_top, options.profile_output)
+
+    def start(self):
+        self._started = clock()
+        if self._profiler is not None:
+            self._profiler.enable()
+
+    def stop(self):
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._profiler.dump_stats(self.output)
+
+    def add(self, phase, spent, rule_id=None, path=None):
+        """Add ``spent`` ``(wall, cpu)`` seconds to ``phase``, and to the rule and file given."""
+        _add(self.phases[phase], spent)
+        if rule_id is not None:
+            _add(self.rules[rule_id][phase], spent)
+        if path is not None:
+            _add(self.files[path][rule_id or phase], spent)
+
+    @contextmanager
+    def measure(self, phase, rule_id=None, path=None):
+        start = clock()
+        try:
+            yield
+        finally:
+            self.add(phase, since(start), rule_id, path)
+
+    def add_file(self, path, timings):
+        """Add the timings of a file analyzed by ``_analyze_task``."""
+        for phase in ('read', 'parse'):
+            self.add(phase, timings[phase], path=path)
+        for rule_id, spent in timings['rules'].items():
+            self.add('analyze', spent, rule_id, path)
+
+    def print_report(self, stream=None):
+        stream = stream or sys.stderr
+        total = since(self._started) if self._started else (0.0, 0.0)
+        print(f"\n⏱️ Profile: {total[0]:.3f}s wall, {total[1]:.3f}s CPU"
+              + (f" (this process, {self.jobs} jobs)" if self.jobs > 1 else ""), file=stream)
+
+        print("  Phases (wall / CPU seconds):", file=stream)
+        for phase in PHASES:
+            wall, cpu = self.phases.get(phase, (0.0, 0.0))
+            print(f"    {phase:<10} {wall:9.3f} / {cpu:9.3f}", file=stream)
+
+        rules = sorted(self.rules.items(), key=lambda item: -sum(spent[0] for spent in item[1].values()))
+        print("  Slowest rules (wall / CPU seconds):", file=stream)
+        for rule_id, phases in rules[:self.top]:
+            details = ', '.join(f"{phase} {phases[phase][0]:.3f} / {phases[phase][1]:.3f}"
+                                for phase in PHASES if phase in phases)
+            print(f"    {rule_id:<24} {details}", file=stream)
+
+        files = sorted(self.files.items(), key=lambda item: -sum(spent[0] for spent in item[1].values()))
+        print("  Slowest files (wall seconds):", file=stream)
+        for path, parts in files[:self.top]:
+            wall = sum(spent[0] for spent in parts.values())
+            largest = sorted(parts.items(), key=lambda item: -item[1][0])[:3]
+            details = ', '.join(f"{name} {spent[0]:.3f}" for name, spent in largest)
+            print(f"    {wall:9.3f}  {path}  ({details})", file=stream)
+
+        if self.output:
+            note = " (worker processes not included, use --jobs 1)" if self.jobs > 1 else ""
+            print(f"  cProfile statistics written to {self.output}{note}", file=stream)
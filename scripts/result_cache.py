@@ -0,0 +1,203 @@
+"""On-disk cache of per-file rule results, shared by every hook run.
+
+Results are keyed by the file content (its git blob SHA), its path, the rule
+id, version and options, so an unchanged file is never analyzed twice by
+the same rule. The cache is a SQLite database in ``.git/`` (or in the user
+cache directory outside of a git checkout): concurrent hook processes can
+use it safely, and the least recently used results are evicted once it
+grows past ``max_size`` bytes. Any cache error only disables the cache.
+A long-running process (``daisy-checkd``) also keeps them in memory.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+
+CACHE_FILENAME = 'daisy-cache.sqlite3'
+DEFAULT_MAX_SIZE = 64 * 1024 * 1024
+MISSING = object()
+# Results kept in memory by a long-running process, dropped past this count
+MEMORY_ENTRIES = 200000
+
+# Key -> JSON result, ``None`` unless ``keep_in_memory`` was called
+_memory = None
+# Directory of the rules -> sizes and mtimes of its modules
+_fingerprints = {}
+
+
+def keep_in_memory():
+    """Also keep the results in memory, for a process running the hooks again and again."""
+    global _memory
+    if _memory is None:
+        _memory = {}
+
+
+def _remember(key, value):
+    if len(_memory) >= MEMORY_ENTRIES:
+        _memory.clear()
+    _memory[key] = value
+
+
+def find_git_dir(directory):
+    """Return the ``.git`` directory of the checkout containing ``directory``."""
+    current = os.path.abspath(directory)
+    while True:
+        git_path = os.path.join(current, '.git')
+        if os.path.isdir(git_path):
+            return git_path
+        if os.path.isfile(git_path):
+            # Worktrees and submodules point to their git directory
+            with open(git_path, 'r', encoding='utf-8') as f:
+                content = f.read().strip()
+            if content.startswith('gitdir:'):
+                return os.path.normpath(os.path.join(current, content[len('gitdir:'):].strip()))
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def user_cache_dir():
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'daisy-pre-commit-hooks')
+
+
+def default_cache_path(directory, filename=CACHE_FILENAME):
+    cache_dir = os.environ.get('DAISY_CACHE_DIR') or find_git_dir(directory) or user_cache_dir()
+    return os.path.join(cache_dir, filename)
+
+
+def _rule_fingerprint(rule):
+    # Editing or upgrading a rule, or a helper it shares with the others (source, xml_scan,
+    # token_scan, model_registry...), invalidates its results even without a version bump:
+    # every module next to the rule's counts, read once per process
+    module = sys.modules.get(type(rule).__module__)
+    try:
+        directory = os.path.dirname(os.path.abspath(module.__file__))
+        if directory not in _fingerprints:
+            _fingerprints[directory] = sorted(
+                (entry.name, entry.stat().st_size, entry.stat().st_mtime_ns)
+                for entry in os.scandir(directory) if entry.name.endswith('.py')
+            )
+        return _fingerprints[directory]
+    except (AttributeError, TypeError, OSError):
+        return None
+
+
+class ResultCache:
+    def __init__(self, path, max_size=DEFAULT_MAX_SIZE):
+        self.path = path
+        self.max_size = max_size
+        self._connection = None
+        self._disabled = False
+        self._pending = {}
+        self._used = set()
+        self._rule_keys = {}
+
+    def _connect(self):
+        if self._connection is None and not self._disabled:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._connection = sqlite3.connect(self.path, timeout=30)
+                self._connection.execute('PRAGMA journal_mode=WAL')
+                self._connection.execute(
+                    'CREATE TABLE IF NOT EXISTS results ('
+                    ' key TEXT PRIMARY KEY, value TEXT NOT NULL,'
+                    ' size INTEGER NOT NULL, last_used REAL NOT NULL)'
+                )
+                self._connection.execute(
+                    'CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)'
+                )
+                self._connection.commit()
+            except (OSError, sqlite3.Error) as e:
+                self._disable(e)
+        return self._connection
+
+    def _disable(self, error):
+        print(f"⚠️ Result cache disabled ({self.path}): {error}")
+        self._disabled = True
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+    def key(self, rule, source):
+        if rule.id not in self._rule_keys:
+            # The part of the key shared by every file, serialized once per run
+            self._rule_keys[rule.id] = json.dumps(
+                [rule.id, rule.version, _rule_fingerprint(rule), rule.config()], sort_keys=True, default=str,
+            )
+        payload = json.dumps([self._rule_keys[rule.id], source.path, source.digest])
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """Return the cached result of ``key``, or ``MISSING``."""
+        if _memory is not None and key in _memory:
+            # Not refreshed in the database, the process keeps it anyway
+            return json.loads(_memory[key])
+        connection = self._connect()
+        if connection is None:
+            return MISSING
+        try:
+            row = connection.execute('SELECT value FROM results WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            self._disable(e)
+            return MISSING
+        if row is None:
+            return MISSING
+        self._used.add(key)
+        if _memory is not None:
+            _remember(key, row[0])
+        return json.loads(row[0])
+
+    def put(self, key, result):
+        self._pending[key] = json.dumps(result)
+        if _memory is not None:
+            _remember(key, self._pending[key])
+
+    def close(self):
+        """Write the new results, refresh the used ones and evict the oldest."""
+        if not self._pending and not self._used:
+            return
+        connection = self._connect()
+        if connection is None:
+            return
+        now = time.time()
+        try:
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)',
+                    [(key, value, len(value), now) for key, value in self._pending.items()],
+                )
+                connection.executemany(
+                    'UPDATE results SET last_used = ? WHERE key = ?',
+                    [(now, key) for key in self._used],
+                )
+                self._evict(connection)
+        except sqlite3.Error as e:
+            self._disable(e)
+            return
+        finally:
+            self._pending.clear()
+            self._used.clear()
+        connection.close()
+        self._connection = None
+
+    def _evict(self, connection):
+        total_size = connection.execute('SELECT COALESCE(SUM(size), 0) FROM results').fetchone()[0]
+        if total_size <= self.max_size:
+            return
+        # Drop the least recently used results down to 90% of the limit
+        excess = total_size - int(self.max_size * 0.9)
+        stale_keys = []
+        for key, size in connection.execute('SELECT key, size FROM results ORDER BY last_used'):
+            stale_keys.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany('DELETE FROM results WHERE key = ?', stale_keys)
+
@@ -0,0 +1,97 @@
+"""Base class and registry of the checks run by the hooks and ``daisy-check``."""
+import importlib
+
+try:
+    from scripts.file_selection import select_files, select_module_files
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from file_selection import select_files, select_module_files
+
+# Rule id -> (module, class), imported only when the rule is enabled.
+RULES = {
+    'duplicate-method-names': ('check_duplicate_method_names', 'DuplicateMethodChecker'),
+    'raw-sql': ('check_sql', 'SQLChecker'),
+    'for-return': ('check_for_return', 'ClassPropertyChecker'),
+    'xml-header': ('check_xml_header', 'XMLHeaderChecker'),
+    'xml-closing-tags': ('check_xml_closing_tags', 'XMLChecker'),
+    'report-fields': ('check_report_template', 'XMLFieldValidator'),
+    'report-template': ('check_report_template', 'ReportFieldChecker'),
+    'compute-function': ('check_compute_function', 'ComputeFieldChecker'),
+    'manifest-fields': ('check_requirements', 'ManifestChecker'),
+    'print-usage': ('check_print_usage', 'PrintChecker'),
+    'duplicate-ids': ('check_duplicate_ids', 'XMLIdDuplicationChecker'),
+    'sudo-comment': ('check_sudo_comment', 'SudoChecker'),
+    'long-functions': ('check_long_functions', 'FunctionLengthChecker'),
+    'model-file': ('check_model_file', 'OdooModelFileChecker'),
+    'module-names': ('check_module_names', 'ModuleDirectoryChecker'),
+    'xml-filenames': ('check_xml_filenames', 'RecursiveXmlChecker'),
+    'lines-max': ('check_lines_max', 'LineLengthChecker'),
+}
+
+_PACKAGE = __name__.rpartition('.')[0]
+
+
+def load_rule(rule_id):
+    """Return the rule class registered under ``rule_id``."""
+    module_name, class_name = RULES[rule_id]
+    if _PACKAGE:
+        module_name = f"{_PACKAGE}.{module_name}"
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class Rule:
+    """A check run on the files selected for it.
+
+    ``analyze`` gets one :class:`~scripts.source.SourceFile` and returns the
+    plain data (lists, strings, numbers) found in it; ``report`` gets every
+    ``(path, result)`` pair, prints them and returns the exit code of the rule.
+    ``violations`` gets the same pairs and yields what ``report`` would
+    print as :class:`~scripts.violations.Violation` records, for
+    ``--format jsonl`` / ``sarif``.
+    Cross-file rules return facts from ``analyze`` and compare them in
+    ``report``.
+    """
+    id = None
+    # Bump when ``analyze`` returns something different for the same file
+    version = 1
+    extensions = ('.py',)
+    ignored_dirs = ()
+    skip_hidden = False
+    # Compare the files of a module with each other
+    cross_file = False
+    # ``restrict`` keeps what touches the staged lines, for ``--diff-only``
+    diff_aware = False
+    # ``analyze`` only depends on the path and content of the file and on ``config()``
+    cacheable = True
+
+    def __init__(self, options):
+        self.options = options
+        self.directory = options.directory
+
+    @classmethod
+    def add_arguments(cls, parser, combined=False):
+        """Add the rule options; ``combined`` is set when all rules share the parser."""
+
+    def is_enabled(self):
+        return True
+
+    def config(self):
+        """The options changing what ``analyze`` returns, part of the cache key."""
+        return {}
+
+    def select_files(self, filenames, all_files):
+        select = select_module_files if self.cross_file else select_files
+        return select(filenames, all_files, self.directory, self.extensions,
+                      set(self.ignored_dirs), self.skip_hidden)
+
+    def analyze(self, source):
+        raise NotImplementedError
+
+    def report(self, results):
+        raise NotImplementedError
+
+    def restrict(self, result, lines):
+        """Return the part of ``result`` touching ``lines``, a :class:`~scripts.staged_lines.LineRanges`."""
+        return result
+
+    def violations(self, results):
+        raise NotImplementedError
@@ -0,0 +1,270 @@
+"""Run rules on the selected files, reading and parsing every file once."""
+import argparse
+import contextlib
+import os
+import sys
+
+try:
+    from scripts.file_selection import add_file_arguments
+    from scripts.parallel import jobs_argument, map_tasks, worker_count
+    from scripts.profiling import DEFAULT_TOP, Profile, clock, since
+    from scripts.result_cache import MISSING, ResultCache, default_cache_path
+    from scripts.rules import load_rule
+    from scripts.source import SourceFile
+    from scripts.staged_lines import staged_lines
+    from scripts.violations import FORMATS, WRITERS
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from file_selection import add_file_arguments
+    from parallel import jobs_argument, map_tasks, worker_count
+    from profiling import DEFAULT_TOP, Profile, clock, since
+    from result_cache import MISSING, ResultCache, default_cache_path
+    from rules import load_rule
+    from source import SourceFile
+    from staged_lines import staged_lines
+    from violations import FORMATS, WRITERS
+
+# Rules analyzing files in this process, by id
+_analyzers = {}
+
+
+def build_parser(rule_classes, description, combined=False):
+    # Rules sharing an option (e.g. --addons) give it the same meaning
+    parser = argparse.ArgumentParser(
+        description=description, conflict_handler='resolve' if combined else 'error'
+    )
+    add_file_arguments(parser)
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Analyze every file again instead of reusing the cached results')
+    parser.add_argument('--jobs', '-j', type=jobs_argument, default=1, metavar='N',
+                        help="Number of processes analyzing the files, 'auto' for one per available CPU")
+    parser.add_argument('--diff-only', action='store_true',
+                        help='Only report the lines staged for commit (git diff --cached) for the line-based checks')
+    parser.add_argument('--format', choices=FORMATS, default='text',
+                        help='text for people (default), jsonl (one JSON violation per line) or sarif '
+                             '(for code scanning); the other messages then go to stderr')
+    parser.add_argument('--profile', action='store_true',
+                        help='Print the time spent per phase, rule and file once the rules have reported')
+    parser.add_argument('--profile-top', type=int, default=DEFAULT_TOP, metavar='N',
+                        help=f"Number of slowest rules and files printed by --profile (default: {DEFAULT_TOP})")
+    parser.add_argument('--profile-output', metavar='PATH',
+                        help='Also dump the cProfile statistics of the run to PATH (implies --profile)')
+    for rule_class in rule_classes:
+        rule_class.add_arguments(parser, combined)
+    return parser
+
+
+def open_cache(options):
+    if options.no_cache:
+        return None
+    return ResultCache(default_cache_path(options.directory))
+
+
+def _init_worker(rule_ids, options):
+    # Rules are rebuilt in each worker: only their ids and options are sent
+    _analyzers.clear()
+    for rule_id in rule_ids:
+        _analyzers[rule_id] = load_rule(rule_id)(options)
+
+
+def _timed_analyze(rule, source, timings):
+    # The reading and parsing triggered by the rule are counted apart
+    start = clock()
+    before = [sum(spent) for spent in zip(*source.timings.values())]
+    result = rule.analyze(source)
+    wall, cpu = since(start)
+    after = [sum(spent) for spent in zip(*source.timings.values())]
+    timings['rules'][rule.id] = (wall - after[0] + before[0], cpu - after[1] + before[1])
+    return result
+
+
+def _analyze_task(task):
+    """Analyze one file with the given rules, return ``(path, {rule id: result}, warning, failures, timings)``.
+
+    ``failures`` maps the rules that raised on the file to their error: the
+    other rules keep their results. ``timings`` is ``None`` unless the task
+    asks for them (``--profile``).
+    """
+    path, rule_ids, timed = task
+    source = SourceFile(path)
+    analyzed = {}
+    failures = {}
+    warning = None
+    timings = {'rules': {}} if timed else None
+    for rule_id in rule_ids:
+        try:
+            if timed:
+                analyzed[rule_id] = _timed_analyze(_analyzers[rule_id], source, timings)
+            else:
+                analyzed[rule_id] = _analyzers[rule_id].analyze(source)
+        except OSError as e:
+            warning = f"⚠️ Could not read {path}: {e}"
+            break
+        except Exception as e:
+            failures[rule_id] = f"{type(e).__name__}: {e}"
+    if timed:
+        timings.update((phase, tuple(spent)) for phase, spent in source.timings.items())
+    return path, analyzed, warning, failures, timings
+
+
+def analyze_files(rules, filenames, all_files, cache=None, jobs=1, profile=None, staged=None, failed=None):
+    """Return ``{rule id: [(path, result), ...]}`` sorted by path.
+
+    Cached results are looked up here, only the other files are analyzed,
+    in ``jobs`` processes when there are enough of them. The results do not
+    depend on the number of jobs. The time spent is added to ``profile``.
+    With ``staged`` lines (``--diff-only``), the rules able to restrict
+    their results only get the staged files, and only what touches the
+    staged lines is kept. A rule raising on a file is reported and gets
+    no result for it; its id is added to the ``failed`` set.
+    """
+    selected = {}
+    for rule in rules:
+        start = clock()
+        for path in rule.select_files(filenames, all_files):
+            if staged is not None and rule.diff_aware and not staged.get(path):
+                continue
+            selected.setdefault(path, {})[rule.id] = rule
+        if profile is not None:
+            profile.add('discover', since(start), rule.id)
+
+    results = {rule.id: {} for rule in rules}
+    keys = {}
+    tasks = []
+    for path in sorted(selected):
+        pending = []
+        source = SourceFile(path)
+        try:
+            for rule in selected[path].values():
+                if cache is not None and rule.cacheable:
+                    keys[rule.id, path] = cache.key(rule, source)
+                    start = clock()
+                    result = cache.get(keys[rule.id, path])
+                    if profile is not None:
+                        profile.add('cache', since(start))
+                    if result is not MISSING:
+                        results[rule.id][path] = result
+                        continue
+                pending.append(rule.id)
+        except OSError as e:
+            print(f"⚠️ Could not read {path}: {e}")
+            continue
+        finally:
+            if profile is not None:
+                profile.add('read', tuple(source.timings['read']), path=path)
+        if pending:
+            tasks.append((path, pending, profile is not None))
+
+    jobs = worker_count(jobs, len(tasks))
+    if profile is not None:
+        profile.jobs = jobs
+    if jobs > 1:
+        analyzed_files = map_tasks(_analyze_task, tasks, jobs, _init_worker,
+                                   ([rule.id for rule in rules], rules[0].options))
+    else:
+        _analyzers.clear()
+        _analyzers.update((rule.id, rule) for rule in rules)
+        analyzed_files = map(_analyze_task, tasks)
+
+    for path, analyzed, warning, failures, timings in analyzed_files:
+        if warning:
+            print(warning)
+        for rule_id, error in failures.items():
+            print(f"❌ {rule_id} failed on {path}: {error}")
+            if failed is not None:
+                failed.add(rule_id)
+        if timings is not None:
+            profile.add_file(path, timings)
+        start = clock()
+        for rule_id, result in analyzed.items():
+            results[rule_id][path] = result
+            if (rule_id, path) in keys:
+                cache.put(keys[rule_id, path], result)
+        if profile is not None and keys:
+            profile.add('cache', since(start))
+    if staged is not None:
+        for rule in rules:
+            if rule.diff_aware:
+                results[rule.id] = {path: rule.restrict(result, staged[path])
+                                    for path, result in results[rule.id].items()}
+    return {rule_id: sorted(by_path.items()) for rule_id, by_path in results.items()}
+
+
+def _write_violations(rule, results, writer):
+    exit_code = 0
+    for violation in rule.violations(results):
+        writer.write(violation)
+        if violation.severity == 'error':
+            exit_code = 1
+    return exit_code
+
+
+def run(rules, filenames, all_files, combined=False, cache=None, jobs=1, profile=None, output_format='text',
+        diff_only=False):
+    """Analyze the files, let every rule report and return the worst exit code.
+
+    With a ``profile``, the time spent is printed at the end. With the
+    ``jsonl`` or ``sarif`` ``output_format``, only the violations are
+    written to stdout, as the rules yield them. With ``diff_only``, the
+    line-based rules only report the lines staged for commit.
+    """
+    if output_format == 'text':
+        return _run(rules, filenames, all_files, combined, cache, jobs, profile, diff_only)
+    directory = rules[0].directory if rules else os.getcwd()
+    writer = WRITERS[output_format](sys.stdout, directory, rules)
+    try:
+        with contextlib.redirect_stdout(sys.stderr):
+            return _run(rules, filenames, all_files, combined, cache, jobs, profile, diff_only, writer)
+    finally:
+        writer.close()
+
+
+def _staged(rules):
+    directory = rules[0].directory if rules else os.getcwd()
+    staged = staged_lines(directory)
+    if staged is None:
+        print("⚠️ --diff-only needs a git checkout, every line is checked")
+    return staged
+
+
+def _run(rules, filenames, all_files, combined, cache, jobs, profile, diff_only=False, writer=None):
+    if profile is not None:
+        profile.start()
+    staged = _staged(rules) if diff_only and any(rule.diff_aware for rule in rules) else None
+    failed = set()
+    try:
+        results = analyze_files(rules, filenames, all_files, cache, jobs, profile, staged, failed)
+    finally:
+        if cache is not None:
+            cache.close()
+
+    exit_codes = {}
+    for rule in rules:
+        start = clock()
+        if writer is None:
+            exit_codes[rule.id] = rule.report(results[rule.id]) or 0
+        else:
+            exit_codes[rule.id] = _write_violations(rule, results[rule.id], writer)
+        if rule.id in failed:
+            exit_codes[rule.id] = max(exit_codes[rule.id], 1)
+        if profile is not None:
+            profile.add('report', since(start), rule.id)
+
+    if combined:
+        print("")
+        for rule in rules:
+            status = "Passed" if exit_codes[rule.id] == 0 else "Failed"
+            print(f"{rule.id} {'.' * (40 - len(rule.id))} {status}")
+    if profile is not None:
+        profile.stop()
+        profile.print_report()
+    return max(exit_codes.values(), default=0)
+
+
+def run_rules(rule_classes, description, argv=None):
+    """Entry point of a standalone hook running ``rule_classes``."""
+    parser = build_parser(rule_classes, description)
+    args = parser.parse_args(argv)
+    args.directory = os.getcwd()
+    rules = [rule_class(args) for rule_class in rule_classes]
+    return run(rules, args.filenames, args.all_files, cache=open_cache(args), jobs=args.jobs,
+               profile=Profile.from_options(args), output_format=args.format, diff_only=args.diff_only)
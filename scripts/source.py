@@ -0,0 +1,147 @@
+"""A checked file, read and parsed at most once whatever the number of rules."""
+import ast
+import hashlib
+import io
+import os
+
+try:
+    from scripts.profiling import clock, since
+    from scripts.stat_memo import remembered
+    from scripts.token_scan import TokenIndex
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from profiling import clock, since
+    from stat_memo import remembered
+    from token_scan import TokenIndex
+
+
+# Bytes read at a time when hashing a file not loaded in memory
+CHUNK_SIZE = 1 << 16
+
+
+def blob_sha(data):
+    """The git blob SHA of ``data``, as ``git hash-object`` computes it."""
+    digest = hashlib.sha1(b'blob %d\0' % len(data))
+    digest.update(data)
+    return digest.hexdigest()
+
+
+def file_blob_sha(f):
+    """The git blob SHA of the binary file ``f``, read in chunks."""
+    digest = hashlib.sha1(b'blob %d\0' % os.fstat(f.fileno()).st_size)
+    for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SourceFile:
+    """Lazily read and parse a file for every rule checking it.
+
+    ``tree`` is the Python AST, ``tokens`` its :class:`TokenIndex`,
+    ``xml_root`` the XML root element. Parse errors are kept in
+    ``syntax_error`` / ``xml_error`` instead of being raised, each rule
+    decides how to report them. ``timings`` holds the ``(wall, cpu)``
+    seconds spent reading and parsing, for ``--profile``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.extension = os.path.splitext(path)[1]
+        self._data = None
+        self._text = None
+        self._lines = None
+        self._tree = None
+        self._tokens = None
+        self._xml_root = None
+        self._digest = None
+        self.syntax_error = None
+        self.xml_error = None
+        self.timings = {'read': [0.0, 0.0], 'parse': [0.0, 0.0]}
+
+    def _spent(self, phase, start):
+        wall, cpu = since(start)
+        self.timings[phase][0] += wall
+        self.timings[phase][1] += cpu
+
+    @property
+    def data(self):
+        if self._data is None:
+            start = clock()
+            with open(self.path, 'rb') as f:
+                self._data = f.read()
+            self._spent('read', start)
+        return self._data
+
+    def open(self):
+        """A binary file of the content, read from memory once the data is loaded."""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self.path, 'rb')
+
+    @property
+    def digest(self):
+        """The git blob SHA of the content, hashed from the disk when not loaded."""
+        if self._digest is None:
+            start = clock()
+            if self._data is not None:
+                self._digest = blob_sha(self._data)
+            else:
+                self._digest = remembered('digest', self.path, self._hash_file)
+            self._spent('read', start)
+        return self._digest
+
+    def _hash_file(self):
+        with open(self.path, 'rb') as f:
+            return file_blob_sha(f)
+
+    @property
+    def text(self):
+        """The decoded content, with universal newlines like ``open()``."""
+        if self._text is None:
+            text = self.data.decode('utf-8-sig', errors='ignore')
+            self._text = text.replace('\r\n', '\n').replace('\r', '\n')
+        return self._text
+
+    @property
+    def lines(self):
+        """The lines of the file, with their line ending, like ``readlines()``."""
+        if self._lines is None:
+            self._lines = io.StringIO(self.text).readlines()
+        return self._lines
+
+    @property
+    def tree(self):
+        """The Python AST, ``None`` when the file has a syntax error."""
+        if self._tree is None and self.syntax_error is None:
+            text = self.text
+            start = clock()
+            try:
+                self._tree = ast.parse(text, filename=self.path)
+            except (SyntaxError, ValueError) as e:
+                self.syntax_error = e
+            self._spent('parse', start)
+        return self._tree
+
+    @property
+    def tokens(self):
+        """The comments and code tokens of a Python file, from a single tokenize pass."""
+        if self._tokens is None:
+            text = self.text
+            start = clock()
+            self._tokens = TokenIndex(text)
+            self._spent('parse', start)
+        return self._tokens
+
+    @property
+    def xml_root(self):
+        """The XML root element, ``None`` when the file is not well-formed."""
+        if self._xml_root is None and self.xml_error is None:
+            import xml.etree.ElementTree as ET  # only needed by the few rules reading the tree
+
+            data = self.data
+            start = clock()
+            try:
+                self._xml_root = ET.parse(io.BytesIO(data)).getroot()
+            except ET.ParseError as e:
+                self.xml_error = e
+            self._spent('parse', start)
+        return self._xml_root
@@ -0,0 +1,101 @@
+"""The lines staged for commit, read once from ``git diff --cached``.
+
+With ``--diff-only`` the line-based rules only check the staged files and
+only report what touches their staged lines: the lines themselves, or the
+functions overlapping them. Pre-existing violations elsewhere in legacy
+files are left alone.
+"""
+import bisect
+import codecs
+import os
+import re
+import subprocess
+
+_HUNK = re.compile(r'^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class LineRanges:
+    """The lines of a file added or changed by the staged diff, as sorted intervals.
+
+    ``ranges`` are inclusive ``(start, end)`` line numbers of the staged
+    file. ``deletions`` are the lines after which lines were removed: they
+    touch the function around them, but no line of their own.
+    """
+
+    def __init__(self, ranges=(), deletions=()):
+        self.ranges = sorted(ranges)
+        self._ends = [end for _, end in self.ranges]
+        self.deletions = sorted(deletions)
+
+    def __bool__(self):
+        return bool(self.ranges or self.deletions)
+
+    def __contains__(self, line):
+        index = bisect.bisect_left(self._ends, line)
+        return index < len(self.ranges) and self.ranges[index][0] <= line
+
+    def overlaps(self, start, end):
+        """Whether the lines ``start`` to ``end`` (inclusive) were changed."""
+        index = bisect.bisect_left(self._ends, start)
+        if index < len(self.ranges) and self.ranges[index][0] <= end:
+            return True
+        index = bisect.bisect_left(self.deletions, start)
+        # Lines removed right after ``end`` were the last ones of the span
+        return index < len(self.deletions) and self.deletions[index] <= end
+
+
+def _unquote(path):
+    # Git quotes paths holding special characters, C style
+    if path.startswith('"') and path.endswith('"'):
+        return codecs.escape_decode(path[1:-1].encode('utf-8', 'surrogateescape'))[0].decode('utf-8', 'surrogateescape')
+    return path
+
+
+def parse_diff(text):
+    """Return ``{path: LineRanges}`` from a ``git diff -U0`` output, paths as git prints them."""
+    ranges = {}
+    deletions = {}
+    path = None
+    remaining = 0
+    # Not splitlines(): a staged line may hold a form feed or a line separator
+    for line in text.split('\n'):
+        if remaining:
+            # Removed and added lines of the current hunk (no context with -U0)
+            if not line.startswith('\\'):
+                remaining -= 1
+            continue
+        if line.startswith('diff '):
+            path = None
+        elif line.startswith('+++ '):
+            # A name holding spaces is followed by a tab
+            target = _unquote(line[4:].rstrip('\t'))
+            path = None if target == '/dev/null' else target[2:]
+            if path is not None:
+                ranges.setdefault(path, [])
+                deletions.setdefault(path, [])
+        elif line.startswith('@@') and path is not None:
+            match = _HUNK.match(line)
+            if match is None:
+                continue
+            removed = int(match.group(1)) if match.group(1) is not None else 1
+            start = int(match.group(2))
+            added = int(match.group(3)) if match.group(3) is not None else 1
+            if added:
+                ranges[path].append((start, start + added - 1))
+            else:
+                deletions[path].append(start)
+            remaining = removed + added
+    return {path: LineRanges(ranges[path], deletions[path]) for path in ranges}
+
+
+def staged_lines(directory):
+    """Return ``{absolute path: LineRanges}`` of the files staged under ``directory``, ``None`` outside of git."""
+    command = ['git', '-C', directory, '-c', 'core.quotePath=false', 'diff', '--cached', '--relative',
+               '-U0', '--no-color', '--no-ext-diff']
+    try:
+        output = subprocess.run(command, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    parsed = parse_diff(output.decode('utf-8', 'surrogateescape'))
+    directory = os.path.abspath(directory)
+    return {os.path.join(directory, *path.split('/')): lines for path, lines in parsed.items()}
@@ -0,0 +1,43 @@
+"""Per-file values kept in memory by a long-running process (``daisy-checkd``).
+
+A value computed from a file is kept with the size and modification time
+of the file, and computed again once they change. Nothing is kept until
+:func:`enable` is called: a hook started by pre-commit does not live long
+enough for it to pay off.
+"""
+import os
+import time
+
+# A file modified this recently may change again without its mtime moving
+RACY_SECONDS = 2
+
+# (kind, path) -> ((size, mtime_ns), value), ``None`` while disabled
+_values = None
+
+
+def enable():
+    global _values
+    if _values is None:
+        _values = {}
+
+
+def clear():
+    if _values is not None:
+        _values.clear()
+
+
+def remembered(kind, path, compute):
+    """Return ``compute()``, the ``kind`` value of ``path``, reused while the file is unchanged."""
+    if _values is None:
+        return compute()
+    # The process may serve several directories, relative paths would clash
+    key = (kind, os.path.abspath(path))
+    stat = os.stat(path)
+    stamp = (stat.st_size, stat.st_mtime_ns)
+    entry = _values.get(key)
+    if entry is not None and entry[0] == stamp:
+        return entry[1]
+    value = compute()
+    if time.time() - stat.st_mtime > RACY_SECONDS:
+        _values[key] = (stamp, value)
+    return value
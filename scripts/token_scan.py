@@ -0,0 +1,60 @@
+"""One tokenize pass per Python file, shared by the line-level rules.
+
+``SourceFile.tokens`` builds a :class:`TokenIndex` the first time a rule
+needs it; every other rule checking the same file reuses it. Rules then
+ask where the comments are or where a name is called instead of testing
+substrings of the raw lines, so ``#`` or ``print(`` inside a string are
+never mistaken for code.
+"""
+import io
+import token
+
+# Tokens carrying no code
+_LAYOUT_TOKENS = {token.NL, token.NEWLINE, token.INDENT, token.DEDENT, token.COMMENT, token.ENDMARKER}
+
+
+class TokenIndex:
+    """The comments and code tokens of a Python file.
+
+    ``comments`` maps a line number to the column of its comment. ``tokens``
+    holds the code tokens as ``(type, string, row, column)``. When the file
+    cannot be tokenized to the end (syntax error), ``complete`` is false and
+    ``last_row`` is the last line reached: rules fall back to a line-based
+    check after it.
+    """
+
+    def __init__(self, text):
+        import tokenize  # imported on the first Python file, not by every hook
+
+        self.comments = {}
+        self.tokens = []
+        self.last_row = 0
+        self.complete = True
+        try:
+            for tok in tokenize.generate_tokens(io.StringIO(text).readline):
+                if tok.type == token.COMMENT:
+                    self.comments[tok.start[0]] = tok.start[1]
+                elif tok.type not in _LAYOUT_TOKENS:
+                    self.tokens.append((tok.type, tok.string) + tok.start)
+                self.last_row = tok.end[0]
+        except (tokenize.TokenError, SyntaxError):
+            self.complete = False
+
+    def is_tokenized(self, row):
+        return self.complete or row <= self.last_row
+
+    def calls(self, name, method=False):
+        """Yield the ``(row, column)`` of the calls to ``name``.
+
+        With ``method``, only ``obj.name(...)`` calls, otherwise only plain
+        ``name(...)`` calls (not ``obj.name(...)``).
+        """
+        tokens = self.tokens
+        for index, (token_type, string, row, column) in enumerate(tokens):
+            if token_type != token.NAME or string != name:
+                continue
+            if index + 1 >= len(tokens) or tokens[index + 1][1] != '(':
+                continue
+            after_dot = index > 0 and tokens[index - 1][1] == '.'
+            if after_dot == method:
+                yield row, column
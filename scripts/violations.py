@@ -0,0 +1,104 @@
+"""Violations found by the rules and their machine-readable output.
+
+Every rule yields :class:`Violation` records from ``violations(results)``.
+The text output stays the rule's own ``report``; ``--format jsonl`` and
+``--format sarif`` write each violation as soon as the rule yields it, so
+nothing but the current violation is held in memory whatever their number.
+"""
+import json
+import os
+from collections import namedtuple
+
+FORMATS = ('text', 'jsonl', 'sarif')
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+SARIF_LEVELS = {'error': 'error', 'warning': 'warning', 'info': 'note'}
+TOOL_NAME = 'daisy-pre-commit-hooks'
+TOOL_URI = 'https://github.com/Daisy-Consulting/daisy-pre-commit-hooks'
+
+# ``line`` and ``column`` are 1-based, ``None`` when the violation is about the whole file
+Violation = namedtuple('Violation', 'rule path line column message severity')
+Violation.__new__.__defaults__ = ('error',)
+
+
+class JsonLinesWriter:
+    """One JSON object per violation and per line."""
+
+    def __init__(self, stream, directory, rules):
+        self.stream = stream
+
+    def write(self, violation):
+        self.stream.write(json.dumps(violation._asdict(), ensure_ascii=False) + '\n')
+
+    def close(self):
+        self.stream.flush()
+
+
+class SarifWriter:
+    """A SARIF 2.1.0 log with one run, written result by result.
+
+    The header is written first and each result as it comes, the document
+    is only complete once ``close`` writes the end of it. Paths under
+    ``directory`` are relative to ``%SRCROOT%``, as code scanning expects.
+    """
+
+    def __init__(self, stream, directory, rules):
+        self.stream = stream
+        self.directory = os.path.abspath(directory)
+        self.rule_index = {rule.id: index for index, rule in enumerate(rules)}
+        self.count = 0
+        driver = {
+            'name': TOOL_NAME,
+            'informationUri': TOOL_URI,
+            'rules': [{'id': rule.id, 'shortDescription': {'text': _describe(rule)}} for rule in rules],
+        }
+        header = json.dumps({'$schema': SARIF_SCHEMA, 'version': '2.1.0'}, ensure_ascii=False)[:-1]
+        run = json.dumps({
+            'tool': {'driver': driver},
+            'originalUriBaseIds': {'SRCROOT': {'uri': _file_uri(self.directory) + '/'}},
+        }, ensure_ascii=False)[:-1]
+        self.stream.write(f'{header}, "runs": [{run}, "results": [\n')
+
+    def _location(self, violation):
+        path = os.path.abspath(violation.path)
+        relative = os.path.relpath(path, self.directory)
+        if relative.startswith(os.pardir):
+            artifact = {'uri': _file_uri(path)}
+        else:
+            artifact = {'uri': relative.replace(os.sep, '/'), 'uriBaseId': 'SRCROOT'}
+        location = {'artifactLocation': artifact}
+        if violation.line:
+            location['region'] = {'startLine': violation.line}
+            if violation.column:
+                location['region']['startColumn'] = violation.column
+        return {'physicalLocation': location}
+
+    def write(self, violation):
+        result = {
+            'ruleId': violation.rule,
+            'level': SARIF_LEVELS.get(violation.severity, 'warning'),
+            'message': {'text': violation.message},
+            'locations': [self._location(violation)],
+        }
+        if violation.rule in self.rule_index:
+            result['ruleIndex'] = self.rule_index[violation.rule]
+        separator = ',\n' if self.count else ''
+        self.stream.write(separator + json.dumps(result, ensure_ascii=False))
+        self.count += 1
+
+    def close(self):
+        self.stream.write('\n]}]}\n')
+        self.stream.flush()
+
+
+WRITERS = {'jsonl': JsonLinesWriter, 'sarif': SarifWriter}
+
+
+def _describe(rule):
+    doc = (type(rule).__doc__ or '').strip()
+    return doc.splitlines()[0] if doc else rule.id
+
+
+def _file_uri(path):
+    path = path.replace(os.sep, '/')
+    return 'file://' + (path if path.startswith('/') else '/' + path)
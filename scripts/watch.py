@@ -0,0 +1,224 @@
+"""Re-check the files as they are saved (``daisy-check --watch``).
+
+The tree is checked once, then polled: the size and mtime of every file
+to check are compared every ``--interval`` seconds, and the tree is only
+listed again once a directory changed (a file was added, removed or
+renamed). The rules then run on the changed files only, cross-file rules
+widening them to their modules as for a commit, and the violations
+introduced or fixed are printed. Results and per-file values stay in
+memory between checks, so a check costs the changed files and the
+modules they belong to.
+"""
+import contextlib
+import os
+import sys
+import time
+from collections import Counter
+
+try:
+    from scripts import result_cache, stat_memo
+    from scripts.file_selection import clear_listings, find_module_root, list_files
+    from scripts.runner import analyze_files, open_cache
+except ImportError:  # executed as ``python scripts/daisy_check.py``
+    import result_cache
+    import stat_memo
+    from file_selection import clear_listings, find_module_root, list_files
+    from runner import analyze_files, open_cache
+
+DEFAULT_INTERVAL = 0.5
+
+
+def _stamp(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class Tree:
+    """The files to check under ``directory``, with their size and mtime."""
+
+    def __init__(self, directory):
+        self.directory = os.path.abspath(directory)
+        self.files = {}
+        self.directories = {}
+        self._list()
+
+    def _list(self):
+        clear_listings()
+        paths = list_files(self.directory)
+        self.files = {path: _stamp(path) for path in paths}
+        directories = {self.directory}
+        for path in paths:
+            parent = os.path.dirname(path)
+            while parent not in directories:
+                directories.add(parent)
+                parent = os.path.dirname(parent)
+        self.directories = {directory: _stamp(directory) for directory in directories}
+
+    def changes(self):
+        """Return the paths added, modified or removed since the previous call."""
+        before = self.files
+        if any(_stamp(directory) != stamp for directory, stamp in self.directories.items()):
+            self._list()
+        else:
+            self.files = {path: _stamp(path) for path in before}
+        return sorted(path for path in set(before) | set(self.files) if before.get(path) != self.files.get(path))
+
+    def neighbour(self, path):
+        """A file left in the directory of the removed ``path`` (or above), with the same extension."""
+        extension = os.path.splitext(path)[1]
+        directory = os.path.dirname(path)
+        while directory.startswith(self.directory):
+            for candidate in self.files:
+                if os.path.dirname(candidate) == directory and candidate.endswith(extension):
+                    return candidate
+            if directory == self.directory:
+                break
+            directory = os.path.dirname(directory)
+        return None
+
+
+def _contains(directory, path):
+    return path == directory or path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def _moved(violation):
+    return violation._replace(line=None, column=None)
+
+
+def diff(before, after):
+    """Return the violations ``(introduced, fixed)``, leaving out those only moved to another line."""
+    introduced = after - before
+    fixed = before - after
+    moved = Counter(map(_moved, introduced)) & Counter(map(_moved, fixed))
+    remaining = Counter(moved)
+    kept_fixed = []
+    for violation in sorted(fixed, key=_sort_key):
+        if remaining[_moved(violation)]:
+            remaining[_moved(violation)] -= 1
+        else:
+            kept_fixed.append(violation)
+    kept_introduced = []
+    for violation in sorted(introduced, key=_sort_key):
+        if moved[_moved(violation)]:
+            moved[_moved(violation)] -= 1
+        else:
+            kept_introduced.append(violation)
+    return kept_introduced, kept_fixed
+
+
+def _sort_key(violation):
+    return violation.path, violation.line or 0, violation.column or 0, violation.rule, violation.message
+
+
+def format_violation(violation, directory):
+    path = os.path.relpath(os.path.abspath(violation.path), directory)
+    location = path + ''.join(f":{number}" for number in (violation.line, violation.column) if number)
+    return f"{location}: [{violation.rule}] {violation.message}"
+
+
+class Watcher:
+    """The violations of the rules over the tree, kept up to date as files change.
+
+    ``make_rules`` returns new rule instances: the rules keep state from one
+    run (the files selected, the modules seen), so every check gets its own.
+    """
+
+    def __init__(self, make_rules, options, stream=None):
+        self.make_rules = make_rules
+        self.options = options
+        self.directory = os.path.abspath(options.directory)
+        self.stream = stream or sys.stdout
+        # Rule id -> set of violations
+        self.violations = {}
+
+    def check(self, filenames, all_files):
+        """Run the rules on ``filenames``, return ``(introduced, fixed)``."""
+        rules = self.make_rules()
+        cache = open_cache(self.options)
+        # The rules' own messages would get mixed with the changes
+        with contextlib.redirect_stdout(sys.stderr):
+            try:
+                results = analyze_files(rules, filenames, all_files, cache, self.options.jobs)
+            finally:
+                if cache is not None:
+                    cache.close()
+            found = {rule.id: set(rule.violations(results[rule.id])) for rule in rules}
+
+        introduced, fixed = [], []
+        for rule in rules:
+            before = self.violations.get(rule.id, set())
+            if all_files or not filenames:
+                in_scope = before
+            else:
+                # Only the violations of the files checked again can have changed
+                scope = {path for path, _ in results[rule.id]} | set(filenames)
+                modules = set()
+                if rule.cross_file:
+                    # A cross-file rule reports on the whole module of a changed file, even on files it
+                    # did not analyze (duplicate IDs read from the XML ID index)
+                    modules = {find_module_root(path, self.directory) for path in filenames} - {None}
+                in_scope = {v for v in before if os.path.abspath(v.path) in scope
+                            or any(_contains(os.path.abspath(v.path), path) for path in filenames)
+                            or any(_contains(module, os.path.abspath(v.path)) for module in modules)}
+            rule_introduced, rule_fixed = diff(in_scope, found[rule.id])
+            introduced.extend(rule_introduced)
+            fixed.extend(rule_fixed)
+            self.violations[rule.id] = (before - in_scope) | found[rule.id]
+        return introduced, fixed
+
+    def count(self):
+        return sum(len(violations) for violations in self.violations.values())
+
+    def has_errors(self):
+        return any(v.severity == 'error' for violations in self.violations.values() for v in violations)
+
+    def _print(self, text=''):
+        print(text, file=self.stream, flush=True)
+
+    def print_changes(self, changed, introduced, fixed, seconds):
+        clock = time.strftime('%H:%M:%S')
+        self._print(f"[{clock}] {len(changed)} file(s) changed, checked in {seconds:.2f}s")
+        for violation in introduced:
+            icon = "❌" if violation.severity == 'error' else "⚠️"
+            self._print(f"  {icon} {format_violation(violation, self.directory)}")
+        for violation in fixed:
+            self._print(f"  ✅ fixed: {format_violation(violation, self.directory)}")
+        if not introduced and not fixed:
+            self._print("  No violation introduced or fixed")
+        self._print(f"  {self.count()} violation(s) in the tree")
+
+    def watch(self, filenames=(), all_files=True, interval=DEFAULT_INTERVAL):
+        """Check the tree, then every change until interrupted; return the exit code of the last check."""
+        # A long-running process: keep the results and per-file values in memory
+        result_cache.keep_in_memory()
+        stat_memo.enable()
+
+        start = time.perf_counter()
+        tree = Tree(self.directory)
+        introduced, _ = self.check(list(filenames), all_files)
+        for violation in introduced:
+            self._print(format_violation(violation, self.directory))
+        self._print(f"\n👀 {self.count()} violation(s) in {len(tree.files)} files, checked in "
+                    f"{time.perf_counter() - start:.2f}s. Watching {self.directory} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(interval)
+                changed = tree.changes()
+                if not changed:
+                    continue
+                start = time.perf_counter()
+                # A removed file is not checked, a file left next to it brings its module back in
+                filenames = set(changed)
+                for path in changed:
+                    if path not in tree.files:
+                        neighbour = tree.neighbour(path)
+                        if neighbour:
+                            filenames.add(neighbour)
+                introduced, fixed = self.check(sorted(filenames), False)
+                self.print_changes(changed, introduced, fixed, time.perf_counter() - start)
+        except KeyboardInterrupt:
+            self._print("")
+        return 1 if self.has_errors() else 0
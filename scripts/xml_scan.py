@@ -0,0 +1,101 @@
+"""Single-pass scanning of Odoo data files with expat, keeping exact positions."""
+from collections import namedtuple
+from xml.parsers import expat
+
+# ``fields`` are the names of the <field> children, ``line`` the line of the opening tag
+Record = namedtuple('Record', 'model id fields line')
+
+# Bytes fed to expat at a time by ``check_well_formed``
+CHUNK_SIZE = 1 << 16
+
+# Elements declaring an XML ID -> model of the record they create
+ID_TAGS = {
+    'record': None,  # the ``model`` attribute
+    'template': 'ir.ui.view',
+    'menuitem': 'ir.ui.menu',
+    'act_window': 'ir.actions.act_window',
+    'report': 'ir.actions.report',
+}
+
+
+def _parse(stream, parser):
+    """Feed ``stream`` (a binary file) to ``parser``, return ``False`` when it is not well-formed."""
+    try:
+        parser.ParseFile(stream)
+    except expat.ExpatError:
+        return False
+    return True
+
+
+def scan_records(stream):
+    """Return every ``<record>`` of the XML ``stream`` (a binary file) in document order.
+
+    The file is parsed once, whatever its number of records. Nested records
+    (e.g. in a ``<field>``) are returned too. When the file is not
+    well-formed, the records closed before the error are returned.
+    """
+    records = []
+    open_records = []  # [model, id, fields, line, depth]
+    depth = 0
+    parser = expat.ParserCreate()
+
+    def start_element(name, attributes):
+        nonlocal depth
+        depth += 1
+        if name == 'record':
+            open_records.append([attributes.get('model', ''), attributes.get('id', ''), [],
+                                 parser.CurrentLineNumber, depth])
+        elif name == 'field' and open_records and open_records[-1][4] == depth - 1:
+            open_records[-1][2].append(attributes.get('name', ''))
+
+    def end_element(name):
+        nonlocal depth
+        if name == 'record' and open_records and open_records[-1][4] == depth:
+            model, record_id, fields, line, _ = open_records.pop()
+            records.append(Record(model, record_id, fields, line))
+        depth -= 1
+
+    parser.StartElementHandler = start_element
+    parser.EndElementHandler = end_element
+    _parse(stream, parser)
+    records.sort(key=lambda record: record.line)
+    return records
+
+
+def scan_ids(stream, tags=ID_TAGS):
+    """Return the ``(id, line, column, model)`` of the elements of ``tags`` declaring an ``id``.
+
+    The position is the one of the opening tag, both 1-based. Nothing but
+    the IDs is kept in memory; when the file is not well-formed, the IDs
+    found before the error are returned.
+    """
+    ids = []
+    parser = expat.ParserCreate()
+
+    def start_element(name, attributes):
+        if name in tags and 'id' in attributes:
+            model = ID_TAGS.get(name) or attributes.get('model', '')
+            ids.append((attributes['id'], parser.CurrentLineNumber, parser.CurrentColumnNumber + 1, model))
+
+    parser.StartElementHandler = start_element
+    _parse(stream, parser)
+    return ids
+
+
+def check_well_formed(stream, chunk_size=CHUNK_SIZE):
+    """Return ``None`` when the XML ``stream`` (a binary file) is well-formed.
+
+    Otherwise return the ``(line, column, message)`` of the first error,
+    both 1-based. The file is fed to expat in chunks of ``chunk_size`` bytes
+    and no tree is built, so memory does not grow with the file. Expat reads
+    the encoding from the BOM or the XML declaration.
+    """
+    parser = expat.ParserCreate()
+    try:
+        while True:
+            chunk = stream.read(chunk_size)
+            parser.Parse(chunk, not chunk)
+            if not chunk:
+                return None
+    except expat.ExpatError as e:
+        return (parser.ErrorLineNumber, parser.ErrorColumnNumber + 1, expat.ErrorString(e.code))
@@ -0,0 +1,136 @@
+"""On-disk index of the XML IDs (``module.id``) defined in the working tree.
+
+Every ``<record>``, ``<template>``, ``<menuitem>``, ``<act_window>`` and
+``<report>`` ID is stored with its file, position and model. ``update``
+only re-scans the XML files whose size or modification time changed, so
+keeping the index current costs a ``stat`` per file plus the changed files.
+The index is a SQLite database stored next to the result cache.
+"""
+import os
+import sqlite3
+
+try:
+    from scripts.file_selection import get_module_name, walk_files
+    from scripts.result_cache import default_cache_path
+    from scripts.xml_scan import scan_ids
+except ImportError:  # executed as ``python scripts/<hook>.py``
+    from file_selection import get_module_name, walk_files
+    from result_cache import default_cache_path
+    from xml_scan import scan_ids
+
+INDEX_FILENAME = 'daisy-xmlid-index.sqlite3'
+# Bump when the tables or what is indexed change, the index is then rebuilt
+INDEX_VERSION = 1
+
+
+def qualify(xml_id, module):
+    """The fully qualified ``module.id`` of an ID written in ``module``."""
+    return xml_id if '.' in xml_id else f"{module}.{xml_id}"
+
+
+def _path_range(directory):
+    # Every path under ``directory`` sorts between these two strings
+    prefix = os.path.abspath(directory) + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
+class XmlIdIndex:
+    """Errors are raised as ``sqlite3.Error`` / ``OSError``, callers decide how to degrade."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        if self.connection.execute('PRAGMA user_version').fetchone()[0] != INDEX_VERSION:
+            self._create_tables()
+
+    @classmethod
+    def for_directory(cls, directory):
+        return cls(default_cache_path(directory, INDEX_FILENAME))
+
+    def _create_tables(self):
+        with self.connection:
+            self.connection.execute('DROP TABLE IF EXISTS files')
+            self.connection.execute('DROP TABLE IF EXISTS xmlids')
+            self.connection.execute(
+                'CREATE TABLE files (path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL)'
+            )
+            self.connection.execute(
+                'CREATE TABLE xmlids (xmlid TEXT NOT NULL, name TEXT NOT NULL, module TEXT NOT NULL,'
+                ' path TEXT NOT NULL, line INTEGER NOT NULL, column INTEGER NOT NULL, model TEXT NOT NULL)'
+            )
+            self.connection.execute('CREATE INDEX xmlids_xmlid ON xmlids (xmlid)')
+            self.connection.execute('CREATE INDEX xmlids_name ON xmlids (name)')
+            self.connection.execute('CREATE INDEX xmlids_path ON xmlids (path)')
+            self.connection.execute(f'PRAGMA user_version = {INDEX_VERSION}')
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, directory, root=None):
+        """Re-index the XML files of ``directory`` changed since the last update.
+
+        ``directory`` may be one module of the ``root`` addons directory
+        (``directory`` itself by default), the modules being named from it.
+        Returns the number of files re-indexed or removed from the index.
+        """
+        directory = os.path.abspath(directory)
+        root = os.path.abspath(root or directory)
+        current = {}
+        for path in walk_files(directory, ('.xml',)):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            current[path] = (stat.st_size, stat.st_mtime_ns)
+
+        known = {
+            path: (size, mtime_ns) for path, size, mtime_ns in self.connection.execute(
+                'SELECT path, size, mtime_ns FROM files WHERE path >= ? AND path < ?', _path_range(directory)
+            )
+        }
+        removed = known.keys() - current.keys()
+        changed = sorted(path for path, stamp in current.items() if known.get(path) != stamp)
+        if not removed and not changed:
+            return 0
+
+        with self.connection:
+            for path in removed.union(changed):
+                self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+                self.connection.execute('DELETE FROM xmlids WHERE path = ?', (path,))
+            for path in changed:
+                try:
+                    with open(path, 'rb') as stream:
+                        ids = scan_ids(stream)
+                except OSError:
+                    continue
+                module = get_module_name(path, root)
+                self.connection.executemany(
+                    'INSERT INTO xmlids (xmlid, name, module, path, line, column, model)'
+                    ' VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    [(qualify(xml_id, module), xml_id, module, path, line, column, model)
+                     for xml_id, line, column, model in ids],
+                )
+                self.connection.execute(
+                    'INSERT INTO files (path, size, mtime_ns) VALUES (?, ?, ?)', (path,) + current[path]
+                )
+        return len(removed) + len(changed)
+
+    def lookup(self, xml_id):
+        """Return the ``(xmlid, path, line, column, model)`` definitions of ``xml_id``.
+
+        A qualified ``module.id`` is looked up as is, a bare ``id`` in every module.
+        """
+        key = 'xmlid' if '.' in xml_id else 'name'
+        return self.connection.execute(
+            f'SELECT xmlid, path, line, column, model FROM xmlids WHERE {key} = ? ORDER BY path, line',
+            (xml_id,),
+        ).fetchall()
+
+    def directory_ids(self, directory):
+        """Return the ``(name, path, line, column)`` of the IDs written under ``directory``."""
+        return self.connection.execute(
+            'SELECT name, path, line, column FROM xmlids WHERE path >= ? AND path < ? ORDER BY path, line',
+            _path_range(directory),
+        ).fetchall()
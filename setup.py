@@ -5,7 +5,7 @@ setup(
     version='0.1.0',
     description='Custom Odoo Pre-commit .hooks',
     author='Your Name',
-    packages=find_packages(),
+    packages=find_packages(exclude=['benchmarks', 'benchmarks.*']),
     entry_points={
         'console_scripts': [
             'check_duplicate_method_names = scripts.check_duplicate_method_names:main',
@@ -25,6 +25,9 @@ setup(
             'check_xml_filenames = scripts.check_xml_filenames:main',
             'check_lines_max = scripts.check_lines_max:main',
             'check_branch_push = scripts.check_branch_push:main',
+            'daisy-check = scripts.daisy_check:main',
+            'daisy-index = scripts.daisy_index:main',
+            'daisy-checkd = scripts.daisy_checkd:main',
         ]
     },
     classifiers=[
@@ -0,0 +1,61 @@
+import ast
+import sys
+import textwrap
+import unittest
+
+from scripts.check_sql import SQLScanner
+
+
+def scan(code):
+    scanner = SQLScanner()
+    scanner.scan(ast.parse(textwrap.dedent(code)).body)
+    return sorted(scanner.violations)
+
+
+class SQLScannerTest(unittest.TestCase):
+
+    def test_conditional_expression(self):
+        self.assertEqual(scan("""
+            self.env.cr.execute("DELETE FROM t" if x else "SELECT 1")
+            self.env.cr.execute("SELECT 1" if x else "DELETE FROM t")
+            self.env.cr.execute("SELECT 1" if x else "SELECT 2")
+        """), [(2, 'Direct Odoo SQL'), (3, 'Direct Odoo SQL')])
+
+    def test_conditional_expression_in_variable(self):
+        self.assertEqual(scan("""
+            query = "SELECT 1" if x else "UPDATE t SET a = 1"
+            cr.execute(query)
+        """), [(2, 'SQL in variable'), (3, 'Execute SQL variable')])
+
+    def test_function_and_class_headers(self):
+        self.assertEqual(scan("""
+            @decor(self.env.cr.execute("DELETE FROM t1"))
+            def f(a=cr.execute("DELETE FROM t2"), *, b=cr.execute("DELETE FROM t3")) -> cr.execute("DELETE FROM t4"):
+                pass
+
+            class A(cr.execute("DELETE FROM t5"), metaclass=cr.execute("DELETE FROM t6")):
+                pass
+        """), [(2, 'Direct Odoo SQL')] + [(3, 'General SQL Execute')] * 3 + [(6, 'General SQL Execute')] * 2)
+
+    def test_with_and_except_expressions(self):
+        self.assertEqual(scan("""
+            with cr.execute("DELETE FROM t1"):
+                cr.execute("DELETE FROM t2")
+            try:
+                pass
+            except cr.execute("DELETE FROM t3"):
+                cr.execute("DELETE FROM t4")
+        """), [(2, 'General SQL Execute'), (3, 'General SQL Execute'),
+               (6, 'General SQL Execute'), (7, 'General SQL Execute')])
+
+    @unittest.skipIf(sys.version_info < (3, 10), "match needs Python 3.10")
+    def test_match_guard(self):
+        self.assertEqual(scan("""
+            match x:
+                case 1 if cr.execute("DELETE FROM t1"):
+                    cr.execute("DELETE FROM t2")
+        """), [(3, 'General SQL Execute'), (4, 'General SQL Execute')])
+
+
+if __name__ == '__main__':
+    unittest.main()